@@ -44,20 +44,20 @@ def clusters_create(data):
 
 
 @rest.put('/clusters/<cluster_id>')
-@v.check_exists(api.get_cluster, 'cluster_id')
+@v.check_exists(api.get_cluster_status, 'cluster_id')
 @v.validate(v_c_s.CLUSTER_SCALING_SCHEMA, v_c_s.check_cluster_scaling)
 def clusters_scale(cluster_id, data):
     return u.render(api.scale_cluster(cluster_id, data).to_wrapped_dict())
 
 
 @rest.get('/clusters/<cluster_id>')
-@v.check_exists(api.get_cluster, 'cluster_id')
+@v.check_exists(api.get_cluster_status, 'cluster_id')
 def clusters_get(cluster_id):
     return u.render(api.get_cluster(cluster_id).to_wrapped_dict())
 
 
 @rest.delete('/clusters/<cluster_id>')
-@v.check_exists(api.get_cluster, 'cluster_id')
+@v.check_exists(api.get_cluster_status, 'cluster_id')
 def clusters_delete(cluster_id):
     api.terminate_cluster(cluster_id)
     return u.render()
@@ -203,3 +203,10 @@ def image_tags_add(image_id, data):
 @v.validate(v_images.image_tags_schema)
 def image_tags_delete(image_id, data):
     return u.render(api.remove_image_tags(image_id, **data).wrapped_dict)
+
+
+## Metrics ops
+
+@rest.get('/metrics/remote')
+def remote_metrics_get():
+    return u.render(remote_metrics=api.get_remote_metrics())
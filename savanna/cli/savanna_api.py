@@ -37,6 +37,7 @@ from savanna import config
 from savanna.db import api as db_api
 import savanna.main as server
 from savanna.openstack.common import log as logging
+from savanna.service import reconciliation
 
 
 LOG = logging.getLogger(__name__)
@@ -59,5 +60,9 @@ def main():
 
     app = server.make_app()
 
+    # the loop is started by the service process only, so applications
+    # made by WSGI containers for each of their workers don't start it
+    reconciliation.setup_reconciliation()
+
     wsgi.server(eventlet.listen((cfg.CONF.host, cfg.CONF.port), backlog=500),
                 app)
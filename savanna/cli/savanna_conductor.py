@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import socket
+import sys
+
+import eventlet
+
+eventlet.monkey_patch()
+
+from oslo.config import cfg
+
+# If ../savanna/__init__.py exists, add ../ to Python search path, so that
+# it will override what happens to be installed in /usr/(local/)lib/python...
+possible_topdir = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]),
+                                                os.pardir,
+                                                os.pardir))
+if os.path.exists(os.path.join(possible_topdir,
+                               'savanna',
+                               '__init__.py')):
+    sys.path.insert(0, possible_topdir)
+
+from savanna.conductor import manager
+from savanna import config
+from savanna.db import api as db_api
+from savanna.openstack.common import log as logging
+from savanna.openstack.common.rpc import service as rpc_service
+from savanna.openstack.common import service
+
+
+LOG = logging.getLogger(__name__)
+
+CONF = cfg.CONF
+CONF.import_opt('topic', 'savanna.conductor.api', group='conductor')
+CONF.import_opt('workers', 'savanna.conductor.api', group='conductor')
+
+
+def main():
+    dev_conf = os.path.join(possible_topdir,
+                            'etc',
+                            'savanna',
+                            'savanna.conf')
+    config_files = None
+    if os.path.exists(dev_conf):
+        config_files = [dev_conf]
+
+    config.parse_configs(sys.argv[1:], config_files)
+    logging.setup("savanna")
+
+    if not db_api.setup_db():
+        raise RuntimeError('Failed to create database!')
+
+    server = rpc_service.Service(socket.gethostname(),
+                                 CONF.conductor.topic,
+                                 manager.ConductorManager())
+    workers = CONF.conductor.workers
+    launcher = service.launch(server, workers=workers if workers > 1 else None)
+    launcher.wait()
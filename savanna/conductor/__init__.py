@@ -19,7 +19,7 @@ from oslo.config import cfg
 from savanna.conductor import api as conductor_api
 
 
-def Api(use_local=True, **kwargs):
+def Api(use_local=False, **kwargs):
     """Creates local or remote conductor Api.
 
     Creation of local or remote conductor Api depends on passed arg 'use_local'
@@ -28,9 +28,24 @@ def Api(use_local=True, **kwargs):
     if cfg.CONF.conductor.use_local or use_local:
         api = conductor_api.LocalApi
     else:
-        raise NotImplementedError("Remote conductor isn't implemented yet.")
-        # api = conductor.RemoteApi
+        api = conductor_api.RemoteApi
 
     return api(**kwargs)
 
-API = Api()
+
+class _LazyApi(object):
+    """Conductor Api created on first use.
+
+    Services bind API at import time, before config files are parsed, so
+    the choice between local and remote Api is deferred.
+    """
+
+    def __init__(self):
+        self._api = None
+
+    def __getattr__(self, name):
+        if self._api is None:
+            self._api = Api()
+        return getattr(self._api, name)
+
+API = _LazyApi()
@@ -15,16 +15,34 @@
 
 """Handles all requests to the conductor service."""
 
+import contextlib
+
+from eventlet import corolocal
 from oslo.config import cfg
 
+from savanna.conductor import cache
 from savanna.conductor import manager
 from savanna.conductor import resource as r
+from savanna.conductor import rpcapi
+from savanna.openstack.common import excutils
 from savanna.openstack.common import log as logging
 
 conductor_opts = [
     cfg.BoolOpt('use_local',
                 default=True,
                 help='Perform savanna-conductor operations locally'),
+    cfg.IntOpt('cache_size',
+               default=0,
+               help='Maximum number of clusters and templates kept in the '
+                    'in-process cache of the local conductor, 0 disables '
+                    'caching. The cache is invalidated by writes made through '
+                    'the conductor of the same process only'),
+    cfg.StrOpt('topic',
+               default='savanna-conductor',
+               help='The topic savanna-conductor listens on'),
+    cfg.IntOpt('workers',
+               default=1,
+               help='Number of savanna-conductor worker processes'),
 ]
 
 conductor_group = cfg.OptGroup(name='conductor',
@@ -36,6 +54,8 @@ CONF.register_opts(conductor_opts, conductor_group)
 
 LOG = logging.getLogger(__name__)
 
+_CACHE = cache.ResourceCache()
+
 
 def _get_id(obj):
     """Return object id.
@@ -49,6 +69,23 @@ def _get_id(obj):
         return obj
 
 
+def _invalidates(kind=None):
+    """Drop cached resources once the decorated write is done.
+
+    If kind is given, only the entry of the object passed as the first
+    argument after context is dropped, otherwise the whole cache is cleared.
+    """
+    def decorator(func):
+        def handle(self, context, obj, *args, **kwargs):
+            try:
+                return func(self, context, obj, *args, **kwargs)
+            finally:
+                _CACHE.invalidate((kind, _get_id(obj)) if kind else None)
+
+        return handle
+    return decorator
+
+
 class LocalApi(object):
     """A local version of the conductor API that does database updates
     locally instead of via RPC.
@@ -57,18 +94,60 @@ class LocalApi(object):
     def __init__(self):
         self._manager = manager.ConductorManager()
 
+    @contextlib.contextmanager
+    def batch(self, context):
+        """Group conductor calls made within the block.
+
+        Local calls are cheap, so they are made immediately. See
+        RemoteApi.batch.
+        """
+        yield
+
+    def _cached_get(self, kind, get, context, obj_id):
+        key = (kind, obj_id)
+        tenant_id = getattr(context, 'tenant_id', None)
+
+        resource = _CACHE.get(key, tenant_id)
+        if resource is None:
+            version = _CACHE.version
+            resource = get(context, obj_id)
+            if resource is not None:
+                _CACHE.put(key, tenant_id, resource, version,
+                           CONF.conductor.cache_size)
+
+        return resource
+
     ## Cluster ops
 
-    @r.wrap(r.ClusterResource)
     def cluster_get(self, context, cluster):
         """Return the cluster or None if it does not exist."""
-        return self._manager.cluster_get(context, _get_id(cluster))
+        return self._cached_get('cluster', self._cluster_get,
+                                context, _get_id(cluster))
+
+    @r.wrap(r.ClusterResource)
+    def _cluster_get(self, context, cluster_id):
+        return self._manager.cluster_get(context, cluster_id)
 
     @r.wrap(r.ClusterResource)
     def cluster_get_all(self, context):
         """Get all clusters."""
         return self._manager.cluster_get_all(context)
 
+    @r.wrap(r.ClusterResource)
+    def cluster_get_status(self, context, cluster):
+        """Return the cluster with only id, status and status_description
+        fields or None if it does not exist.
+        """
+        return self._manager.cluster_get_status(context, _get_id(cluster))
+
+    @r.wrap(r.ClusterResource)
+    def cluster_get_summary(self, context, cluster):
+        """Return the cluster without private key, configs and instances
+        or None if it does not exist. Node groups contain only id, name,
+        count and min_count fields.
+        """
+        return self._manager.cluster_get_summary(context, _get_id(cluster))
+
     @r.wrap(r.ClusterResource)
     def cluster_create(self, context, values):
         """Create a cluster from the values dictionary.
@@ -77,6 +156,7 @@ class LocalApi(object):
         return self._manager.cluster_create(context, values)
 
     @r.wrap(r.ClusterResource)
+    @_invalidates('cluster')
     def cluster_update(self, context, cluster, values):
         """Update the cluster with the given values dictionary.
         Return the updated cluster.
@@ -84,6 +164,16 @@ class LocalApi(object):
         return self._manager.cluster_update(context, _get_id(cluster),
                                             values)
 
+    @_invalidates('cluster')
+    def cluster_update_status(self, context, cluster, status,
+                              status_description=None):
+        """Update status of the cluster without reading the cluster back.
+        Return None.
+        """
+        self._manager.cluster_update_status(context, _get_id(cluster),
+                                            status, status_description)
+
+    @_invalidates('cluster')
     def cluster_destroy(self, context, cluster):
         """Destroy the cluster or raise if it does not exist.
         Return None.
@@ -92,51 +182,131 @@ class LocalApi(object):
 
     ## Node Group ops
 
+    @_invalidates('cluster')
     def node_group_add(self, context, cluster, values):
         """Create a node group from the values dictionary.
         Return ID of the created node group.
         """
         return self._manager.node_group_add(context, _get_id(cluster), values)
 
+    @_invalidates('cluster')
+    def node_group_add_many(self, context, cluster, values_list):
+        """Create node groups from the list of values dictionaries in one
+        transaction.
+        Return list of IDs of the created node groups.
+        """
+        return self._manager.node_group_add_many(context, _get_id(cluster),
+                                                 values_list)
+
+    @_invalidates()
     def node_group_update(self, context, node_group, values):
         """Update the node group with the given values dictionary.
         Return None.
         """
         self._manager.node_group_update(context, _get_id(node_group), values)
 
+    @_invalidates()
+    def node_group_update_many(self, context, updates):
+        """Update node groups from the list of (node group, values
+        dictionary) pairs in one transaction.
+        Return None.
+        """
+        self._manager.node_group_update_many(
+            context, [(_get_id(ng), values) for ng, values in updates])
+
+    @_invalidates()
     def node_group_remove(self, context, node_group):
         """Destroy the node group or raise if it does not exist.
         Return None.
         """
         self._manager.node_group_remove(context, _get_id(node_group))
 
+    @_invalidates()
+    def node_group_remove_many(self, context, node_groups):
+        """Destroy the node groups in one transaction or raise if any of
+        them does not exist.
+        Return None.
+        """
+        self._manager.node_group_remove_many(
+            context, [_get_id(ng) for ng in node_groups])
+
     ## Instance ops
 
+    @r.wrap(r.InstanceResource)
+    def node_group_get_instances(self, context, node_group):
+        """Get all instances of the node group ordered by name.
+        Instances have no back reference to the node group.
+        """
+        return self._manager.node_group_get_instances(context,
+                                                      _get_id(node_group))
+
+    @r.wrap(r.InstanceResource)
+    def instance_get_by_ids(self, context, instance_ids):
+        """Get instances with the given IDs in the order of IDs, instances
+        which do not exist are skipped.
+        Instances have no back reference to the node group.
+        """
+        return self._manager.instance_get_by_ids(context, instance_ids)
+
+    @_invalidates()
     def instance_add(self, context, node_group, values):
         """Create an instance from the values dictionary.
         Return ID of the created instance.
         """
         return self._manager.instance_add(context, _get_id(node_group), values)
 
+    @_invalidates()
+    def instance_add_many(self, context, node_group, values_list):
+        """Create instances from the list of values dictionaries in one
+        transaction.
+        Return list of IDs of the created instances.
+        """
+        return self._manager.instance_add_many(context, _get_id(node_group),
+                                               values_list)
+
+    @_invalidates()
     def instance_update(self, context, instance, values):
         """Update the instance with the given values dictionary.
         Return None.
         """
         self._manager.instance_update(context, _get_id(instance), values)
 
+    @_invalidates()
+    def instance_update_many(self, context, updates):
+        """Update instances from the list of (instance, values dictionary)
+        pairs in one transaction.
+        Return None.
+        """
+        self._manager.instance_update_many(
+            context, [(_get_id(inst), values) for inst, values in updates])
+
+    @_invalidates()
     def instance_remove(self, context, instance):
         """Destroy the instance or raise if it does not exist.
         Return None.
         """
         self._manager.instance_remove(context, _get_id(instance))
 
+    @_invalidates()
+    def instance_remove_many(self, context, instances):
+        """Destroy the instances in one transaction or raise if any of them
+        does not exist.
+        Return None.
+        """
+        self._manager.instance_remove_many(
+            context, [_get_id(inst) for inst in instances])
+
     ## Cluster Template ops
 
-    @r.wrap(r.ClusterTemplateResource)
     def cluster_template_get(self, context, cluster_template):
         """Return the cluster template or None if it does not exist."""
+        return self._cached_get('cluster_template', self._cluster_template_get,
+                                context, _get_id(cluster_template))
+
+    @r.wrap(r.ClusterTemplateResource)
+    def _cluster_template_get(self, context, cluster_template_id):
         return self._manager.cluster_template_get(context,
-                                                  _get_id(cluster_template))
+                                                  cluster_template_id)
 
     @r.wrap(r.ClusterTemplateResource)
     def cluster_template_get_all(self, context):
@@ -150,6 +320,7 @@ class LocalApi(object):
         """
         return self._manager.cluster_template_create(context, values)
 
+    @_invalidates('cluster_template')
     def cluster_template_destroy(self, context, cluster_template):
         """Destroy the cluster template or raise if it does not exist.
         Return None
@@ -159,11 +330,16 @@ class LocalApi(object):
 
     ## Node Group Template ops
 
-    @r.wrap(r.NodeGroupTemplateResource)
     def node_group_template_get(self, context, node_group_template):
         """Return the node group template or None if it does not exist."""
-        return self._manager.node_group_template_get(
-            context, _get_id(node_group_template))
+        return self._cached_get('node_group_template',
+                                self._node_group_template_get,
+                                context, _get_id(node_group_template))
+
+    @r.wrap(r.NodeGroupTemplateResource)
+    def _node_group_template_get(self, context, node_group_template_id):
+        return self._manager.node_group_template_get(context,
+                                                     node_group_template_id)
 
     @r.wrap(r.NodeGroupTemplateResource)
     def node_group_template_get_all(self, context):
@@ -177,6 +353,7 @@ class LocalApi(object):
         """
         return self._manager.node_group_template_create(context, values)
 
+    @_invalidates()
     def node_group_template_destroy(self, context, node_group_template):
         """Destroy the node group template or raise if it does not exist.
         Return None
@@ -279,7 +456,100 @@ class LocalApi(object):
         self._manager.job_origin_destroy(context, _get_id(job_origin))
 
 
+# Calls which return nothing, so they could be sent later along with other
+# calls made within RemoteApi.batch.
+_DEFERRABLE_CALLS = frozenset([
+    'cluster_update_status',
+    'cluster_destroy',
+    'node_group_update',
+    'node_group_update_many',
+    'node_group_remove',
+    'node_group_remove_many',
+    'instance_update',
+    'instance_update_many',
+    'instance_remove',
+    'instance_remove_many',
+    'cluster_template_destroy',
+    'node_group_template_destroy',
+    'data_source_destroy',
+    'job_destroy',
+    'job_execution_destroy',
+    'job_origin_update',
+    'job_origin_destroy',
+])
+
+
+class _RemoteManager(object):
+    """Proxies ConductorManager calls to savanna-conductor over RPC."""
+
+    def __init__(self, topic):
+        self._rpcapi = rpcapi.ConductorAPI(topic)
+        self._batches = {}
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+
+        def call(context, *args):
+            return self._call(context, method, args)
+
+        return call
+
+    def _call(self, context, method, args):
+        calls = self._batches.get(corolocal.get_ident())
+        if calls is None:
+            return self._rpcapi.call_batch(context, [(method, args)])[-1]
+
+        calls.append((method, args))
+        if method in _DEFERRABLE_CALLS:
+            return None
+
+        return self._flush(context, calls)[-1]
+
+    def _flush(self, context, calls):
+        if not calls:
+            return []
+
+        pending = list(calls)
+        del calls[:]
+        return self._rpcapi.call_batch(context, pending)
+
+    @contextlib.contextmanager
+    def batch(self, context):
+        ident = corolocal.get_ident()
+        if ident in self._batches:
+            # nested batch is a part of the outer one
+            yield
+            return
+
+        calls = self._batches[ident] = []
+        try:
+            yield
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                del self._batches[ident]
+                self._flush(context, calls)
+        else:
+            del self._batches[ident]
+            self._flush(context, calls)
+
+
 class RemoteApi(LocalApi):
     """Conductor API that does updates via RPC to the ConductorManager."""
 
-    # TODO(slukjanov): it should override _manager and only necessary functions
+    def __init__(self):
+        self._manager = _RemoteManager(CONF.conductor.topic)
+
+    def batch(self, context):
+        """Send conductor calls made within the block in fewer round trips.
+
+        Calls which return nothing (updates of node groups and instances,
+        deletions) are deferred. They are sent together with the next call
+        which returns a result, or at the end of the block. Errors of
+        deferred calls are raised at that point too.
+        """
+        return self._manager.batch(context)
+
+    def _cached_get(self, kind, get, context, obj_id):
+        # objects could be changed by other processes, don't cache them
+        return get(context, obj_id)
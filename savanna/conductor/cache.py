@@ -0,0 +1,66 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process cache of resources read through the conductor.
+
+Resources are immutable, so a cached resource can be returned to any number
+of callers. Every write made through the conductor bumps the cache version
+and drops affected entries. A read which raced with a write (the version
+changed while the object was loaded) is returned but not stored.
+"""
+
+import collections
+
+
+class ResourceCache(object):
+    """Bounded LRU cache of resources keyed by kind and object ID."""
+
+    def __init__(self):
+        self._items = collections.OrderedDict()
+        self._version = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def get(self, key, tenant_id):
+        item = self._items.pop(key, None)
+        if item is None:
+            return None
+
+        self._items[key] = item
+        if item[0] != tenant_id:
+            return None
+        return item[1]
+
+    def put(self, key, tenant_id, resource, version, size):
+        if version != self._version or size <= 0:
+            return
+
+        self._items.pop(key, None)
+        self._items[key] = (tenant_id, resource)
+        while len(self._items) > size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop the given entry or all entries if key is None."""
+        self._version += 1
+        if key is None:
+            self._items.clear()
+        else:
+            self._items.pop(key, None)
+
+    def __len__(self):
+        return len(self._items)
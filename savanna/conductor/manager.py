@@ -19,37 +19,52 @@ import copy
 
 from savanna.db import base as db_base
 from savanna.utils import configs
+from savanna.utils import types
 # from savanna.openstack.common.rpc import common as rpc_common
 
 
-CLUSTER_DEFAULTS = {
+CLUSTER_DEFAULTS = types.FrozenDict({
     "cluster_configs": {},
     "anti_affinity": [],
     "status": "undefined",
     "status_description": "",
     "info": {},
-}
+    "drift": {},
+})
 
-NODE_GROUP_DEFAULTS = {
+# cluster templates have no drift
+CLUSTER_TEMPLATE_DEFAULTS = types.FrozenDict(
+    (key, value) for key, value in CLUSTER_DEFAULTS.iteritems()
+    if key != 'drift')
+
+NODE_GROUP_DEFAULTS = types.FrozenDict({
     "node_processes": [],
     "node_configs": {},
     "volumes_per_node": 0,
     "volumes_size": 0,
     "volume_mount_prefix": "",
-}
+})
 
-INSTANCE_DEFAULTS = {
+INSTANCE_DEFAULTS = types.FrozenDict({
     "volumes": []
-}
+})
 
-DATA_SOURCE_DEFAULTS = {
+DATA_SOURCE_DEFAULTS = types.FrozenDict({
     "credentials": {}
-}
+})
 
 
 def _apply_defaults(values, defaults):
-    new_values = copy.deepcopy(defaults)
-    new_values.update(values)
+    """Return a shallow copy of values with missing defaults filled in.
+
+    Defaults are shared between calls, so only the defaults that are actually
+    used are copied. They are flat (empty containers or scalars), so a
+    shallow copy is enough to keep them independent.
+    """
+    new_values = dict(values)
+    for key, value in defaults.iteritems():
+        if key not in new_values:
+            new_values[key] = copy.copy(value)
     return new_values
 
 
@@ -63,9 +78,30 @@ class ConductorManager(db_base.Base):
     Additionally it performs some template-to-object copying magic.
     """
 
+    RPC_API_VERSION = '1.0'
+
     def __init__(self):
         super(ConductorManager, self).__init__()
 
+    ## RPC ops
+
+    def call_batch(self, context, calls):
+        """Run the given (method, args) calls in order.
+
+        Return the list of results. Used by the remote conductor API to make
+        several calls in a single round trip. Calls aren't run in a single
+        transaction, the first failed call stops processing of the rest.
+        """
+        results = []
+        for method, args in calls:
+            func = getattr(self, method, None)
+            if (method.startswith('_') or method == 'call_batch' or
+                    not callable(func)):
+                raise AttributeError("No such conductor method '%s'" % method)
+            results.append(func(context, *args))
+
+        return results
+
     ## Common helpers
 
     def _populate_node_groups(self, context, cluster):
@@ -73,8 +109,8 @@ class ConductorManager(db_base.Base):
         if not node_groups:
             return
 
-        for node_group in node_groups:
-            self._populate_node_group(context, node_group)
+        cluster['node_groups'] = [self._populate_node_group(context, ng)
+                                  for ng in node_groups]
 
     def _cleanup_node_group(self, node_group):
         node_group.pop('id', None)
@@ -82,28 +118,23 @@ class ConductorManager(db_base.Base):
         node_group.pop('updated_at', None)
 
     def _populate_node_group(self, context, node_group):
+        """Return a new node group dict, the given one is left untouched."""
         ng_tmpl_id = node_group.get('node_group_template_id')
-        if not ng_tmpl_id:
-            node_group.update(_apply_defaults(node_group, NODE_GROUP_DEFAULTS))
-            self._cleanup_node_group(node_group)
-            return
-
-        ng_tmpl = self.node_group_template_get(context, ng_tmpl_id)
-        if not ng_tmpl:
-            node_group.update(_apply_defaults(node_group, NODE_GROUP_DEFAULTS))
-            self._cleanup_node_group(node_group)
-            return
-
-        new_values = _apply_defaults(ng_tmpl, NODE_GROUP_DEFAULTS)
-        new_values.update(node_group)
-        new_values['node_configs'] = configs.merge_configs(
-            ng_tmpl.get('node_configs'),
-            node_group.get('node_configs'))
-
-        node_group.clear()
-        node_group.update(new_values)
-
-        self._cleanup_node_group(node_group)
+        ng_tmpl = None
+        if ng_tmpl_id:
+            ng_tmpl = self.node_group_template_get(context, ng_tmpl_id)
+
+        if ng_tmpl:
+            new_values = _apply_defaults(ng_tmpl, NODE_GROUP_DEFAULTS)
+            new_values.update(node_group)
+            new_values['node_configs'] = configs.merge_configs(
+                ng_tmpl.get('node_configs'),
+                node_group.get('node_configs'))
+        else:
+            new_values = _apply_defaults(node_group, NODE_GROUP_DEFAULTS)
+
+        self._cleanup_node_group(new_values)
+        return new_values
 
     ## Cluster ops
 
@@ -115,9 +146,16 @@ class ConductorManager(db_base.Base):
         """Get all clusters."""
         return self.db.cluster_get_all(context)
 
+    def cluster_get_status(self, context, cluster):
+        """Return id, status and status_description of the cluster."""
+        return self.db.cluster_get_status(context, cluster)
+
+    def cluster_get_summary(self, context, cluster):
+        """Return the cluster without private key, configs and instances."""
+        return self.db.cluster_get_summary(context, cluster)
+
     def cluster_create(self, context, values):
         """Create a cluster from the values dictionary."""
-        values = copy.deepcopy(values)
         values = _apply_defaults(values, CLUSTER_DEFAULTS)
         values['tenant_id'] = context.tenant_id
 
@@ -141,8 +179,13 @@ class ConductorManager(db_base.Base):
 
     def cluster_update(self, context, cluster, values):
         """Set the given properties on cluster and update it."""
-        values = copy.deepcopy(values)
-        return self.db.cluster_update(context, cluster, values)
+        return self.db.cluster_update(context, cluster, dict(values))
+
+    def cluster_update_status(self, context, cluster, status,
+                              status_description=None):
+        """Set status of the cluster without reading it."""
+        self.db.cluster_update_status(context, cluster, status,
+                                      status_description)
 
     def cluster_destroy(self, context, cluster):
         """Destroy the cluster or raise if it does not exist."""
@@ -152,36 +195,68 @@ class ConductorManager(db_base.Base):
 
     def node_group_add(self, context, cluster, values):
         """Create a Node Group from the values dictionary."""
-        values = copy.deepcopy(values)
-        self._populate_node_group(context, values)
+        values = self._populate_node_group(context, values)
         return self.db.node_group_add(context, cluster, values)
 
+    def node_group_add_many(self, context, cluster, values_list):
+        """Create Node Groups from the list of values dictionaries."""
+        values_list = [self._populate_node_group(context, values)
+                       for values in values_list]
+        return self.db.node_group_add_many(context, cluster, values_list)
+
     def node_group_update(self, context, node_group, values):
         """Set the given properties on node_group and update it."""
-        values = copy.deepcopy(values)
-        self.db.node_group_update(context, node_group, values)
+        self.db.node_group_update(context, node_group, dict(values))
+
+    def node_group_update_many(self, context, updates):
+        """Update Node Groups from the list of (node_group, values) pairs."""
+        self.db.node_group_update_many(context, updates)
 
     def node_group_remove(self, context, node_group):
         """Destroy the node_group or raise if it does not exist."""
         self.db.node_group_remove(context, node_group)
 
+    def node_group_remove_many(self, context, node_groups):
+        """Destroy the Node Groups or raise if any of them does not exist."""
+        self.db.node_group_remove_many(context, node_groups)
+
     ## Instance ops
 
+    def node_group_get_instances(self, context, node_group):
+        """Get all Instances of the Node Group."""
+        return self.db.node_group_get_instances(context, node_group)
+
+    def instance_get_by_ids(self, context, instance_ids):
+        """Get Instances with the given IDs."""
+        return self.db.instance_get_by_ids(context, instance_ids)
+
     def instance_add(self, context, node_group, values):
         """Create an Instance from the values dictionary."""
-        values = copy.deepcopy(values)
         values = _apply_defaults(values, INSTANCE_DEFAULTS)
         return self.db.instance_add(context, node_group, values)
 
+    def instance_add_many(self, context, node_group, values_list):
+        """Create Instances from the list of values dictionaries."""
+        values_list = [_apply_defaults(values, INSTANCE_DEFAULTS)
+                       for values in values_list]
+        return self.db.instance_add_many(context, node_group, values_list)
+
     def instance_update(self, context, instance, values):
         """Set the given properties on Instance and update it."""
-        values = copy.deepcopy(values)
-        self.db.instance_update(context, instance, values)
+        self.db.instance_update(context, instance, dict(values))
+
+    def instance_update_many(self, context, updates):
+        """Update Instances from the list of (instance, values) pairs."""
+        self.db.instance_update_many(context, updates)
 
     def instance_remove(self, context, instance):
         """Destroy the Instance or raise if it does not exist."""
         self.db.instance_remove(context, instance)
 
+    def instance_remove_many(self, context, instances):
+        """Destroy the Instances or raise if any of them does not exist."""
+        self.db.instance_remove_many(context, instances)
+
     ## Cluster Template ops
 
     def cluster_template_get(self, context, cluster_template):
@@ -194,8 +269,7 @@ class ConductorManager(db_base.Base):
 
     def cluster_template_create(self, context, values):
         """Create a cluster_template from the values dictionary."""
-        values = copy.deepcopy(values)
-        values = _apply_defaults(values, CLUSTER_DEFAULTS)
+        values = _apply_defaults(values, CLUSTER_TEMPLATE_DEFAULTS)
         values['tenant_id'] = context.tenant_id
 
         self._populate_node_groups(context, values)
@@ -218,7 +292,6 @@ class ConductorManager(db_base.Base):
 
     def node_group_template_create(self, context, values):
         """Create a Node Group Template from the values dictionary."""
-        values = copy.deepcopy(values)
         values = _apply_defaults(values, NODE_GROUP_DEFAULTS)
         values['tenant_id'] = context.tenant_id
 
@@ -240,7 +313,6 @@ class ConductorManager(db_base.Base):
 
     def data_source_create(self, context, values):
         """Create a Data Source from the values dictionary."""
-        values = copy.deepcopy(values)
         values = _apply_defaults(values, DATA_SOURCE_DEFAULTS)
         values['tenant_id'] = context.tenant_id
 
@@ -262,7 +334,7 @@ class ConductorManager(db_base.Base):
 
     def job_create(self, context, values):
         """Create a Job from the values dictionary."""
-        values = copy.deepcopy(values)
+        values = dict(values)
         values['tenant_id'] = context.tenant_id
         return self.db.job_create(context, values)
 
@@ -19,18 +19,37 @@ conductor.
 The actual objects returned are located in resource.py, which aim
 is to hide some necessary magic. Current module describes objects
 fields via docstrings and contains implementation of helper methods.
+Classes declare empty __slots__ to keep resources free of per-instance
+__dict__.
 """
 
+import functools
+
 from oslo.config import cfg
 
 from savanna.utils import configs
 from savanna.utils import remote
+from savanna.utils import types
 
 
 CONF = cfg.CONF
 CONF.import_opt('node_domain', 'savanna.config')
 
 
+def memoized(func):
+    """A property computed once per object.
+
+    Objects are immutable, so values derived from their fields could be
+    reused. Values are stored by the Resource, they are expected to be
+    immutable as well.
+    """
+    @functools.wraps(func)
+    def getter(self):
+        return self._get_memoized(func.__name__, func)
+
+    return property(getter)
+
+
 class Cluster(object):
     """An object representing Cluster.
 
@@ -49,11 +68,32 @@ class Cluster(object):
     status
     status_description
     info
+    drift - instances missing in Nova or being in error state, updated
+            by periodic reconciliation
+    gateway_id - ID of the Instance used as the cluster gateway
     node_groups - list of NodeGroup objects
     cluster_template_id
     cluster_template - ClusterTemplate object
     """
 
+    __slots__ = ()
+
+    @memoized
+    def gateway(self):
+        """Instance used to access other cluster nodes if use_gateway
+        is set, None if the gateway isn't chosen yet.
+        """
+        gateway_id = self.get('gateway_id')
+        if not gateway_id:
+            return None
+
+        for node_group in self.node_groups:
+            for instance in node_group.instances:
+                if instance.id == gateway_id:
+                    return instance
+
+        return None
+
 
 class NodeGroup(object):
     """An object representing Node Group.
@@ -69,6 +109,8 @@ class NodeGroup(object):
     volumes_size
     volume_mount_prefix
     count
+    min_count - minimal number of instances the node group could be started
+                with if some of them fail to boot, count if not set
     instances - list of Instance objects
     node_group_template_id
     node_group_template - NodeGroupTemplate object
@@ -82,12 +124,16 @@ class NodeGroup(object):
     cluster_template - parent ClusterTemplate object
     """
 
-    @property
+    __slots__ = ()
+
+    @memoized
     def configuration(self):
-        return configs.merge_configs(self.cluster.cluster_configs,
-                                     self.node_configs)
+        merged = configs.merge_configs(self.cluster.cluster_configs,
+                                       self.node_configs)
+        return types.FrozenDict((a_target, types.FrozenDict(a_configs))
+                                for a_target, a_configs in merged.items())
 
-    @property
+    @memoized
     def storage_paths(self):
         mp = []
         for idx in range(1, self.volumes_per_node + 1):
@@ -98,7 +144,7 @@ class NodeGroup(object):
         if not mp:
             mp = ['/mnt']
 
-        return mp
+        return types.FrozenList(mp)
 
     def get_image_id(self):
         return self.image_id or self.cluster.default_image_id
@@ -117,11 +163,13 @@ class Instance(object):
     volumes
     """
 
+    __slots__ = ()
+
     @property
     def hostname(self):
         return self.instance_name
 
-    @property
+    @memoized
     def fqdn(self):
         return self.instance_name + '.' + CONF.node_domain
 
@@ -146,6 +194,8 @@ class ClusterTemplate(object):
     node_groups - list of NodeGroup objects
     """
 
+    __slots__ = ()
+
 
 class NodeGroupTemplate(object):
     """An object representing Node Group Template.
@@ -166,6 +216,8 @@ class NodeGroupTemplate(object):
     volume_mount_prefix
     """
 
+    __slots__ = ()
+
 
 ##EDP Objects
 
@@ -181,6 +233,8 @@ class DataSource(object):
     credentials
     """
 
+    __slots__ = ()
+
 
 class Job(object):
     """An object representing Job
@@ -195,6 +249,8 @@ class Job(object):
     output_type
     """
 
+    __slots__ = ()
+
 
 class JobExecution(object):
     """An object representing JobExecution
@@ -212,6 +268,8 @@ class JobExecution(object):
     reduce_tasks - list of reduce_tasks
     """
 
+    __slots__ = ()
+
 
 class JobOrigin(object):
     """An object representing JobOrigin
@@ -224,3 +282,5 @@ class JobOrigin(object):
     url
     credentials
     """
+
+    __slots__ = ()
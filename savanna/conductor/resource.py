@@ -72,19 +72,30 @@ class Resource(types.FrozenDict):
     in the following format: {refname: (child_class, backref_name)}
     Back reference is a reference to parent object which is
     injected into a Resource during wrapping.
+
+    Nested dicts and lists are wrapped on first access and then
+    memoized, so fetching a large cluster doesn't wrap all its node
+    groups and instances until they are really used. Values of derived
+    properties are memoized in the same way, see objects.memoized.
     """
 
+    # resources don't need per-instance __dict__, all data is
+    # stored in the dict itself, '_memo' keeps derived values
+    __slots__ = ('_memo',)
+
     _resource_name = 'resource'
     _children = {}
     _filter_fields = []
 
     def __init__(self, dct):
-        super(Resource, self).__setattr__('_initial_dict', dct)
-        newdct = dict()
+        object.__setattr__(self, '_memo', None)
+
         for refname, entity in dct.iteritems():
-            newdct[refname] = self._wrap_entity(refname, entity)
+            if not self._is_lazy(entity):
+                self._wrap_entity(refname, entity)
 
-        super(Resource, self).__init__(newdct)
+        # dicts and lists are wrapped on first access, see __getitem__
+        super(Resource, self).__init__(dct)
 
     def to_dict(self):
         """Return dictionary representing the Resource for REST API.
@@ -127,34 +138,88 @@ class Resource(types.FrozenDict):
         else:
             return Resource(dct)
 
+    @staticmethod
+    def _is_lazy(entity):
+        # only plain dicts and lists are not wrapped yet
+        return type(entity) in (dict, list)
+
     def _is_passthrough_type(self, entity):
         return (entity is None or
                 isinstance(entity,
                            (six.integer_types, float, six.string_types)))
 
     # Conversion to dict
+    #
+    # Children which weren't accessed yet are still plain dicts and lists,
+    # they are converted directly using the filters of the classes they
+    # would be wrapped into, without wrapping them first.
 
     def _to_dict(self, backref):
+        return self._items_to_dict(dict.iteritems(self), backref)
+
+    @classmethod
+    def _items_to_dict(cls, items, backref):
         dct = dict()
-        for refname, entity in self.iteritems():
-            if refname != backref and refname not in self._filter_fields:
-                childs_backref = None
-                if refname in self._children:
-                    childs_backref = self._children[refname][1]
-                dct[refname] = self._entity_to_dict(entity, childs_backref)
+        for refname, entity in items:
+            if refname != backref and refname not in cls._filter_fields:
+                child_class, childs_backref = cls._children.get(
+                    refname, (Resource, None))
+                dct[refname] = child_class._entity_to_dict(entity,
+                                                           childs_backref)
 
         return dct
 
-    def _entity_to_dict(self, entity, childs_backref):
+    @classmethod
+    def _entity_to_dict(cls, entity, childs_backref):
         if isinstance(entity, Resource):
             return entity._to_dict(childs_backref)
+        elif isinstance(entity, dict):
+            return cls._items_to_dict(entity.iteritems(), childs_backref)
         elif isinstance(entity, list):
-            return self._list_to_dict(entity, childs_backref)
+            return [cls._entity_to_dict(el, childs_backref) for el in entity]
         elif entity is not None:
             return entity
 
-    def _list_to_dict(self, lst, childs_backref):
-        return [self._entity_to_dict(entity, childs_backref) for entity in lst]
+    # Access to the wrapped values
+
+    def _get_memoized(self, name, func):
+        memo = self._memo
+        if memo is None:
+            memo = {}
+            object.__setattr__(self, '_memo', memo)
+
+        if name not in memo:
+            memo[name] = func(self)
+
+        return memo[name]
+
+    def __getitem__(self, key):
+        entity = super(Resource, self).__getitem__(key)
+        if self._is_lazy(entity):
+            entity = self._wrap_entity(key, entity)
+            dict.__setitem__(self, key, entity)
+
+        return entity
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def itervalues(self):
+        for key in self:
+            yield self[key]
+
+    def iteritems(self):
+        for key in self:
+            yield key, self[key]
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+    def copy(self):
+        return dict(self.iteritems())
 
     def __getattr__(self, item):
         return self[item]
@@ -164,14 +229,20 @@ class Resource(types.FrozenDict):
 
 
 class NodeGroupTemplateResource(Resource, objects.NodeGroupTemplate):
+    __slots__ = ()
+
     _resource_name = 'node_group_template'
 
 
 class InstanceResource(Resource, objects.Instance):
+    __slots__ = ()
+
     _filter_fields = ['node_group_id']
 
 
 class NodeGroupResource(Resource, objects.NodeGroup):
+    __slots__ = ()
+
     _children = {
         'instances': (InstanceResource, 'node_group'),
         'node_group_template': (NodeGroupTemplateResource, None)
@@ -181,6 +252,8 @@ class NodeGroupResource(Resource, objects.NodeGroup):
 
 
 class ClusterTemplateResource(Resource, objects.ClusterTemplate):
+    __slots__ = ()
+
     _resource_name = 'cluster_template'
 
     _children = {
@@ -189,6 +262,8 @@ class ClusterTemplateResource(Resource, objects.ClusterTemplate):
 
 
 class ClusterResource(Resource, objects.Cluster):
+    __slots__ = ()
+
     _resource_name = 'cluster'
 
     _children = {
@@ -202,16 +277,16 @@ class ClusterResource(Resource, objects.Cluster):
 ##EDP Resources
 
 class DataSource(Resource, objects.DataSource):
-    pass
+    __slots__ = ()
 
 
 class Job(Resource, objects.Job):
-    pass
+    __slots__ = ()
 
 
 class JobExecution(Resource, objects.JobExecution):
-    pass
+    __slots__ = ()
 
 
 class JobOrigin(Resource, objects.JobOrigin):
-    pass
+    __slots__ = ()
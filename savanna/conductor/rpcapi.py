@@ -0,0 +1,42 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Client side of the conductor RPC API."""
+
+from savanna.openstack.common import rpc
+from savanna.openstack.common.rpc import proxy
+
+
+rpc.set_defaults(control_exchange='savanna')
+
+
+class ConductorAPI(proxy.RpcProxy):
+    """Sends calls to ConductorManager running in savanna-conductor.
+
+    API version history:
+
+        1.0 - Initial version, all calls are sent through call_batch.
+    """
+
+    BASE_RPC_API_VERSION = '1.0'
+
+    def __init__(self, topic):
+        super(ConductorAPI, self).__init__(
+            topic=topic, default_version=self.BASE_RPC_API_VERSION)
+
+    def call_batch(self, context, calls):
+        """Run (method, args) calls in one round trip, return their results.
+        """
+        return self.call(context, self.make_msg('call_batch', calls=calls))
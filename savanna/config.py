@@ -37,7 +37,14 @@ cluster_node_opts = [
     cfg.StrOpt('node_domain',
                default='novalocal',
                help="The suffix of the node's FQDN. In nova-network that is "
-                    "dhcp_domain config parameter")
+                    "dhcp_domain config parameter"),
+    cfg.BoolOpt('use_gateway',
+                default=False,
+                help='Used together with use_floating_ips. When set to true, '
+                     'Savanna connects to cluster nodes through a single '
+                     'gateway node of the cluster using internal IPs, so '
+                     'only the gateway node and nodes running processes '
+                     'accessed directly, like web UIs, need floating IPs.')
 ]
 
 
@@ -35,12 +35,27 @@ class Context(object):
         self.auth_token = auth_token
         self.headers = headers
         self._db_session = None
+        # (X-Service-Catalog header value, parsed catalog)
+        self.service_catalog_cache = None
 
     def clone(self):
-        return Context(self.user_id,
-                       self.tenant_id,
-                       self.auth_token,
-                       self.headers)
+        ctx = Context(self.user_id,
+                      self.tenant_id,
+                      self.auth_token,
+                      self.headers)
+        ctx.service_catalog_cache = self.service_catalog_cache
+        return ctx
+
+    def to_dict(self):
+        """Return values required to recreate the context on RPC server.
+
+        Conductor doesn't call other services, so the token and headers
+        aren't sent, they would be logged along with the message.
+        """
+        return {
+            'user_id': self.user_id,
+            'tenant_id': self.tenant_id,
+        }
 
 
 _CTXS = threading.local()
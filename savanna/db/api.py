@@ -118,6 +118,23 @@ def cluster_get_all(context):
     return IMPL.cluster_get_all(context)
 
 
+def cluster_get_status(context, cluster):
+    """Return dict with id, status and status_description of the cluster.
+
+    Return None if the cluster does not exist.
+    """
+    return IMPL.cluster_get_status(context, cluster)
+
+
+def cluster_get_summary(context, cluster):
+    """Return the cluster without private key, configs and instances.
+
+    Node groups contain only id, name, count and min_count. Return None if
+    the cluster does not exist.
+    """
+    return IMPL.cluster_get_summary(context, cluster)
+
+
 @to_dict
 def cluster_create(context, values):
     """Create a cluster from the values dictionary."""
@@ -130,6 +147,11 @@ def cluster_update(context, cluster, values):
     return IMPL.cluster_update(context, cluster, values)
 
 
+def cluster_update_status(context, cluster, status, status_description=None):
+    """Set status of the cluster using a single UPDATE statement."""
+    IMPL.cluster_update_status(context, cluster, status, status_description)
+
+
 def cluster_destroy(context, cluster):
     """Destroy the cluster or raise if it does not exist."""
     IMPL.cluster_destroy(context, cluster)
@@ -142,33 +164,84 @@ def node_group_add(context, cluster, values):
     return IMPL.node_group_add(context, cluster, values)
 
 
+def node_group_add_many(context, cluster, values_list):
+    """Create Node Groups from the list of values dictionaries.
+
+    Return list of IDs of the created Node Groups.
+    """
+    return IMPL.node_group_add_many(context, cluster, values_list)
+
+
 def node_group_update(context, node_group, values):
     """Set the given properties on node_group and update it."""
     IMPL.node_group_update(context, node_group, values)
 
 
+def node_group_update_many(context, updates):
+    """Update Node Groups from the list of (node_group, values) pairs."""
+    IMPL.node_group_update_many(context, updates)
+
+
 def node_group_remove(context, node_group):
     """Destroy the node_group or raise if it does not exist."""
     IMPL.node_group_remove(context, node_group)
 
 
+def node_group_remove_many(context, node_groups):
+    """Destroy the Node Groups or raise if any of them does not exist."""
+    IMPL.node_group_remove_many(context, node_groups)
+
+
 ## Instance ops
 
+@to_dict
+def node_group_get_instances(context, node_group):
+    """Get all Instances of the Node Group ordered by name."""
+    return IMPL.node_group_get_instances(context, node_group)
+
+
+@to_dict
+def instance_get_by_ids(context, instance_ids):
+    """Get Instances with the given IDs in the order of IDs.
+
+    Instances which do not exist are skipped.
+    """
+    return IMPL.instance_get_by_ids(context, instance_ids)
+
+
 def instance_add(context, node_group, values):
     """Create an Instance from the values dictionary."""
     return IMPL.instance_add(context, node_group, values)
 
 
+def instance_add_many(context, node_group, values_list):
+    """Create Instances from the list of values dictionaries.
+
+    Return list of IDs of the created Instances.
+    """
+    return IMPL.instance_add_many(context, node_group, values_list)
+
+
 def instance_update(context, instance, values):
     """Set the given properties on Instance and update it."""
     IMPL.instance_update(context, instance, values)
 
 
+def instance_update_many(context, updates):
+    """Update Instances from the list of (instance, values) pairs."""
+    IMPL.instance_update_many(context, updates)
+
+
 def instance_remove(context, instance):
     """Destroy the Instance or raise if it does not exist."""
     IMPL.instance_remove(context, instance)
 
 
+def instance_remove_many(context, instances):
+    """Destroy the Instances or raise if any of them does not exist."""
+    IMPL.instance_remove_many(context, instances)
+
+
 ## Cluster Template ops
 
 @to_dict
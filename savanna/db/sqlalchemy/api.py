@@ -23,6 +23,7 @@ from savanna.db.sqlalchemy import models as m
 from savanna.openstack.common.db import exception as db_exc
 from savanna.openstack.common.db.sqlalchemy import session as db_session
 from savanna.openstack.common import log as logging
+from savanna.openstack.common import uuidutils
 
 
 LOG = logging.getLogger(__name__)
@@ -116,8 +117,80 @@ class InequalityCondition(object):
         return [field != value for value in self.values]
 
 
+## Bulk helpers
+
+def _bulk_rows(model, rows):
+    """Group rows by the set of their columns.
+
+    Statements executed for many rows at once expect the same parameters in
+    every row, so rows with different keys are executed separately.
+    """
+    columns = model.__table__.c
+    groups = {}
+    for row in rows:
+        row = dict((key, value) for key, value in row.iteritems()
+                   if key in columns or key == '_id')
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    return groups.values()
+
+
+def _bulk_insert(session, model, rows):
+    """Insert rows with one INSERT per set of columns, return their IDs."""
+    ids = []
+    for row in rows:
+        row.setdefault('id', unicode(uuidutils.generate_uuid()))
+        ids.append(row['id'])
+
+    for group in _bulk_rows(model, rows):
+        session.execute(model.__table__.insert(), group)
+
+    return ids
+
+
+def _bulk_update(session, model, updates):
+    """Update rows with one UPDATE per set of columns.
+
+    :param updates: list of (object id, values dictionary) pairs
+    :returns: number of matched rows
+    """
+    table = model.__table__
+    statement = table.update().where(table.c.id == sa.bindparam('_id'))
+    rows = [dict(values, _id=obj_id) for obj_id, values in updates]
+    matched = 0
+    for group in _bulk_rows(model, rows):
+        matched += session.execute(statement, group).rowcount
+
+    return matched
+
+
+## Projection helpers
+
+def _columns(model, exclude=()):
+    return [column for column in model.__table__.columns
+            if column.name not in exclude]
+
+
+def _row_to_dict(row):
+    """Convert the row of a column-only query to a dict.
+
+    Datetimes are converted the same way as SavannaBase.to_dict does.
+    """
+    d = dict(zip(row.keys(), row))
+    for key in ('created_at', 'updated_at'):
+        if d.get(key) is not None:
+            d[key] = d[key].isoformat(' ')
+
+    return d
+
+
 ## Cluster ops
 
+# heavy columns which aren't needed to check the state of the cluster
+_CLUSTER_SUMMARY_EXCLUDED = ('private_key', 'cluster_configs', 'info',
+                             'drift')
+
+
 def _cluster_get(context, session, cluster_id):
     query = model_query(m.Cluster, context, session)
     return query.filter_by(id=cluster_id).first()
@@ -132,27 +205,57 @@ def cluster_get_all(context):
     return query.all()
 
 
+def cluster_get_status(context, cluster_id):
+    query = model_query(m.Cluster, context).with_entities(
+        m.Cluster.id, m.Cluster.status, m.Cluster.status_description)
+    row = query.filter(m.Cluster.id == cluster_id).first()
+    return _row_to_dict(row) if row else None
+
+
+def cluster_get_summary(context, cluster_id):
+    session = get_session()
+    query = model_query(m.Cluster, context, session).with_entities(
+        *_columns(m.Cluster, _CLUSTER_SUMMARY_EXCLUDED))
+    row = query.filter(m.Cluster.id == cluster_id).first()
+    if not row:
+        return None
+
+    cluster = _row_to_dict(row)
+    query = model_query(m.NodeGroup, context, session).with_entities(
+        m.NodeGroup.id, m.NodeGroup.name, m.NodeGroup.count,
+        m.NodeGroup.min_count)
+    cluster['node_groups'] = [_row_to_dict(ng) for ng in
+                              query.filter(
+                                  m.NodeGroup.cluster_id == cluster_id)]
+
+    return cluster
+
+
 def cluster_create(context, values):
     values = values.copy()
     cluster = m.Cluster()
     node_groups = values.pop("node_groups", [])
     cluster.update(values)
 
+    for ng in node_groups:
+        node_group = m.NodeGroup()
+        node_group.update(ng)
+        # new node group has no instances, initialize the collection
+        # to avoid loading it from DB
+        node_group.instances = []
+        cluster.node_groups.append(node_group)
+
     session = get_session()
     with session.begin():
         try:
             cluster.save(session=session)
-            for ng in node_groups:
-                node_group = m.NodeGroup()
-                node_group.update({"cluster_id": cluster.id})
-                node_group.update(ng)
-                node_group.save(session=session)
-
         except db_exc.DBDuplicateEntry as e:
             # raise exception about duplicated columns (e.columns)
             raise RuntimeError("DBDuplicateEntry: %s" % e.columns)
 
-    return cluster_get(context, cluster.id)
+    # cluster object is up to date after flush, there is no need
+    # to read it again
+    return cluster
 
 
 def cluster_update(context, cluster_id, values):
@@ -163,7 +266,21 @@ def cluster_update(context, cluster_id, values):
         cluster.update(values)
         cluster.save(session=session)
 
-    return cluster_get(context, cluster_id)
+    # cluster has been loaded and updated in the same transaction
+    return cluster
+
+
+def cluster_update_status(context, cluster_id, status,
+                          status_description=None):
+    values = {'status': status}
+    if status_description is not None:
+        values['status_description'] = status_description
+
+    session = get_session()
+    with session.begin():
+        query = model_query(m.Cluster, context, session)
+        query.filter_by(id=cluster_id).update(values,
+                                              synchronize_session=False)
 
 
 def cluster_destroy(context, cluster_id):
@@ -197,6 +314,14 @@ def node_group_add(context, cluster_id, values):
     return node_group.id
 
 
+def node_group_add_many(context, cluster_id, values_list):
+    rows = [dict(values, cluster_id=cluster_id) for values in values_list]
+
+    session = get_session()
+    with session.begin():
+        return _bulk_insert(session, m.NodeGroup, rows)
+
+
 def node_group_update(context, node_group_id, values):
     session = get_session()
     with session.begin():
@@ -217,6 +342,34 @@ def node_group_remove(context, node_group_id):
         session.delete(node_group)
 
 
+def node_group_update_many(context, updates):
+    session = get_session()
+    with session.begin():
+        if _bulk_update(session, m.NodeGroup, updates) != len(updates):
+            # raise not found error
+            raise RuntimeError("Node Group not found!")
+
+
+def node_group_remove_many(context, node_group_ids):
+    node_group_ids = set(node_group_ids)
+    if not node_group_ids:
+        return
+
+    session = get_session()
+    with session.begin():
+        query = model_query(m.NodeGroup, context, session).filter(
+            m.NodeGroup.id.in_(node_group_ids))
+
+        if query.count() != len(node_group_ids):
+            # raise not found error
+            raise RuntimeError("Node Group not found!")
+
+        model_query(m.Instance, context, session).filter(
+            m.Instance.node_group_id.in_(node_group_ids)).delete(
+                synchronize_session=False)
+        query.delete(synchronize_session=False)
+
+
 ## Instance ops
 
 def _instance_get(context, session, instance_id):
@@ -240,6 +393,46 @@ def instance_add(context, node_group_id, values):
     return instance.id
 
 
+def instance_add_many(context, node_group_id, values_list):
+    if not values_list:
+        return []
+
+    rows = [dict(values, node_group_id=node_group_id)
+            for values in values_list]
+
+    session = get_session()
+    with session.begin():
+        updated = model_query(m.NodeGroup, context, session).filter_by(
+            id=node_group_id).update(
+                {'count': m.NodeGroup.count + len(rows)},
+                synchronize_session=False)
+
+        if not updated:
+            # raise not found error
+            raise RuntimeError("Node Group not found!")
+
+        ids = _bulk_insert(session, m.Instance, rows)
+
+    return ids
+
+
+def node_group_get_instances(context, node_group_id):
+    query = model_query(m.Instance, context).filter_by(
+        node_group_id=node_group_id)
+    return query.order_by(m.Instance.instance_name).all()
+
+
+def instance_get_by_ids(context, instance_ids):
+    if not instance_ids:
+        return []
+
+    query = model_query(m.Instance, context).filter(
+        m.Instance.id.in_(set(instance_ids)))
+    instances = dict((instance.id, instance) for instance in query.all())
+    return [instances[instance_id] for instance_id in instance_ids
+            if instance_id in instances]
+
+
 def instance_update(context, instance_id, values):
     session = get_session()
     with session.begin():
@@ -265,6 +458,41 @@ def instance_remove(context, instance_id):
         node_group.save(session=session)
 
 
+def instance_update_many(context, updates):
+    session = get_session()
+    with session.begin():
+        if _bulk_update(session, m.Instance, updates) != len(updates):
+            # raise not found error
+            raise RuntimeError("Instance not found!")
+
+
+def instance_remove_many(context, instance_ids):
+    instance_ids = set(instance_ids)
+    if not instance_ids:
+        return
+
+    session = get_session()
+    with session.begin():
+        query = model_query(m.Instance, context, session).filter(
+            m.Instance.id.in_(instance_ids))
+
+        counts = query.with_entities(
+            m.Instance.node_group_id, sa.func.count(m.Instance.id)).group_by(
+                m.Instance.node_group_id).all()
+
+        if sum(count for _, count in counts) != len(instance_ids):
+            # raise not found error
+            raise RuntimeError("Instance not found!")
+
+        query.delete(synchronize_session=False)
+
+        for node_group_id, count in counts:
+            model_query(m.NodeGroup, context, session).filter_by(
+                id=node_group_id).update(
+                    {'count': m.NodeGroup.count - count},
+                    synchronize_session=False)
+
+
 ## Cluster Template ops
 
 def _cluster_template_get(context, session, cluster_template_id):
@@ -59,6 +59,8 @@ class Cluster(mb.SavannaBase):
     status = sa.Column(sa.String(80))
     status_description = sa.Column(sa.String(200))
     info = sa.Column(st.JsonDictType())
+    drift = sa.Column(st.JsonDictType())
+    gateway_id = sa.Column(sa.String(36))
     node_groups = relationship('NodeGroup', cascade="all,delete",
                                backref='cluster', lazy='joined')
     cluster_template_id = sa.Column(sa.String(36),
@@ -91,6 +93,7 @@ class NodeGroup(mb.SavannaBase):
     volumes_size = sa.Column(sa.Integer)
     volume_mount_prefix = sa.Column(sa.String(80))
     count = sa.Column(sa.Integer, nullable=False)
+    min_count = sa.Column(sa.Integer)
     instances = relationship('Instance', cascade="all,delete",
                              backref='node_group',
                              order_by="Instance.instance_name", lazy='joined')
@@ -198,6 +201,7 @@ class TemplatesRelation(mb.SavannaBase):
     volumes_size = sa.Column(sa.Integer)
     volume_mount_prefix = sa.Column(sa.String(80))
     count = sa.Column(sa.Integer, nullable=False)
+    min_count = sa.Column(sa.Integer)
     cluster_template_id = sa.Column(sa.String(36),
                                     sa.ForeignKey('cluster_templates.id'))
     node_group_template_id = sa.Column(sa.String(36),
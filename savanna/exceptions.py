@@ -66,6 +66,28 @@ class InvalidException(SavannaException):
             self.message = message
 
 
+class QuotaException(SavannaException):
+    message = "Quota exceeded for %s"
+
+    def __init__(self, resources):
+        self.code = "QUOTA_ERROR"
+        self.message = self.message % resources
+
+
+class EndpointNotFoundException(SavannaException):
+    message = "Service \"%s\" not found"
+
+    def __init__(self, service_type, endpoint_type=None):
+        self.code = "ENDPOINT_NOT_FOUND"
+
+        self.service_type = service_type
+        self.endpoint_type = endpoint_type
+
+        self.message = self.message % service_type
+        if endpoint_type:
+            self.message += ' or it has no %s endpoint' % endpoint_type
+
+
 class RemoteCommandException(SavannaException):
     message = "Error during command execution: \"%s\""
 
@@ -88,3 +110,28 @@ class RemoteCommandException(SavannaException):
 
         if stdout:
             self.message += '\nSTDOUT:\n' + stdout
+
+
+class InstancesAwaitTimeoutException(SavannaException):
+    message = "Instances %s are not accessible after %s seconds"
+
+    def __init__(self, instance_names, timeout):
+        self.code = "INSTANCES_AWAIT_TIMEOUT"
+
+        self.instance_names = instance_names
+        self.timeout = timeout
+
+        self.message = self.message % (', '.join(instance_names), timeout)
+
+
+class RemoteHostUnavailableException(SavannaException):
+    message = ("Host %s is considered unavailable after %s consecutive "
+               "connection timeouts")
+
+    def __init__(self, host, failures):
+        self.code = "REMOTE_HOST_UNAVAILABLE"
+
+        self.host = host
+        self.failures = failures
+
+        self.message = self.message % (host, failures)
@@ -100,6 +100,11 @@ class AmbariPlugin(p.ProvisioningPluginBase):
 
         return node_processes
 
+    def get_public_node_processes(self, hadoop_version):
+        # Ambari REST API is used for provisioning, web UIs are exposed in
+        # cluster info
+        return ['AMBARI_SERVER', 'NAMENODE', 'JOBTRACKER']
+
     def convert(self, config, plugin_name, version, cluster_template_create):
         normalized_config = clusterspec.ClusterSpec(config).normalize()
 
@@ -46,6 +46,18 @@ class ProvisioningPluginBase(plugins_base.PluginInterface):
     def get_required_image_tags(self, hadoop_version):
         return [self.name, hadoop_version]
 
+    @plugins_base.required_with_default
+    def get_public_node_processes(self, hadoop_version):
+        """Processes accessed directly by Savanna or users, e.g. over HTTP.
+
+        Nodes running them need management IPs even if use_gateway is set.
+        By default all processes are considered public.
+        """
+        return [process
+                for processes in self.get_node_processes(
+                    hadoop_version).values()
+                for process in processes]
+
     @plugins_base.required_with_default
     def validate(self, cluster):
         pass
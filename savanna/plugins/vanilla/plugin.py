@@ -62,6 +62,10 @@ class VanillaProvider(p.ProvisioningPluginBase):
     def get_node_processes(self, hadoop_version):
         return self.processes
 
+    def get_public_node_processes(self, hadoop_version):
+        # web UIs are exposed in cluster info
+        return ['namenode', 'jobtracker', 'oozie']
+
     def validate(self, cluster):
         nn_count = sum([ng.count for ng
                         in utils.get_node_groups(cluster, "namenode")])
@@ -219,39 +223,39 @@ class VanillaProvider(p.ProvisioningPluginBase):
             }
             with remote.get_remote(inst) as r:
                 # TODO(aignatov): sudo chown is wrong solution. But it works.
-                r.execute_command(
-                    'sudo chown -R $USER:$USER /etc/hadoop'
-                )
-                r.execute_command(
+                r.execute_commands([
+                    'sudo chown -R $USER:$USER /etc/hadoop',
                     'sudo chown -R $USER:$USER /opt/oozie/conf'
-                )
-                r.write_files_to(files)
-                r.execute_command(
-                    'sudo chmod 0500 /tmp/savanna-hadoop-init.sh'
-                )
-                r.execute_command(
+                ])
+                r.push_files_to(files)
+                # setup script is idempotent, so it is always rerun: it
+                # depends on the other configs and its previous run could
+                # have failed
+                r.execute_commands([
+                    'sudo chmod 0500 /tmp/savanna-hadoop-init.sh',
                     'sudo /tmp/savanna-hadoop-init.sh '
-                    '>> /tmp/savanna-hadoop-init.log 2>&1')
+                    '>> /tmp/savanna-hadoop-init.log 2>&1'
+                ])
 
         nn = utils.get_namenode(cluster)
         jt = utils.get_jobtracker(cluster)
 
         with remote.get_remote(nn) as r:
-            r.write_file_to('/etc/hadoop/dn.incl', utils.
-                            generate_fqdn_host_names(
-                            utils.get_datanodes(cluster)))
+            r.push_files_to({'/etc/hadoop/dn.incl': utils.
+                             generate_fqdn_host_names(
+                             utils.get_datanodes(cluster))})
         if jt:
             with remote.get_remote(jt) as r:
-                r.write_file_to('/etc/hadoop/tt.incl', utils.
-                                generate_fqdn_host_names(
-                                utils.get_tasktrackers(cluster)))
+                r.push_files_to({'/etc/hadoop/tt.incl': utils.
+                                 generate_fqdn_host_names(
+                                 utils.get_tasktrackers(cluster))})
 
         oozie = utils.get_oozie(cluster)
         if oozie:
             with remote.get_remote(oozie) as r:
-                r.write_file_to('/opt/oozie/conf/oozie-site.xml',
-                                extra[oozie.node_group.id]
-                                ['xml']['oozie-site'])
+                r.push_files_to({'/opt/oozie/conf/oozie-site.xml':
+                                 extra[oozie.node_group.id]
+                                 ['xml']['oozie-site']})
 
     def _set_cluster_info(self, cluster):
         nn = utils.get_namenode(cluster)
@@ -291,10 +295,16 @@ class VanillaProvider(p.ProvisioningPluginBase):
                  'sudo chown -R hadoop:hadoop /home/hadoop/.ssh; ' \
                  'sudo chmod 600 /home/hadoop/.ssh/{id_rsa,authorized_keys}'
 
+        remote_files = {
+            '/home/hadoop/.ssh/id_rsa': private_key,
+            '/home/hadoop/.ssh/authorized_keys': public_key
+        }
+
         for instance in instances:
             with remote.get_remote(instance) as r:
-                r.write_files_to(files)
-                r.execute_command(mv_cmd)
+                if r.get_changed_files(remote_files, use_sudo=True):
+                    r.write_files_to(files)
+                    r.execute_command(mv_cmd)
 
     def _get_scalable_processes(self):
         return ["datanode", "tasktracker"]
@@ -20,8 +20,11 @@ from savanna.openstack.common import log as logging
 from savanna.plugins import base as plugin_base
 from savanna.plugins import provisioning
 from savanna.service import instances as i
+from savanna.service import quotas
 from savanna.utils import general as g
+from savanna.utils import metrics
 from savanna.utils.openstack import nova
+from savanna.utils import remote
 
 
 conductor = c.API
@@ -38,6 +41,14 @@ def get_cluster(id):
     return conductor.cluster_get(context.ctx(), id)
 
 
+def get_cluster_status(id):
+    return conductor.cluster_get_status(context.ctx(), id)
+
+
+def get_cluster_summary(id):
+    return conductor.cluster_get_summary(context.ctx(), id)
+
+
 def scale_cluster(id, data):
     ctx = context.ctx()
 
@@ -60,12 +71,12 @@ def scale_cluster(id, data):
                                            {"status": "Validating"})
         LOG.info(g.format_cluster_status(cluster))
         plugin.validate_scaling(cluster, to_be_enlarged, additional)
+        quotas.check_scaling(cluster, to_be_enlarged, additional)
     except Exception:
         with excutils.save_and_reraise_exception():
             i.clean_cluster_from_empty_ng(cluster)
-            cluster = conductor.cluster_update(ctx, cluster,
-                                               {"status": "Active"})
-            LOG.info(g.format_cluster_status(cluster))
+            conductor.cluster_update_status(ctx, cluster, "Active")
+            LOG.info(g.format_cluster_status(cluster, "Active"))
 
     # If we are here validation is successful.
     # So let's update to_be_enlarged map:
@@ -87,12 +98,11 @@ def create_cluster(values):
                                            {"status": "Validating"})
         LOG.info(g.format_cluster_status(cluster))
         plugin.validate(cluster)
+        quotas.check_cluster(cluster)
     except Exception as ex:
         with excutils.save_and_reraise_exception():
-            cluster = conductor.cluster_update(ctx, cluster,
-                                               {"status": "Error",
-                                                "status_description": str(ex)})
-            LOG.info(g.format_cluster_status(cluster))
+            conductor.cluster_update_status(ctx, cluster, "Error", str(ex))
+            LOG.info(g.format_cluster_status(cluster, "Error"))
 
     context.spawn("cluster-creating-%s" % cluster.id,
                   _provision_cluster, cluster.id)
@@ -105,19 +115,21 @@ def _provision_nodes(id, node_group_id_map):
     cluster = conductor.cluster_get(ctx, id)
     plugin = plugin_base.PLUGINS.get_plugin(cluster.plugin_name)
 
-    cluster = conductor.cluster_update(ctx, cluster, {"status": "Scaling"})
-    LOG.info(g.format_cluster_status(cluster))
-    instances = i.scale_cluster(cluster, node_group_id_map, plugin)
+    conductor.cluster_update_status(ctx, cluster, "Scaling")
+    LOG.info(g.format_cluster_status(cluster, "Scaling"))
+    with metrics.trace('scale_instances', cluster.id):
+        instances = i.scale_cluster(cluster, node_group_id_map, plugin)
 
     if instances:
         cluster = conductor.cluster_update(ctx, cluster,
                                            {"status": "Configuring"})
         LOG.info(g.format_cluster_status(cluster))
-        plugin.scale_cluster(cluster, i.get_instances(cluster, instances))
+        with metrics.trace('scale_cluster', cluster.id):
+            plugin.scale_cluster(cluster, i.get_instances(cluster, instances))
 
     # cluster is now up and ready
-    cluster = conductor.cluster_update(ctx, cluster, {"status": "Active"})
-    LOG.info(g.format_cluster_status(cluster))
+    conductor.cluster_update_status(ctx, cluster, "Active")
+    LOG.info(g.format_cluster_status(cluster, "Active"))
 
 
 def _provision_cluster(cluster_id):
@@ -126,42 +138,47 @@ def _provision_cluster(cluster_id):
     plugin = plugin_base.PLUGINS.get_plugin(cluster.plugin_name)
 
     # updating cluster infra
-    cluster = conductor.cluster_update(ctx, cluster,
-                                       {"status": "InfraUpdating"})
-    LOG.info(g.format_cluster_status(cluster))
-    plugin.update_infra(cluster)
+    conductor.cluster_update_status(ctx, cluster, "InfraUpdating")
+    LOG.info(g.format_cluster_status(cluster, "InfraUpdating"))
+    with metrics.trace('update_infra', cluster_id):
+        plugin.update_infra(cluster)
 
     # creating instances and configuring them
     cluster = conductor.cluster_get(ctx, cluster_id)
-    i.create_cluster(cluster)
+    with metrics.trace('create_instances', cluster_id):
+        i.create_cluster(cluster)
 
     # configure cluster
     cluster = conductor.cluster_update(ctx, cluster, {"status": "Configuring"})
     LOG.info(g.format_cluster_status(cluster))
-    plugin.configure_cluster(cluster)
+    with metrics.trace('configure_cluster', cluster_id):
+        plugin.configure_cluster(cluster)
 
     # starting prepared and configured cluster
     cluster = conductor.cluster_update(ctx, cluster, {"status": "Starting"})
     LOG.info(g.format_cluster_status(cluster))
-    plugin.start_cluster(cluster)
+    with metrics.trace('start_cluster', cluster_id):
+        plugin.start_cluster(cluster)
 
     # cluster is now up and ready
-    cluster = conductor.cluster_update(ctx, cluster, {"status": "Active"})
-    LOG.info(g.format_cluster_status(cluster))
+    conductor.cluster_update_status(ctx, cluster, "Active")
+    LOG.info(g.format_cluster_status(cluster, "Active"))
 
 
 def terminate_cluster(id):
     ctx = context.ctx()
     cluster = conductor.cluster_get(ctx, id)
 
-    cluster = conductor.cluster_update(ctx, cluster, {"status": "Deleting"})
-    LOG.info(g.format_cluster_status(cluster))
+    conductor.cluster_update_status(ctx, cluster, "Deleting")
+    LOG.info(g.format_cluster_status(cluster, "Deleting"))
 
     plugin = plugin_base.PLUGINS.get_plugin(cluster.plugin_name)
     plugin.on_terminate_cluster(cluster)
 
     i.shutdown_cluster(cluster)
     conductor.cluster_destroy(ctx, cluster)
+    metrics.forget_cluster(cluster.id)
+    remote.close_gateway_connection(cluster.id)
 
 
 ## ClusterTemplate ops
@@ -231,14 +248,23 @@ def convert_to_cluster_template(plugin_name, version, config_file):
 
 
 def construct_ngs_for_scaling(cluster, additional_node_groups):
-    ctx = context.ctx()
-    additional = {}
+    if not additional_node_groups:
+        return {}
+
+    counts = []
     for ng in additional_node_groups:
-        count = ng['count']
+        counts.append(ng['count'])
         ng['count'] = 0
-        ng_id = conductor.node_group_add(ctx, cluster, ng)
-        additional.update({ng_id: count})
-    return additional
+    ng_ids = conductor.node_group_add_many(context.ctx(), cluster,
+                                           additional_node_groups)
+    return dict(zip(ng_ids, counts))
+
+
+## Metrics ops
+
+def get_remote_metrics():
+    return metrics.get_stats(context.ctx().tenant_id)
+
 
 ## Image Registry
 
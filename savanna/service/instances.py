@@ -13,10 +13,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import random
+import re
+import time
+
 from novaclient import exceptions as nova_exceptions
+from oslo.config import cfg
 
 from savanna import conductor as c
 from savanna import context
+from savanna import exceptions
 from savanna.openstack.common import excutils
 from savanna.openstack.common import log as logging
 from savanna.service import networks
@@ -24,7 +30,28 @@ from savanna.service import volumes
 from savanna.utils import crypto
 from savanna.utils import general as g
 from savanna.utils.openstack import nova
-
+from savanna.utils.openstack import ratelimit
+
+
+opts = [
+    cfg.IntOpt('instance_boot_retries',
+               default=3,
+               help='Number of times transient Nova errors during instance '
+                    'creation are retried and instances in error state are '
+                    'booted again'),
+    cfg.FloatOpt('instance_boot_backoff',
+                 default=2.0,
+                 help='Base delay in seconds between retries of instance '
+                      'creation, actual delay is random and grows '
+                      'exponentially with each retry'),
+    cfg.IntOpt('instance_await_timeout',
+               default=3600,
+               help='Maximum time in seconds to wait for instances to become '
+                    'active and accessible, 0 disables the timeout')
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts)
 
 conductor = c.API
 LOG = logging.getLogger(__name__)
@@ -34,8 +61,8 @@ def create_cluster(cluster):
     ctx = context.ctx()
     try:
         # create all instances
-        conductor.cluster_update(ctx, cluster, {"status": "Spawning"})
-        LOG.info(g.format_cluster_status(cluster))
+        conductor.cluster_update_status(ctx, cluster, "Spawning")
+        LOG.info(g.format_cluster_status(cluster, "Spawning"))
         _create_instances(cluster)
 
         # wait for all instances are up and accessible
@@ -75,6 +102,8 @@ def scale_cluster(cluster, node_group_id_map, plugin):
     ctx = context.ctx()
 
     instances_list = []
+    # IDs of new instances removed from node groups because of errors
+    removed = set()
     try:
         instances_list = _scale_cluster_instances(
             cluster, node_group_id_map, plugin)
@@ -82,13 +111,15 @@ def scale_cluster(cluster, node_group_id_map, plugin):
         cluster = conductor.cluster_get(ctx, cluster)
         cluster = clean_cluster_from_empty_ng(cluster)
 
-        cluster = _await_instances(cluster)
+        cluster = _await_instances(cluster, removed)
+        instances_list = _filter_removed(instances_list, removed)
 
         volumes.attach_to_instances(get_instances(cluster, instances_list))
 
     except Exception as ex:
         LOG.warn("Can't scale cluster '%s' (reason: %s)", cluster.name, ex)
         with excutils.save_and_reraise_exception():
+            instances_list = _filter_removed(instances_list, removed)
             cluster = conductor.cluster_get(ctx, cluster)
             _rollback_cluster_scaling(cluster,
                                       get_instances(cluster, instances_list),
@@ -113,6 +144,10 @@ def scale_cluster(cluster, node_group_id_map, plugin):
     return instances_list
 
 
+def _filter_removed(instances_ids, removed):
+    return [id for id in instances_ids if id not in removed]
+
+
 def _generate_anti_affinity_groups(cluster):
     aa_groups = {}
 
@@ -134,12 +169,13 @@ def _create_instances(cluster):
     #aa_groups = _generate_anti_affinity_groups(cluster)
     aa_groups = {}
 
+    conductor.node_group_update_many(
+        ctx, [(ng, {'count': 0}) for ng in cluster.node_groups])
+
     for node_group in cluster.node_groups:
         count = node_group.count
-        conductor.node_group_update(ctx, node_group, {'count': 0})
-        userdata = _generate_user_data_script(node_group)
-        for idx in xrange(1, count + 1):
-            _run_instance(cluster, node_group, idx, aa_groups, userdata)
+        _run_instances(cluster, node_group, xrange(1, count + 1), aa_groups,
+                       node_group.min_count or count)
 
 
 def _scale_cluster_instances(cluster, node_group_id_map, plugin):
@@ -160,16 +196,18 @@ def _scale_cluster_instances(cluster, node_group_id_map, plugin):
             node_groups_to_enlarge.append(node_group)
 
     if instances_to_delete:
-        conductor.cluster_update(ctx, cluster, {"status": "Decommissioning"})
-        LOG.info(g.format_cluster_status(cluster))
+        conductor.cluster_update_status(ctx, cluster, "Decommissioning")
+        LOG.info(g.format_cluster_status(cluster, "Decommissioning"))
         plugin.decommission_nodes(cluster, instances_to_delete)
-        cluster = conductor.cluster_update(ctx, cluster,
-                                           {"status": "Deleting Instances"})
-        LOG.info(g.format_cluster_status(cluster))
-        for instance in instances_to_delete:
-            _shutdown_instance(instance)
+        conductor.cluster_update_status(ctx, cluster, "Deleting Instances")
+        LOG.info(g.format_cluster_status(cluster, "Deleting Instances"))
+
+    # removal of instances is sent along with the following cluster_get
+    with conductor.batch(ctx):
+        if instances_to_delete:
+            _shutdown_instance_list(instances_to_delete)
 
-    cluster = conductor.cluster_get(ctx, cluster)
+        cluster = conductor.cluster_get(ctx, cluster)
 
     instances_to_add = []
     if node_groups_to_enlarge:
@@ -178,11 +216,9 @@ def _scale_cluster_instances(cluster, node_group_id_map, plugin):
         LOG.info(g.format_cluster_status(cluster))
         for node_group in node_groups_to_enlarge:
             count = node_group_id_map[node_group.id]
-            userdata = _generate_user_data_script(node_group)
-            for idx in xrange(node_group.count + 1, count + 1):
-                instance_id = _run_instance(cluster, node_group, idx,
-                                            aa_groups, userdata)
-                instances_to_add.append(instance_id)
+            instances_to_add += _run_instances(
+                cluster, node_group, xrange(node_group.count + 1, count + 1),
+                aa_groups)
 
     return instances_to_add
 
@@ -195,11 +231,73 @@ def _find_by_id(lst, id):
     return None
 
 
-def _run_instance(cluster, node_group, idx, aa_groups, userdata):
-    """Create instance using nova client and persist them into DB."""
+def _run_instances(cluster, node_group, indexes, aa_groups, required=None):
+    """Create instances using nova client and persist them into DB at once.
+
+    Failures are tolerated while at least 'required' instances could still
+    be created, by default all of them are required. Booted instances are
+    persisted even if creation of the rest fails, so they could be cleaned
+    up. Returns IDs of the created instances.
+    """
     ctx = context.ctx()
+    userdata = _generate_user_data_script(node_group)
+    if required is None:
+        required = len(indexes)
+
+    instances = []
+    failed = 0
+    try:
+        for idx in indexes:
+            try:
+                instances.append(_run_instance(cluster, node_group, idx,
+                                               aa_groups, userdata))
+            except Exception as ex:
+                failed += 1
+                if len(indexes) - failed < required:
+                    raise
+                LOG.warn("Can't create instance %s of node group '%s' "
+                         "(reason: %s), continuing with fewer instances",
+                         idx, node_group.name, ex)
+    except Exception:
+        with excutils.save_and_reraise_exception():
+            try:
+                conductor.instance_add_many(ctx, node_group, instances)
+            except Exception as ex:
+                # don't mask the boot error, servers have to be cleaned up
+                # manually in this case
+                LOG.error("Can't persist instances %s of node group '%s' "
+                          "(reason: %s)",
+                          [inst['instance_id'] for inst in instances],
+                          node_group.name, ex)
+
+    return conductor.instance_add_many(ctx, node_group, instances)
+
+
+def _run_instance(cluster, node_group, idx, aa_groups, userdata):
+    """Create instance using nova client, return values to persist."""
     name = '%s-%s-%03d' % (cluster.name, node_group.name, idx)
 
+    nova_instance = _create_server(cluster, node_group, name, aa_groups,
+                                   userdata)
+
+    # save instance id to aa_groups to support aa feature
+    for node_process in node_group.node_processes:
+        if node_process in cluster.anti_affinity:
+            aa_group_ids = aa_groups.get(node_process, [])
+            aa_group_ids.append(nova_instance.id)
+            aa_groups[node_process] = aa_group_ids
+
+    return {"instance_id": nova_instance.id, "instance_name": name}
+
+
+def _create_server(cluster, node_group, name, aa_groups, userdata,
+                   replaced_server_id=None):
+    """Boot server retrying transient Nova errors with jittered backoff.
+
+    Nova could fail with a server error after the boot request has been
+    accepted, so in this case the server is looked up by name before
+    retrying to avoid creating a duplicate.
+    """
     # aa_groups: node process -> instance ids
     aa_ids = []
     for node_process in node_group.node_processes:
@@ -208,22 +306,79 @@ def _run_instance(cluster, node_group, idx, aa_groups, userdata):
     # create instances only at hosts w/ no instances w/ aa-enabled processes
     hints = {'different_host': list(set(aa_ids))} if aa_ids else None
 
-    nova_instance = nova.client().servers.create(
-        name, node_group.get_image_id(), node_group.flavor_id,
-        scheduler_hints=hints, userdata=userdata,
-        key_name=cluster.user_keypair_id)
+    attempt = 0
+    while True:
+        try:
+            return nova.client().servers.create(
+                name, node_group.get_image_id(), node_group.flavor_id,
+                scheduler_hints=hints, userdata=userdata,
+                key_name=cluster.user_keypair_id)
+        except Exception as ex:
+            if _is_server_error(ex):
+                server = _find_server(name, replaced_server_id)
+                if server:
+                    LOG.debug("Instance %s has been created despite the "
+                              "error (reason: %s)", name, ex)
+                    return server
+
+            if (attempt >= CONF.instance_boot_retries or
+                    not _is_transient_error(ex)):
+                raise
+
+        delay = random.uniform(0, CONF.instance_boot_backoff * 2 ** attempt)
+        attempt += 1
+        LOG.debug("Can't create instance %s (reason: %s), retrying in "
+                  "%.1f seconds", name, ex, delay)
+        context.sleep(delay)
+
+
+def _find_server(name, ignored_id=None):
+    # name filter is a regular expression
+    servers = nova.client().servers.list(
+        search_opts={'name': '^%s$' % re.escape(name)})
+    for server in servers:
+        if server.name == name and server.id != ignored_id:
+            return server
 
-    instance_id = conductor.instance_add(ctx, node_group,
-                                         {"instance_id": nova_instance.id,
-                                          "instance_name": name})
-    # save instance id to aa_groups to support aa feature
-    for node_process in node_group.node_processes:
-        if node_process in cluster.anti_affinity:
-            aa_group_ids = aa_groups.get(node_process, [])
-            aa_group_ids.append(nova_instance.id)
-            aa_groups[node_process] = aa_group_ids
+    return None
 
-    return instance_id
+
+def _is_server_error(ex):
+    code = getattr(ex, 'code', None)
+    return isinstance(code, int) and code >= 500
+
+
+def _is_transient_error(ex):
+    # throttling errors are retried by the rate limiter of the client
+    if ratelimit.is_retried(ex):
+        return False
+
+    # these errors mean that the request hasn't been accepted
+    if isinstance(ex, (nova_exceptions.ConnectionRefused,
+                       nova_exceptions.OverLimit,
+                       nova_exceptions.RateLimit)):
+        return True
+
+    return _is_server_error(ex)
+
+
+def _replace_instance(instance):
+    """Delete server of the instance and boot a new one instead."""
+    ctx = context.ctx()
+    node_group = instance.node_group
+    cluster = node_group.cluster
+
+    _delete_server(instance)
+
+    aa_groups = _generate_anti_affinity_groups(cluster)
+    for ids in aa_groups.values():
+        if instance.instance_id in ids:
+            ids.remove(instance.instance_id)
+
+    server = _create_server(cluster, node_group, instance.instance_name,
+                            aa_groups, _generate_user_data_script(node_group),
+                            instance.instance_id)
+    conductor.instance_update(ctx, instance, {"instance_id": server.id})
 
 
 def _generate_user_data_script(node_group):
@@ -245,39 +400,97 @@ echo "%(private_key)s" > %(user_home)s/.ssh/id_rsa
     }
 
 
-def _await_instances(cluster):
-    """Await all instances are in Active status and available."""
+def _await_instances(cluster, removed=None):
+    """Await all instances are in Active status and available.
+
+    Instances in error state could be removed from node groups with
+    min_count set, IDs of such instances are added to the 'removed' set.
+    InstancesAwaitTimeoutException is raised if instances aren't accessible
+    after instance_await_timeout seconds.
+    """
     ctx = context.ctx()
+    if removed is None:
+        removed = set()
+    started = time.time()
+
+    if networks.use_gateway():
+        cluster = _choose_gateway(cluster)
     all_up = False
     is_accesible = set()
+    # instance id -> number of times instance was booted again
+    replaced = {}
     while not all_up:
         all_up = True
+        # (instance, ips) pairs to be saved at once
+        ips_updates = []
+
+        # updates and removals of instances are sent along with the
+        # following cluster_get
+        with conductor.batch(ctx):
+            for node_group in cluster.node_groups:
+                for instance in node_group.instances:
+                    if not _check_if_up(instance, replaced, ips_updates,
+                                        removed):
+                        all_up = False
+
+            if ips_updates:
+                conductor.instance_update_many(ctx, ips_updates)
+            cluster = conductor.cluster_get(ctx, cluster)
 
-        for node_group in cluster.node_groups:
-            for instance in node_group.instances:
-                if not _check_if_up(instance):
-                    all_up = False
-
-        cluster = conductor.cluster_get(ctx, cluster)
+        if networks.use_gateway():
+            cluster = _choose_gateway(cluster)
 
         for node_group in cluster.node_groups:
             for instance in node_group.instances:
                 if not _check_if_accessible(instance, is_accesible):
                     all_up = False
 
+        timeout = CONF.instance_await_timeout
+        if not all_up and timeout and time.time() - started > timeout:
+            raise exceptions.InstancesAwaitTimeoutException(
+                sorted(instance.instance_name
+                       for node_group in cluster.node_groups
+                       for instance in node_group.instances
+                       if instance.id not in is_accesible), timeout)
+
         context.sleep(1)
 
     return cluster
 
 
-def _check_if_up(instance):
-    if instance.internal_ip and instance.management_ip:
+def _choose_gateway(cluster):
+    """Choose the cluster gateway if it isn't chosen or was removed.
+
+    The gateway is kept while it exists, so connections to other nodes
+    don't move between nodes on scaling. Nodes running public processes
+    need management ips anyway, so they are preferred.
+    """
+    if cluster.gateway is not None:
+        return cluster
+
+    instances = [instance for node_group in cluster.node_groups
+                 for instance in node_group.instances]
+    if not instances:
+        return cluster
+
+    public = dict((node_group.id, networks.is_public(node_group))
+                  for node_group in cluster.node_groups)
+    gateway = min(instances,
+                  key=lambda instance: (not public[instance.node_group.id],
+                                        instance.instance_name))
+    return conductor.cluster_update(context.ctx(), cluster,
+                                    {"gateway_id": gateway.id})
+
+
+def _check_if_up(instance, replaced, ips_updates, removed):
+    if networks.has_required_ips(instance, instance):
         return True
 
     server = nova.get_instance_info(instance)
     if server.status == 'ERROR':
-        # TODO(slukjanov): replace with specific error
-        raise RuntimeError("node %s has error status" % server.name)
+        if _handle_failed_instance(instance, server, replaced):
+            removed.add(instance.id)
+        return False
 
     if server.status != 'ACTIVE':
         return False
@@ -285,17 +498,44 @@ def _check_if_up(instance):
     if len(server.networks) == 0:
         return False
 
-    if not networks.init_instances_ips(instance, server):
+    ips = networks.get_instance_ips(instance, server)
+    ips_updates.append((instance, ips))
+
+    return networks.has_required_ips(instance, ips)
+
+
+def _handle_failed_instance(instance, server, replaced):
+    """Boot instance again or remove it from the node group.
+
+    Return True if the instance was removed.
+    """
+    attempts = replaced.get(instance.id, 0)
+    if attempts < CONF.instance_boot_retries:
+        LOG.warn("Node %s has error status, booting it again", server.name)
+        replaced[instance.id] = attempts + 1
+        _replace_instance(instance)
         return False
 
-    return True
+    node_group = instance.node_group
+    if node_group.min_count:
+        cluster = conductor.cluster_get_summary(context.ctx(),
+                                                node_group.cluster_id)
+        count = _find_by_id(cluster.node_groups, node_group.id).count
+        if count > node_group.min_count:
+            LOG.warn("Node %s has error status, removing it from node "
+                     "group '%s'", server.name, node_group.name)
+            _shutdown_instance(instance)
+            return True
+
+    # TODO(slukjanov): replace with specific error
+    raise RuntimeError("node %s has error status" % server.name)
 
 
 def _check_if_accessible(instance, cache):
     if instance.id in cache:
         return True
 
-    if not instance.internal_ip or not instance.management_ip:
+    if not networks.has_required_ips(instance, instance):
         # instance is not up yet
         return False
 
@@ -307,9 +547,13 @@ def _check_if_accessible(instance, cache):
         # don't log ls command failure
         if exit_code:
             return False
-    except Exception as ex:
+    except exceptions.RemoteHostUnavailableException as e:
+        LOG.warn("Can't login to node %s, reason %s",
+                 instance.instance_name, e)
+        return False
+    except Exception as e:
         LOG.debug("Can't login to node %s (%s), reason %s",
-                  instance.instance_name, instance.management_ip, ex)
+                  instance.instance_name, instance.management_ip, e)
         return False
 
     LOG.debug('Instance %s is accessible' % instance.instance_name)
@@ -329,11 +573,14 @@ def _configure_instances(cluster):
         for instance in node_group.instances:
             LOG.debug('Configuring instance %s' % instance.instance_name)
             with instance.remote as r:
-                r.write_file_to('etc-hosts', hosts)
-                r.execute_command('sudo mv etc-hosts /etc/hosts')
+                cmds = []
+                if r.get_changed_files({'/etc/hosts': hosts}):
+                    r.write_file_to('etc-hosts', hosts)
+                    cmds.append('sudo mv etc-hosts /etc/hosts')
 
-                r.execute_command('sudo chown $USER:$USER .ssh/id_rsa')
-                r.execute_command('chmod 400 .ssh/id_rsa')
+                cmds += ['sudo chown $USER:$USER .ssh/id_rsa',
+                         'chmod 400 .ssh/id_rsa']
+                r.execute_commands(cmds)
 
 
 def _generate_etc_hosts(cluster):
@@ -360,26 +607,39 @@ def _rollback_cluster_scaling(cluster, instances, ex):
     try:
         volumes.detach_from_instances(instances)
     finally:
-        for i in instances:
-            _shutdown_instance(i)
+        _shutdown_instance_list(instances)
 
 
 def _shutdown_instances(cluster):
-    for node_group in cluster.node_groups:
-        for instance in node_group.instances:
-            _shutdown_instance(instance)
+    _shutdown_instance_list([instance
+                             for node_group in cluster.node_groups
+                             for instance in node_group.instances])
+
+
+def _shutdown_instance_list(instances):
+    """Delete servers of the instances and remove them from DB at once."""
+    deleted = []
+    try:
+        for instance in instances:
+            _delete_server(instance)
+            deleted.append(instance)
+    finally:
+        if deleted:
+            conductor.instance_remove_many(context.ctx(), deleted)
 
 
 def _shutdown_instance(instance):
-    ctx = context.ctx()
+    _delete_server(instance)
+    conductor.instance_remove(context.ctx(), instance)
+
+
+def _delete_server(instance):
     try:
         nova.client().servers.delete(instance.instance_id)
     except nova_exceptions.NotFound:
         #Just ignore non-existing instances
         pass
 
-    conductor.instance_remove(ctx, instance)
-
 
 def shutdown_cluster(cluster):
     """Shutdown specified cluster and all related resources."""
@@ -391,8 +651,8 @@ def shutdown_cluster(cluster):
 
 def clean_cluster_from_empty_ng(cluster):
     ctx = context.ctx()
-    for ng in cluster.node_groups:
-        if ng.count == 0:
-            conductor.node_group_remove(ctx, ng)
+    empty_node_groups = [ng for ng in cluster.node_groups if ng.count == 0]
+    if empty_node_groups:
+        conductor.node_group_remove_many(ctx, empty_node_groups)
 
     return conductor.cluster_get(ctx, cluster)
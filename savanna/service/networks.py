@@ -17,28 +17,24 @@ import netaddr
 
 from oslo.config import cfg
 
-from savanna import conductor as c
-from savanna import context
+from savanna.plugins import base as plugin_base
 from savanna.utils.openstack import nova
 
 
-conductor = c.API
 CONF = cfg.CONF
 
 
 # NOTE(slukjanov): https://blueprints.launchpad.net/savanna?searchtext=ip
-def init_instances_ips(instance, server):
+def get_instance_ips(instance, server):
     """Extracts internal and management ips.
 
     As internal ip will be used the first ip from the nova networks CIDRs.
     If use_floating_ip flag is set than management ip will be the first
     non-internal ip.
-    """
-    ctx = context.ctx()
-
-    if instance.internal_ip and instance.management_ip:
-        return True
 
+    Returns dict with "internal_ip" and "management_ip" values to be saved
+    to the instance, any of them could be None if it isn't assigned yet.
+    """
     management_ip = instance.management_ip
     internal_ip = instance.internal_ip
 
@@ -54,7 +50,40 @@ def init_instances_ips(instance, server):
     if not CONF.use_floating_ips:
         management_ip = internal_ip
 
-    conductor.instance_update(ctx, instance, {"management_ip": management_ip,
-                                              "internal_ip": internal_ip})
+    return {"management_ip": management_ip, "internal_ip": internal_ip}
+
+
+def has_required_ips(instance, ips):
+    """Check that IPs required to access the instance are assigned.
+
+    If use_gateway flag is set, only the cluster gateway and nodes running
+    public processes of the plugin are required to have management ip,
+    other nodes are accessed via gateway using internal ip.
+    """
+    if not ips['internal_ip']:
+        return False
+
+    return bool(ips['management_ip']) or _accessed_via_gateway(instance)
 
-    return internal_ip and management_ip
+
+def use_gateway():
+    return CONF.use_floating_ips and CONF.use_gateway
+
+
+def _accessed_via_gateway(instance):
+    if not use_gateway():
+        return False
+
+    gateway = instance.node_group.cluster.gateway
+    return (gateway is not None and gateway.id != instance.id and
+            not is_public(instance.node_group))
+
+
+def is_public(node_group):
+    """Check if the node group runs processes which are accessed directly
+    by Savanna or users, so its nodes need management ips.
+    """
+    cluster = node_group.cluster
+    plugin = plugin_base.PLUGINS.get_plugin(cluster.plugin_name)
+    public = plugin.get_public_node_processes(cluster.hadoop_version)
+    return bool(set(node_group.node_processes) & set(public))
@@ -0,0 +1,134 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pre-flight checks of the tenant's absolute limits.
+
+Resources required by the cluster are computed from its node groups and
+flavors and compared with the limits before any instance is booted, so
+requests which can't be satisfied are rejected early instead of being
+rolled back after a part of instances are already started.
+"""
+
+from oslo.config import cfg
+
+from savanna import exceptions as ex
+from savanna.openstack.common import log as logging
+from savanna.service import networks
+from savanna.utils.openstack import cinder
+from savanna.utils.openstack import nova
+
+
+LOG = logging.getLogger(__name__)
+
+CONF = cfg.CONF
+CONF.import_opt('use_floating_ips', 'savanna.config')
+CONF.import_opt('use_gateway', 'savanna.config')
+
+# resource -> (name of the absolute limit, name of its usage)
+_NOVA_LIMITS = {
+    'instances': ('maxTotalInstances', 'totalInstancesUsed'),
+    'cores': ('maxTotalCores', 'totalCoresUsed'),
+    'ram': ('maxTotalRAMSize', 'totalRAMUsed'),
+    'floating_ips': ('maxTotalFloatingIps', 'totalFloatingIpsUsed'),
+}
+
+_CINDER_LIMITS = {
+    'volumes': ('maxTotalVolumes', 'totalVolumesUsed'),
+    'volume_gbs': ('maxTotalVolumeGigabytes', 'totalGigabytesUsed'),
+}
+
+
+def check_cluster(cluster):
+    """Check that all instances of the new cluster fit tenant's limits."""
+    changes = [(ng, ng.count) for ng in cluster.node_groups]
+    _check_limits(_get_requirements(changes, new_cluster=True))
+
+
+def check_scaling(cluster, to_be_enlarged, additional):
+    """Check that cluster scaling fits tenant's limits.
+
+    Both maps have node group ids as keys and desired numbers of instances
+    as values. Instances of shrunk node groups are deleted before the new
+    ones are booted, so they are subtracted from requirements.
+    """
+    counts = dict(to_be_enlarged)
+    counts.update(additional)
+
+    changes = [(ng, counts[ng.id] - ng.count) for ng in cluster.node_groups
+               if ng.id in counts]
+    _check_limits(_get_requirements(changes, new_cluster=False))
+
+
+def _get_requirements(changes, new_cluster):
+    required = dict.fromkeys(_NOVA_LIMITS.keys() + _CINDER_LIMITS.keys(), 0)
+
+    for node_group, count in changes:
+        if not count:
+            continue
+
+        required['instances'] += count
+
+        profile = nova.get_flavor_profile(node_group.flavor_id)
+        if profile:
+            required['cores'] += count * profile.vcpus
+            required['ram'] += count * profile.ram
+
+        volumes = count * (node_group.volumes_per_node or 0)
+        required['volumes'] += volumes
+        required['volume_gbs'] += volumes * (node_group.volumes_size or 0)
+
+        if (CONF.use_floating_ips and CONF.use_gateway and
+                networks.is_public(node_group)):
+            required['floating_ips'] += count
+
+    if CONF.use_floating_ips:
+        if not CONF.use_gateway:
+            required['floating_ips'] = required['instances']
+        elif (new_cluster and required['instances'] > 0 and
+                not required['floating_ips']):
+            # only the gateway node needs floating ip, it is chosen among
+            # public nodes if there are any
+            required['floating_ips'] = 1
+
+    return required
+
+
+def _check_limits(required):
+    limits = {}
+    if _is_required(required, _NOVA_LIMITS):
+        limits.update(nova.get_limits())
+    if _is_required(required, _CINDER_LIMITS):
+        limits.update(cinder.get_limits())
+
+    exceeded = []
+    for resource, (limit_name, usage_name) in sorted(
+            _NOVA_LIMITS.items() + _CINDER_LIMITS.items()):
+        limit = limits.get(limit_name)
+        # negative limit means that resource isn't limited
+        if required[resource] <= 0 or limit is None or limit < 0:
+            continue
+
+        available = limit - limits.get(usage_name, 0)
+        if required[resource] > available:
+            exceeded.append("%s (requested %s, available %s)"
+                            % (resource, required[resource], available))
+
+    if exceeded:
+        LOG.info("Tenant's limits are exceeded: %s" % ', '.join(exceeded))
+        raise ex.QuotaException(', '.join(exceeded))
+
+
+def _is_required(required, limits):
+    return any(required[resource] > 0 for resource in limits)
@@ -0,0 +1,155 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Periodic reconciliation of clusters state with Nova.
+
+Once per interval servers of each tenant having active clusters are
+listed page by page and compared with cluster instances. Nodes
+which are missing in Nova or are in error state are reported in the
+'drift' field of the cluster.
+"""
+
+import inspect
+import json
+
+from novaclient.v1_1 import servers as nova_servers
+from oslo.config import cfg
+
+from savanna import conductor as c
+from savanna import context
+from savanna.openstack.common import log as logging
+from savanna.openstack.common import loopingcall
+from savanna.utils.openstack import keystone
+from savanna.utils.openstack import nova
+
+
+conductor = c.API
+LOG = logging.getLogger(__name__)
+
+opts = [
+    cfg.IntOpt('reconciliation_interval',
+               default=300,
+               help='Interval in seconds between checks of active clusters '
+                    'instances against Nova servers, 0 disables the checks. '
+                    'The checks are run by savanna-api process, if several '
+                    'of them are running, enable the checks in one of them '
+                    'only')
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts)
+
+# Nova caps the number of servers returned at once by osapi_max_limit
+_SERVERS_PAGE_SIZE = 1000
+
+# paging of servers is supported by recent novaclient versions only
+_PAGING_SUPPORTED = 'marker' in inspect.getargspec(
+    nova_servers.ServerManager.list).args
+
+
+def setup_reconciliation():
+    if CONF.reconciliation_interval <= 0:
+        return None
+
+    timer = loopingcall.FixedIntervalLoopingCall(reconcile)
+    timer.start(interval=CONF.reconciliation_interval,
+                initial_delay=CONF.reconciliation_interval)
+    return timer
+
+
+def reconcile():
+    try:
+        context.set_ctx(_make_admin_context())
+
+        tenants = {}
+        for cluster in conductor.cluster_get_all(context.ctx()):
+            if cluster.status == 'Active':
+                tenants.setdefault(cluster.tenant_id, []).append(cluster)
+
+        for tenant_id, clusters in tenants.iteritems():
+            try:
+                _reconcile_tenant(tenant_id, clusters)
+            except Exception as ex:
+                LOG.warn("Can't reconcile clusters of tenant %s "
+                         "(reason: %s)", tenant_id, ex)
+    except Exception as ex:
+        LOG.exception("Clusters reconciliation failed: %s", ex)
+    finally:
+        context.set_ctx(None)
+
+
+def _make_admin_context():
+    admin = keystone.client_for_admin()
+    headers = {
+        'X-User-Id': admin.auth_user_id,
+        'X-User-Name': CONF.os_admin_username,
+        'X-Tenant-Id': admin.auth_tenant_id,
+        'X-Auth-Token': admin.auth_token,
+        'X-Service-Catalog': json.dumps(admin.auth_ref['serviceCatalog'])
+    }
+    return context.Context(admin.auth_user_id, admin.auth_tenant_id,
+                           admin.auth_token, headers)
+
+
+def _list_servers(tenant_id):
+    search_opts = {'all_tenants': 1, 'tenant_id': tenant_id}
+    if not _PAGING_SUPPORTED:
+        return nova.client().servers.list(search_opts=search_opts)
+
+    servers = []
+    marker = None
+    while True:
+        page = nova.client().servers.list(
+            search_opts=search_opts, marker=marker,
+            limit=_SERVERS_PAGE_SIZE)
+        if not page:
+            return servers
+
+        servers += page
+        marker = page[-1].id
+
+
+def _reconcile_tenant(tenant_id, clusters):
+    statuses = dict((server.id, server.status)
+                    for server in _list_servers(tenant_id))
+
+    for cluster in clusters:
+        drift = get_drift(cluster, statuses)
+        if drift != (cluster.drift or {}):
+            if drift:
+                LOG.warn("Cluster %s is out of sync with Nova: %s",
+                         cluster.name, drift)
+            conductor.cluster_update(context.ctx(), cluster,
+                                     {'drift': drift})
+
+
+def get_drift(cluster, statuses):
+    """Return names of cluster instances missing or failed in Nova.
+
+    :param statuses: dict mapping Nova server ids to their statuses
+    """
+    drift = {}
+    for node_group in cluster.node_groups:
+        for instance in node_group.instances:
+            status = statuses.get(instance.instance_id)
+            if status is None:
+                drift.setdefault('missing', []).append(instance.instance_name)
+            elif status == 'ERROR':
+                drift.setdefault('error', []).append(instance.instance_name)
+
+    for names in drift.values():
+        names.sort()
+
+    return drift
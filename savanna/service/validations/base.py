@@ -93,6 +93,11 @@ def check_node_group_basic_fields(plugin_name, hadoop_version, ng,
     if ng.get('node_group_template_id'):
         check_node_group_template_exists(ng['node_group_template_id'])
 
+    if ng.get('min_count') and ng['min_count'] > ng.get('count'):
+        raise ex.InvalidException("Minimal number of instances of node "
+                                  "group '%s' is greater than its count"
+                                  % ng['name'])
+
     if ng.get('node_configs'):
         check_node_group_configs(plugin_name, hadoop_version,
                                  ng['node_configs'], plugin_configs)
@@ -110,9 +115,7 @@ def check_node_group_basic_fields(plugin_name, hadoop_version, ng,
 
 
 def check_flavor_exists(flavor_id):
-    try:
-        nova.client().flavors.get(flavor_id)
-    except nova_ex.NotFound:
+    if nova.get_flavor_profile(flavor_id) is None:
         raise ex.InvalidException("Requested flavor '%s' not found"
                                   % flavor_id)
 
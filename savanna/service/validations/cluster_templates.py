@@ -23,7 +23,10 @@ import savanna.service.validations.node_group_templates as ng_tml
 
 def _build_ng_schema_for_cluster_tmpl():
     cl_tmpl_ng_schema = copy.deepcopy(ng_tml.NODE_GROUP_TEMPLATE_SCHEMA)
-    cl_tmpl_ng_schema['properties'].update({"count": {"type": "integer"}})
+    cl_tmpl_ng_schema['properties'].update({
+        "count": {"type": "integer"},
+        "min_count": {"type": "integer", "minimum": 1}
+    })
     cl_tmpl_ng_schema["required"] = ['name', 'flavor_id',
                                      'node_processes', 'count']
     del cl_tmpl_ng_schema['properties']['hadoop_version']
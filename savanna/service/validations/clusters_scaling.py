@@ -67,7 +67,7 @@ CLUSTER_SCALING_SCHEMA = {
 
 
 def check_cluster_scaling(data, cluster_id, **kwargs):
-    cluster = api.get_cluster(id=cluster_id)
+    cluster = api.get_cluster_summary(id=cluster_id)
     if not (plugin_base.PLUGINS.is_plugin_implements(cluster.plugin_name,
                                                      'scale_cluster') and (
             plugin_base.PLUGINS.is_plugin_implements(cluster.plugin_name,
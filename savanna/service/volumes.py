@@ -116,9 +116,10 @@ def _get_free_device_path(instance):
 def _mount_volume(instance, device_path, mount_point):
     with instance.remote as r:
         try:
-            r.execute_command('sudo mkdir -p %s' % mount_point)
-            r.execute_command('sudo mkfs.ext4 %s' % device_path)
-            r.execute_command('sudo mount %s %s' % (device_path, mount_point))
+            r.execute_commands(['sudo mkdir -p %s' % mount_point,
+                                'sudo mkfs.ext4 %s' % device_path,
+                                'sudo mount %s %s' % (device_path,
+                                                      mount_point)])
         except Exception:
             LOG.error("Error mounting volume to instance %s" %
                       instance.instance_id)
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+
 from savanna.conductor import manager
 from savanna import context
 import savanna.tests.unit.conductor.base as test_base
@@ -100,6 +102,7 @@ class ClusterTest(test_base.ConductorManagerTestCase):
             self.assertEqual(ng.pop("instances"), [])
             ng.pop("node_configs")
             ng.pop("node_group_template_id")
+            ng.pop("min_count")
             ng.pop("volume_mount_prefix")
             ng.pop("volumes_size")
             ng.pop("volumes_per_node")
@@ -107,6 +110,21 @@ class ClusterTest(test_base.ConductorManagerTestCase):
         self.assertListEqual(SAMPLE_CLUSTER["node_groups"],
                              cl_db_obj["node_groups"])
 
+    def test_cluster_create_keeps_values_intact(self):
+        ctx = context.ctx()
+        values = copy.deepcopy(SAMPLE_CLUSTER)
+        cl_db_obj = self.api.cluster_create(ctx, values)
+
+        self.assertEqual(SAMPLE_CLUSTER, values)
+        for ng in cl_db_obj["node_groups"]:
+            self.assertEqual(ng["node_configs"], {})
+
+        cl_db_obj["node_groups"][0]["node_configs"]["a"] = "b"
+        cl_db_obj["anti_affinity"].append("p1")
+        self.assertEqual(cl_db_obj["node_groups"][1]["node_configs"], {})
+        self.assertEqual(manager.NODE_GROUP_DEFAULTS["node_configs"], {})
+        self.assertEqual(manager.CLUSTER_DEFAULTS["anti_affinity"], [])
+
     def test_cluster_update_status(self):
         ctx = context.ctx()
         cluster_db_obj = self.api.cluster_create(ctx, SAMPLE_CLUSTER)
@@ -119,6 +137,23 @@ class ClusterTest(test_base.ConductorManagerTestCase):
         get_cl_obj = self.api.cluster_get(ctx, _id)
         self.assertEqual(updated_cl, get_cl_obj)
 
+    def test_cluster_update_status_only(self):
+        ctx = context.ctx()
+        cluster_db_obj = self.api.cluster_create(ctx, SAMPLE_CLUSTER)
+        _id = cluster_db_obj["id"]
+        self.assertEqual(cluster_db_obj, self.api.cluster_get(ctx, _id))
+
+        self.assertIsNone(self.api.cluster_update_status(ctx, _id, "Active"))
+        get_cl_obj = self.api.cluster_get(ctx, _id)
+        self.assertEqual(get_cl_obj["status"], "Active")
+        self.assertEqual(get_cl_obj["status_description"], "")
+
+        self.api.cluster_update_status(ctx, _id, "Error", "failed")
+        get_cl_obj = self.api.cluster_get(ctx, _id)
+        self.assertEqual(get_cl_obj["status"], "Error")
+        self.assertEqual(get_cl_obj["status_description"], "failed")
+        self.assertEqual(len(get_cl_obj["node_groups"]), 2)
+
     def _ng_in_cluster(self, cluster_db_obj, ng_id):
         for ng in cluster_db_obj["node_groups"]:
             if ng["id"] == ng_id:
@@ -254,3 +289,120 @@ class ClusterTest(test_base.ConductorManagerTestCase):
 
         with self.assertRaises(RuntimeError):
             self.api.instance_remove(ctx, instance_id)
+
+    def test_bulk_instance_ops(self):
+        ctx = context.ctx()
+        cluster_db_obj = self.api.cluster_create(ctx, SAMPLE_CLUSTER)
+        _id = cluster_db_obj["id"]
+        ng_id = cluster_db_obj["node_groups"][-1]["id"]
+        count = cluster_db_obj["node_groups"][-1]["count"]
+
+        instance_ids = self.api.instance_add_many(
+            ctx, ng_id, [{"instance_name": "vm_%d" % i} for i in xrange(3)])
+        self.assertEqual(len(set(instance_ids)), 3)
+
+        self.api.instance_update_many(
+            ctx, [(instance_ids[0], {"management_ip": "1.1.1.1"}),
+                  (instance_ids[1], {"management_ip": "2.2.2.2",
+                                     "internal_ip": "3.3.3.3"})])
+
+        ng = self._ng_in_cluster(self.api.cluster_get(ctx, _id), ng_id)
+        self.assertEqual(count + 3, ng["count"])
+        instances = [dict((i["id"], i) for i in ng["instances"])[inst_id]
+                     for inst_id in instance_ids]
+        self.assertEqual("1.1.1.1", instances[0]["management_ip"])
+        self.assertEqual("3.3.3.3", instances[1]["internal_ip"])
+        self.assertEqual([], instances[2]["volumes"])
+
+        with self.assertRaises(RuntimeError):
+            self.api.instance_add_many(ctx, "missing_id",
+                                       [{"instance_name": "vm"}])
+
+        with self.assertRaises(RuntimeError):
+            self.api.instance_update_many(
+                ctx, [(instance_ids[0], {"management_ip": "4.4.4.4"}),
+                      ("missing_id", {"management_ip": "5.5.5.5"})])
+        ng = self._ng_in_cluster(self.api.cluster_get(ctx, _id), ng_id)
+        self.assertIn("1.1.1.1", [i["management_ip"]
+                                  for i in ng["instances"]])
+
+        self.api.instance_remove_many(ctx, instance_ids[:2])
+        ng = self._ng_in_cluster(self.api.cluster_get(ctx, _id), ng_id)
+        self.assertEqual(count + 1, ng["count"])
+        self.assertEqual([instance_ids[2]], [i["id"] for i in ng["instances"]])
+
+        with self.assertRaises(RuntimeError):
+            self.api.instance_remove_many(ctx, instance_ids)
+
+    def test_bulk_node_group_ops(self):
+        ctx = context.ctx()
+        cluster_db_obj = self.api.cluster_create(ctx, SAMPLE_CLUSTER)
+        _id = cluster_db_obj["id"]
+
+        ng_ids = self.api.node_group_add_many(
+            ctx, _id, [{"name": "ng_%d" % idx, "flavor_id": "42",
+                        "count": 0} for idx in xrange(3, 5)])
+        self.api.node_group_update_many(
+            ctx, [(ng_id, {"image_id": "test_image"}) for ng_id in ng_ids])
+        self.api.instance_add(ctx, ng_ids[0], {"instance_name": "vm"})
+
+        cluster_db_obj = self.api.cluster_get(ctx, _id)
+        self.assertEqual(len(cluster_db_obj["node_groups"]), 4)
+        for ng_id in ng_ids:
+            ng = self._ng_in_cluster(cluster_db_obj, ng_id)
+            self.assertEqual("test_image", ng["image_id"])
+            self.assertEqual({}, ng["node_configs"])
+
+        with self.assertRaises(RuntimeError):
+            self.api.node_group_update_many(
+                ctx, [("missing_id", {"image_id": "test_image"})])
+
+        self.api.node_group_remove_many(ctx, ng_ids)
+        cluster_db_obj = self.api.cluster_get(ctx, _id)
+        self.assertEqual(len(cluster_db_obj["node_groups"]), 2)
+
+        with self.assertRaises(RuntimeError):
+            self.api.node_group_remove_many(ctx, ng_ids)
+
+    def test_cluster_projections(self):
+        ctx = context.ctx()
+        cluster_db_obj = self.api.cluster_create(ctx, SAMPLE_CLUSTER)
+        _id = cluster_db_obj["id"]
+        self.api.cluster_update_status(ctx, _id, "Active", "Ready")
+
+        status = self.api.cluster_get_status(ctx, _id)
+        self.assertEqual({"id": _id, "status": "Active",
+                          "status_description": "Ready"}, status)
+
+        summary = self.api.cluster_get_summary(ctx, _id)
+        self.assertEqual("test_cluster", summary["name"])
+        self.assertEqual("Active", summary["status"])
+        for field in ("private_key", "cluster_configs", "info", "drift"):
+            self.assertNotIn(field, summary)
+        self.assertEqual(
+            sorted([("ng_1", 1), ("ng_2", 3)]),
+            sorted((ng["name"], ng["count"]) for ng in summary["node_groups"]))
+        for ng in summary["node_groups"]:
+            self.assertNotIn("instances", ng)
+
+        self.api.cluster_destroy(ctx, _id)
+        self.assertIsNone(self.api.cluster_get_status(ctx, _id))
+        self.assertIsNone(self.api.cluster_get_summary(ctx, _id))
+
+    def test_instance_projections(self):
+        ctx = context.ctx()
+        cluster_db_obj = self.api.cluster_create(ctx, SAMPLE_CLUSTER)
+        ng_id = cluster_db_obj["node_groups"][-1]["id"]
+
+        instance_ids = self.api.instance_add_many(
+            ctx, ng_id, [{"instance_name": "vm_%d" % i} for i in (2, 0, 1)])
+
+        instances = self.api.node_group_get_instances(ctx, ng_id)
+        self.assertEqual(["vm_0", "vm_1", "vm_2"],
+                         [i["instance_name"] for i in instances])
+
+        ids = [instance_ids[1], "missing", instance_ids[0]]
+        instances = self.api.instance_get_by_ids(ctx, ids)
+        self.assertEqual([instance_ids[1], instance_ids[0]],
+                         [i["id"] for i in instances])
+        self.assertEqual([], self.api.instance_get_by_ids(ctx, []))
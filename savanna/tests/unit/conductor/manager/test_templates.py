@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
+
 from savanna.conductor import manager
 from savanna import context
 import savanna.tests.unit.conductor.base as test_base
@@ -126,10 +128,20 @@ class ClusterTemplates(test_base.ConductorManagerTestCase):
                 lambda: SAMPLE_CLT,
                 lambda: SAMPLE_NGT,
                 lambda: manager.CLUSTER_DEFAULTS,
+                lambda: manager.CLUSTER_TEMPLATE_DEFAULTS,
                 lambda: manager.NODE_GROUP_DEFAULTS,
                 lambda: manager.INSTANCE_DEFAULTS,
             ], *args, **kwargs)
 
+    def test_clt_defaults_have_no_drift(self):
+        ctx = context.ctx()
+        with mock.patch.object(self.api.db, 'cluster_template_create') as c:
+            self.api.cluster_template_create(ctx, SAMPLE_CLT)
+
+        values = c.call_args[0][1]
+        self.assertEqual(values['anti_affinity'], [])
+        self.assertNotIn('drift', values)
+
     def test_minimal_clt_create_list_delete(self):
         ctx = context.ctx()
         self.api.cluster_template_create(ctx, SAMPLE_CLT)
@@ -171,6 +183,7 @@ class ClusterTemplates(test_base.ConductorManagerTestCase):
             ng.pop("image_id")
             ng.pop("node_configs")
             ng.pop("node_group_template_id")
+            ng.pop("min_count")
             ng.pop("volume_mount_prefix")
             ng.pop("volumes_size")
             ng.pop("volumes_per_node")
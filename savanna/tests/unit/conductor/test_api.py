@@ -13,6 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
+from oslo.config import cfg
+
+from savanna.conductor import api as conductor_api
 from savanna import context
 from savanna.tests.unit.conductor import base
 
@@ -116,3 +120,76 @@ class TestConductorClusterApi(base.ConductorApiTestCase):
 
         ng = self._get_by_id(cluster.node_groups, ng_id)
         self.assertEqual(ng.instances[0].instance_name, 'tst123')
+
+
+class TestConductorApiCache(base.ConductorApiTestCase):
+    def setUp(self):
+        super(TestConductorApiCache, self).setUp()
+        cfg.CONF.set_override('cache_size', 2, 'conductor')
+        conductor_api._CACHE.invalidate()
+
+    def tearDown(self):
+        cfg.CONF.clear_override('cache_size', 'conductor')
+        conductor_api._CACHE.invalidate()
+        super(TestConductorApiCache, self).tearDown()
+
+    def _make_cluster(self, name='test_cluster'):
+        return self.api.cluster_create(context.ctx(),
+                                       dict(SAMPLE_CLUSTER, name=name))
+
+    def test_repeated_reads_are_cached(self):
+        ctx = context.ctx()
+        cluster = self._make_cluster()
+
+        first = self.api.cluster_get(ctx, cluster.id)
+        with mock.patch.object(self.api._manager, 'cluster_get') as get:
+            self.assertIs(first, self.api.cluster_get(ctx, cluster))
+            self.assertFalse(get.called)
+
+    def test_writes_invalidate_cache(self):
+        ctx = context.ctx()
+        cluster = self._make_cluster()
+        ng_id = cluster.node_groups[0].id
+
+        self.api.cluster_get(ctx, cluster.id)
+        self.api.cluster_update_status(ctx, cluster, 'Active')
+        self.assertEqual('Active', self.api.cluster_get(ctx, cluster).status)
+
+        inst_id = self.api.instance_add(ctx, ng_id, SAMPLE_INSTANCE)
+        cluster = self.api.cluster_get(ctx, cluster.id)
+        for ng in cluster.node_groups:
+            if ng.id == ng_id:
+                self.assertEqual(inst_id, ng.instances[0].id)
+
+        self.api.cluster_destroy(ctx, cluster)
+        self.assertIsNone(self.api.cluster_get(ctx, cluster.id))
+
+    def test_other_tenant_is_not_served(self):
+        cluster = self._make_cluster()
+        self.api.cluster_get(context.ctx(), cluster.id)
+
+        self.set_tenant('tenant_2')
+        with mock.patch.object(self.api._manager, 'cluster_get') as get:
+            get.return_value = None
+            self.assertIsNone(self.api.cluster_get(context.ctx(), cluster.id))
+            self.assertEqual(1, get.call_count)
+
+    def test_cache_size_is_bounded(self):
+        ctx = context.ctx()
+        clusters = [self._make_cluster('cluster-%d' % idx)
+                    for idx in xrange(3)]
+        for cluster in clusters:
+            self.api.cluster_get(ctx, cluster.id)
+
+        self.assertEqual(2, len(conductor_api._CACHE))
+        with mock.patch.object(self.api._manager, 'cluster_get') as get:
+            get.return_value = None
+            self.assertIsNone(self.api.cluster_get(ctx, clusters[0].id))
+            self.assertIsNotNone(self.api.cluster_get(ctx, clusters[2].id))
+            self.assertEqual(1, get.call_count)
+
+    def test_cache_is_disabled_by_default(self):
+        cfg.CONF.clear_override('cache_size', 'conductor')
+        cluster = self._make_cluster()
+        self.api.cluster_get(context.ctx(), cluster.id)
+        self.assertEqual(0, len(conductor_api._CACHE))
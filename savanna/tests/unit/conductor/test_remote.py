@@ -0,0 +1,137 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+from oslo.config import cfg
+
+from savanna.conductor import api as conductor_api
+from savanna.conductor import manager
+from savanna import context
+from savanna.openstack.common import rpc
+from savanna.openstack.common.rpc import dispatcher
+from savanna.tests.unit import base
+from savanna.tests.unit.conductor import test_api
+
+
+class TestRemoteConductorApi(base.DbTestCase):
+    def setUp(self):
+        super(TestRemoteConductorApi, self).setUp()
+        cfg.CONF.set_override('rpc_backend',
+                              'savanna.openstack.common.rpc.impl_fake')
+
+        self.conn = rpc.create_connection(new=True)
+        self.conn.create_consumer(
+            cfg.CONF.conductor.topic,
+            dispatcher.RpcDispatcher([manager.ConductorManager()]))
+
+        self.api = conductor_api.RemoteApi()
+        self.rpc_call = mock.patch.object(self.api._manager._rpcapi, 'call',
+                                          wraps=self.api._manager._rpcapi.call)
+        self.rpc_call.start()
+
+    def tearDown(self):
+        self.rpc_call.stop()
+        self.conn.close()
+        cfg.CONF.clear_override('rpc_backend')
+        super(TestRemoteConductorApi, self).tearDown()
+
+    def _round_trips(self):
+        return self.api._manager._rpcapi.call.call_count
+
+    def test_cluster_ops(self):
+        ctx = context.ctx()
+        cluster = self.api.cluster_create(ctx, test_api.SAMPLE_CLUSTER)
+        self.assertEqual('test_cluster', cluster.name)
+        self.assertEqual(2, len(cluster.node_groups))
+
+        self.api.cluster_update_status(ctx, cluster, 'Active')
+        self.assertEqual('Active', self.api.cluster_get(ctx, cluster).status)
+
+        self.api.cluster_destroy(ctx, cluster)
+        self.assertIsNone(self.api.cluster_get(ctx, cluster.id))
+        self.assertEqual(5, self._round_trips())
+
+    def test_batch(self):
+        ctx = context.ctx()
+        cluster = self.api.cluster_create(ctx, test_api.SAMPLE_CLUSTER)
+        ng_id = cluster.node_groups[0].id
+
+        with self.api.batch(ctx):
+            inst_ids = [self.api.instance_add(ctx, ng_id,
+                                              {'instance_id': str(idx),
+                                               'instance_name': str(idx)})
+                        for idx in xrange(2)]
+            for inst_id in inst_ids:
+                self.api.instance_update(ctx, inst_id, {'internal_ip': '1'})
+            self.api.cluster_update_status(ctx, cluster, 'Active')
+            self.assertEqual(3, self._round_trips())
+
+            cluster = self.api.cluster_get(ctx, cluster.id)
+            self.assertEqual(4, self._round_trips())
+            self.assertEqual('Active', cluster.status)
+
+            self.api.instance_remove(ctx, inst_ids[0])
+            self.api.instance_remove(ctx, inst_ids[1])
+            self.assertEqual(4, self._round_trips())
+
+        self.assertEqual(5, self._round_trips())
+        cluster = self.api.cluster_get(ctx, cluster.id)
+        self.assertEqual([], cluster.node_groups[0].instances)
+
+    def test_queued_calls_are_sent_at_once(self):
+        ctx = context.ctx()
+        cluster = self.api.cluster_create(ctx, test_api.SAMPLE_CLUSTER)
+        ng_id = cluster.node_groups[0].id
+        inst_ids = self.api.instance_add_many(
+            ctx, ng_id, [{'instance_name': str(idx)} for idx in xrange(5)])
+        round_trips = self._round_trips()
+
+        with self.api.batch(ctx):
+            for inst_id in inst_ids[:3]:
+                self.api.instance_update(ctx, inst_id, {'internal_ip': '1'})
+            for inst_id in inst_ids[3:]:
+                self.api.instance_remove(ctx, inst_id)
+            cluster = self.api.cluster_get(ctx, cluster.id)
+
+        self.assertEqual(round_trips + 1, self._round_trips())
+        ng = [ng for ng in cluster.node_groups if ng.id == ng_id][0]
+        self.assertEqual(['1'] * 3, [i.internal_ip for i in ng.instances])
+
+    def test_batch_is_flushed_on_error(self):
+        ctx = context.ctx()
+        cluster = self.api.cluster_create(ctx, test_api.SAMPLE_CLUSTER)
+
+        with self.assertRaises(ValueError):
+            with self.api.batch(ctx):
+                self.api.cluster_update_status(ctx, cluster, 'Error')
+                raise ValueError()
+
+        self.assertEqual('Error', self.api.cluster_get(ctx, cluster).status)
+
+    def test_credentials_are_not_sent(self):
+        ctx = context.Context('user', 'tenant', 'token',
+                              {'X-Auth-Token': 'token',
+                               'X-Service-Catalog': '[]'})
+        self.api.cluster_get_all(ctx)
+
+        rpc_ctx = self.api._manager._rpcapi.call.call_args[0][0]
+        self.assertEqual({'user_id': 'user', 'tenant_id': 'tenant'},
+                         rpc_ctx.to_dict())
+
+    def test_private_methods_are_not_called(self):
+        with self.assertRaises(AttributeError):
+            self.api._manager._rpcapi.call_batch(context.ctx(),
+                                                 [('_populate_node_group',
+                                                   [{}])])
@@ -76,6 +76,48 @@ class TestResource(unittest2.TestCase):
         with self.assertRaises(types.FrozenClassError):
             res.second.a = 123
 
+    def test_lazy_wrapping(self):
+        cluster_dict = copy.deepcopy(SAMPLE_CLUSTER_DICT)
+        cluster = r.ClusterResource(cluster_dict)
+
+        self.assertIsInstance(dict.__getitem__(cluster, 'node_groups'), list)
+        self.assertNotIsInstance(dict.__getitem__(cluster, 'node_groups'),
+                                 types.FrozenList)
+
+        node_groups = cluster.node_groups
+        self.assertIsInstance(node_groups, types.FrozenList)
+        self.assertIs(cluster.node_groups, node_groups)
+        self.assertIs(cluster['node_groups'], node_groups)
+        self.assertIs(cluster.get('node_groups'), node_groups)
+        self.assertIs(dict(cluster.items())['node_groups'], node_groups)
+
+        instance = node_groups[1].instances[0]
+        self.assertIs(instance.node_group, node_groups[1])
+        self.assertIs(instance.node_group.cluster, cluster)
+
+        # source dict isn't modified
+        self.assertEqual(cluster_dict, SAMPLE_CLUSTER_DICT)
+
+    def test_wrapped_values(self):
+        res = r.Resource(SAMPLE_DICT)
+
+        self.assertIsInstance(res.get('second'), r.Resource)
+        self.assertIsNone(res.get('third'))
+        self.assertTrue(all(isinstance(value, (r.Resource, types.FrozenList))
+                            for value in res.values()))
+        self.assertIsInstance(res.copy()['first'], types.FrozenList)
+
+        with self.assertRaises(TypeError):
+            r.Resource({'a': object()})
+
+    def test_compact_representation(self):
+        cluster = r.ClusterResource(SAMPLE_CLUSTER_DICT)
+        instance = cluster.node_groups[1].instances[0]
+
+        for res in [cluster, cluster.node_groups, cluster.node_groups[1],
+                    instance, cluster.cluster_configs]:
+            self.assertFalse(hasattr(res, '__dict__'))
+
     def test_nested_lists(self):
         res = r.Resource(SAMPLE_NESTED_LISTS_DICT)
         self.assertEqual(res.a[0][0].b, 123)
@@ -114,3 +156,50 @@ class TestResource(unittest2.TestCase):
         wrapped_dict = cluster.to_wrapped_dict()
         self.assertEqual(len(wrapped_dict), 1)
         self.assertEqual(wrapped_dict['cluster'], SAMPLE_CLUSTER_DICT)
+
+    def test_to_dict_doesnt_wrap_children(self):
+        cluster_dict = copy.deepcopy(SAMPLE_CLUSTER_DICT)
+        cluster_dict['private_key'] = 'abacaba'
+        cluster_dict['node_groups'][1]['id'] = 'some_id'
+        cluster_dict['node_groups'][1]['instances'][0]['node_group_id'] = 'id'
+        cluster = r.ClusterResource(cluster_dict)
+
+        dct = cluster.to_dict()
+        self.assertEqual(dct, SAMPLE_CLUSTER_DICT)
+        self.assertNotIsInstance(dict.__getitem__(cluster, 'node_groups'),
+                                 types.FrozenList)
+
+        # source dicts aren't shared with the result
+        self.assertIsNot(dct['node_groups'][1],
+                         cluster_dict['node_groups'][1])
+
+        # partially wrapped resource gives the same result
+        self.assertEqual(cluster.node_groups[1].instances[0].ip, '1.1.1.1')
+        self.assertEqual(cluster.to_dict(), SAMPLE_CLUSTER_DICT)
+
+    def test_memoized_properties(self):
+        cluster_dict = copy.deepcopy(SAMPLE_CLUSTER_DICT)
+        cluster_dict['node_groups'][1].update({'volumes_per_node': 2,
+                                               'volume_mount_prefix': '/v'})
+        cluster_dict['node_groups'][1]['instances'][0]['instance_name'] = 'i1'
+        cluster = r.ClusterResource(cluster_dict)
+        ng = cluster.node_groups[1]
+
+        self.assertEqual(ng.configuration,
+                         SAMPLE_CLUSTER_DICT['cluster_configs'])
+        self.assertIs(ng.configuration, ng.configuration)
+        self.assertEqual(ng.storage_paths, ['/v1', '/v2'])
+        self.assertIs(ng.storage_paths, ng.storage_paths)
+
+        instance = ng.instances[0]
+        self.assertTrue(instance.fqdn.startswith('i1.'))
+        self.assertIs(instance.fqdn, instance.fqdn)
+
+        with self.assertRaises(types.FrozenClassError):
+            ng.storage_paths.append('/v3')
+        with self.assertRaises(types.FrozenClassError):
+            ng.configuration['general']['some_overridden_config'] = 'new'
+
+        # memoized values aren't a part of the resource
+        self.assertNotIn('configuration', ng)
+        self.assertFalse(hasattr(ng, '__dict__'))
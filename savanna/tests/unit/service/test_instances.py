@@ -13,12 +13,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
+
 import mock
+from novaclient import exceptions as nova_exceptions
 
 from savanna import conductor as cond
 from savanna.conductor import resource as r
 from savanna import context
+from savanna import exceptions
 from savanna.service import instances
+from savanna.service import networks
 from savanna.tests.unit import base as models_test_base
 import savanna.utils.crypto as c
 
@@ -158,18 +163,330 @@ class NodePlacementTest(models_test_base.DbTestCase):
         self.assertEqual(inst_number, 3)
 
 
-def _make_ng_dict(name, flavor, processes, count):
-    return {'name': name, 'flavor_id': flavor, 'node_processes': processes,
-            'count': count}
+class InstanceBootFailuresTest(models_test_base.DbTestCase):
+    def setUp(self):
+        r.Resource._is_passthrough_type = _resource_passthrough
+        super(InstanceBootFailuresTest, self).setUp()
+
+    @mock.patch('savanna.context.sleep')
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_transient_errors_are_retried(self, novaclient, p_sleep):
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 1)],
+            [])
+        nova = _create_nova_mock(novaclient)
+        nova.servers.create.side_effect = [
+            nova_exceptions.ClientException(500),
+            nova_exceptions.ConnectionRefused(),
+            _mock_instance('1')]
+        nova.servers.list.return_value = []
+
+        instances._create_instances(cluster)
+
+        self.assertEqual(nova.servers.create.call_count, 3)
+        self.assertEqual(p_sleep.call_count, 2)
+        # server could be created despite the server error
+        self.assertEqual(nova.servers.list.call_count, 1)
+        cluster_obj = conductor.cluster_get_all(context.ctx())[0]
+        self.assertEqual(
+            cluster_obj.node_groups[0].instances[0].instance_id, '1')
+
+    @mock.patch('savanna.context.sleep')
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_throttling_is_retried_by_limiter_only(self, novaclient,
+                                                   p_sleep):
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 1)],
+            [])
+        nova = _create_nova_mock(novaclient)
+        nova.servers.create.side_effect = [
+            nova_exceptions.OverLimit(413), _mock_instance('1')]
+
+        self.assertRaises(nova_exceptions.OverLimit,
+                          instances._create_instances, cluster)
+        self.assertEqual(nova.servers.create.call_count, 1)
+
+        # throttling errors are retried if the limiter is disabled
+        instances.CONF.set_override('os_api_max_concurrency', 0)
+        self.addCleanup(instances.CONF.clear_override,
+                        'os_api_max_concurrency')
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 1)],
+            [], name='test_cluster_2')
+        nova.servers.create.side_effect = [
+            nova_exceptions.OverLimit(413), _mock_instance('1')]
+
+        instances._create_instances(cluster)
+        self.assertEqual(nova.servers.create.call_count, 3)
+
+    @mock.patch('savanna.context.sleep')
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_server_created_despite_error(self, novaclient, p_sleep):
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 1)],
+            [])
+        nova = _create_nova_mock(novaclient)
+        nova.servers.create.side_effect = [
+            nova_exceptions.ClientException(503), _mock_instance('2')]
+        server = _mock_instance('1')
+        server.name = 'test_cluster-test_group-001'
+        other = _mock_instance('3')
+        other.name = 'test_cluster-test_group-0010'
+        nova.servers.list.return_value = [other, server]
+
+        instances._create_instances(cluster)
+
+        self.assertEqual(nova.servers.create.call_count, 1)
+        cluster_obj = conductor.cluster_get_all(context.ctx())[0]
+        self.assertEqual(
+            cluster_obj.node_groups[0].instances[0].instance_id, '1')
+
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_node_group_min_count(self, novaclient):
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 3,
+                           min_count=2)], [])
+        nova = _create_nova_mock(novaclient)
+        nova.servers.create.side_effect = [
+            _mock_instance('1'), nova_exceptions.BadRequest(400),
+            _mock_instance('3')]
+
+        instances._create_instances(cluster)
+
+        cluster_obj = conductor.cluster_get_all(context.ctx())[0]
+        self.assertEqual(cluster_obj.node_groups[0].count, 2)
+
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 3,
+                           min_count=2)], [], name='test_cluster_2')
+        nova.servers.create.side_effect = [
+            nova_exceptions.BadRequest(400), nova_exceptions.BadRequest(400)]
+        self.assertRaises(nova_exceptions.BadRequest,
+                          instances._create_instances, cluster)
+
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_boot_error_is_not_masked(self, novaclient):
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 2)],
+            [])
+        nova = _create_nova_mock(novaclient)
+        nova.servers.create.side_effect = [
+            _mock_instance('1'), nova_exceptions.BadRequest(400)]
+
+        with mock.patch.object(instances.conductor, 'instance_add_many',
+                               side_effect=RuntimeError) as add_many:
+            self.assertRaises(nova_exceptions.BadRequest,
+                              instances._create_instances, cluster)
+
+        self.assertEqual(add_many.call_count, 1)
+
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_error_instance_is_replaced(self, novaclient):
+        ctx = context.ctx()
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 2,
+                           min_count=1)], [])
+        nova = _create_nova_mock(novaclient)
+        instances._create_instances(cluster)
+        nova.servers.get.return_value = mock.Mock(status='ERROR')
+
+        cluster = conductor.cluster_get(ctx, cluster)
+        instance = cluster.node_groups[0].instances[0]
+        replaced = {}
+        self.assertFalse(
+            instances._check_if_up(instance, replaced, [], set()))
+
+        nova.servers.delete.assert_called_once_with('1')
+        self.assertEqual(nova.servers.create.call_count, 3)
+        self.assertEqual(replaced, {instance.id: 1})
+        cluster = conductor.cluster_get(ctx, cluster)
+        self.assertEqual(
+            cluster.node_groups[0].instances[0].instance_id, '3')
+
+        # instance is removed when retries are exhausted
+        replaced[instance.id] = 3
+        self.assertFalse(
+            instances._check_if_up(instance, replaced, [], set()))
+        cluster = conductor.cluster_get(ctx, cluster)
+        self.assertEqual(cluster.node_groups[0].count, 1)
+
+        # but node group can't be smaller than min_count
+        instance = cluster.node_groups[0].instances[0]
+        replaced[instance.id] = 3
+        self.assertRaises(RuntimeError, instances._check_if_up, instance,
+                          replaced, [], set())
+
+    @mock.patch('savanna.service.instances._configure_instances')
+    @mock.patch('savanna.service.instances._check_if_accessible')
+    @mock.patch('savanna.service.networks.get_instance_ips')
+    @mock.patch('savanna.service.volumes.attach_to_instances')
+    @mock.patch('savanna.context.sleep')
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_scaling_drops_error_instance(self, novaclient, p_sleep, attach,
+                                          get_ips, accessible, configure):
+        instances.CONF.set_override('instance_boot_retries', 0)
+        self.addCleanup(instances.CONF.clear_override,
+                        'instance_boot_retries')
+        ctx = context.ctx()
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 1,
+                           min_count=1)], [])
+        nova = _create_nova_mock(novaclient)
+        instances._create_instances(cluster)
+
+        nova.servers.get.side_effect = lambda id: mock.Mock(
+            status='ERROR' if id == '2' else 'ACTIVE', networks=['net'])
+        get_ips.return_value = {'internal_ip': '10.0.0.1',
+                                'management_ip': '172.16.0.1'}
+        accessible.return_value = True
+
+        cluster = conductor.cluster_get(ctx, cluster)
+        ng_id = cluster.node_groups[0].id
+        instances_ids = instances.scale_cluster(cluster, {ng_id: 3},
+                                                mock.Mock())
+
+        nova.servers.delete.assert_called_once_with('2')
+        cluster = conductor.cluster_get(ctx, cluster)
+        self.assertEqual(cluster.node_groups[0].count, 2)
+        self.assertEqual(
+            [i.instance_id for i in instances.get_instances(cluster,
+                                                            instances_ids)],
+            ['3'])
+        self.assertEqual(
+            [i.instance_id for i in attach.call_args[0][0]], ['3'])
+        # gateway isn't chosen unless use_gateway is set
+        self.assertIsNone(cluster.gateway_id)
+
+    @mock.patch('savanna.service.instances.time')
+    @mock.patch('savanna.utils.remote.InstanceInteropHelper.execute_command',
+                autospec=True)
+    @mock.patch('savanna.context.sleep')
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_await_timeout(self, novaclient, p_sleep, execute, p_time):
+        instances.CONF.set_override('instance_await_timeout', 10)
+        self.addCleanup(instances.CONF.clear_override,
+                        'instance_await_timeout')
+        ctx = context.ctx()
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 2)],
+            [])
+        _create_nova_mock(novaclient)
+        instances._create_instances(cluster)
+        cluster = conductor.cluster_get(ctx, cluster)
+        conductor.instance_update_many(
+            ctx, [(instance, {'internal_ip': '10.0.0.1',
+                              'management_ip': '172.16.0.1'})
+                  for instance in cluster.node_groups[0].instances])
+
+        def execute_command(helper, cmd, raise_when_error=True):
+            if helper.instance.instance_name.endswith('002'):
+                raise exceptions.RemoteHostUnavailableException('host', 3)
+            return 0, ''
+
+        execute.side_effect = execute_command
+        p_time.time.side_effect = itertools.count(0, 6)
+
+        with self.assertRaises(
+                exceptions.InstancesAwaitTimeoutException) as cm:
+            instances._await_instances(conductor.cluster_get(ctx, cluster))
+
+        self.assertEqual(cm.exception.instance_names,
+                         ['test_cluster-test_group-002'])
+        self.assertEqual(p_sleep.call_count, 1)
+
+
+class GatewayTest(models_test_base.DbTestCase):
+    def setUp(self):
+        r.Resource._is_passthrough_type = _resource_passthrough
+        super(GatewayTest, self).setUp()
+        is_public_p = mock.patch('savanna.service.networks.is_public')
+        self.is_public = is_public_p.start()
+        self.addCleanup(is_public_p.stop)
+        self.is_public.return_value = False
+
+    def tearDown(self):
+        instances.CONF.clear_override('use_gateway')
+        super(GatewayTest, self).tearDown()
+
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_choose_gateway(self, novaclient):
+        ctx = context.ctx()
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('test_group', 'test_flavor', ['data node'], 2)],
+            [])
+        _create_nova_mock(novaclient)
+        instances._create_instances(cluster)
+
+        cluster = instances._choose_gateway(conductor.cluster_get(ctx,
+                                                                  cluster))
+        gateway = cluster.gateway
+        self.assertEqual(gateway.instance_name, 'test_cluster-test_group-001')
+
+        # gateway isn't changed when instances are added
+        conductor.instance_add(ctx, cluster.node_groups[0],
+                               {'instance_name': 'test_cluster-a-001'})
+        cluster = instances._choose_gateway(conductor.cluster_get(ctx,
+                                                                  cluster))
+        self.assertEqual(cluster.gateway.id, gateway.id)
+
+        # but it is chosen again when the gateway is removed
+        conductor.instance_remove(ctx, gateway)
+        cluster = instances._choose_gateway(conductor.cluster_get(ctx,
+                                                                  cluster))
+        self.assertEqual(cluster.gateway.instance_name, 'test_cluster-a-001')
+
+    @mock.patch('savanna.utils.openstack.nova.client')
+    def test_public_node_is_preferred_as_gateway(self, novaclient):
+        cluster = _create_cluster_mock(
+            [_make_ng_dict('a_group', 'test_flavor', ['data node'], 1),
+             _make_ng_dict('b_group', 'test_flavor', ['namenode'], 1)],
+            [])
+        self.is_public.side_effect = (
+            lambda node_group: 'namenode' in node_group.node_processes)
+        _create_nova_mock(novaclient)
+        instances._create_instances(cluster)
+
+        cluster = instances._choose_gateway(
+            conductor.cluster_get(context.ctx(), cluster))
+        self.assertEqual(cluster.gateway.instance_name,
+                         'test_cluster-b_group-001')
+
+    def test_required_ips(self):
+        instances.CONF.set_override('use_gateway', True)
+        cluster = r.ClusterResource(
+            {'gateway_id': '1',
+             'node_groups': [{'instances': [{'id': '1'}, {'id': '2'}]}]})
+        gateway, instance = cluster.node_groups[0].instances
+        ips = {'internal_ip': '10.0.0.1', 'management_ip': None}
+
+        self.assertFalse(networks.has_required_ips(gateway, ips))
+        self.assertTrue(networks.has_required_ips(instance, ips))
+        self.assertFalse(networks.has_required_ips(
+            instance, {'internal_ip': None, 'management_ip': None}))
+
+        # nodes accessed directly need management ip
+        self.is_public.return_value = True
+        self.assertFalse(networks.has_required_ips(instance, ips))
+        self.is_public.return_value = False
+
+        instances.CONF.set_override('use_gateway', False)
+        self.assertFalse(networks.has_required_ips(instance, ips))
+
+
+def _make_ng_dict(name, flavor, processes, count, **kwargs):
+    ng = {'name': name, 'flavor_id': flavor, 'node_processes': processes,
+          'count': count}
+    ng.update(kwargs)
+    return ng
 
 
-def _create_cluster_mock(node_groups, aa):
+def _create_cluster_mock(node_groups, aa, name='test_cluster'):
 
     user_kp = mock.Mock()
     user_kp.public_key = "123"
     private_key = c.generate_private_key()
 
-    dct = {'name': 'test_cluster',
+    dct = {'name': name,
            'plugin_name': 'mock_plugin',
            'hadoop_version': 'mock_version',
            'default_image_id': 'initial',
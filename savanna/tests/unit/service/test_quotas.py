@@ -0,0 +1,131 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+from oslo.config import cfg
+import unittest2
+
+from savanna import exceptions as ex
+from savanna.service import quotas
+from savanna.utils.openstack import nova
+
+
+CONF = cfg.CONF
+
+
+def _make_ng(id, count, flavor_id='1', volumes_per_node=0, volumes_size=0):
+    return mock.Mock(id=id, count=count, flavor_id=flavor_id,
+                     volumes_per_node=volumes_per_node,
+                     volumes_size=volumes_size)
+
+
+def _make_cluster(*node_groups):
+    return mock.Mock(node_groups=list(node_groups))
+
+
+class QuotasTest(unittest2.TestCase):
+    def setUp(self):
+        profile_p = mock.patch('savanna.utils.openstack.nova.'
+                               'get_flavor_profile')
+        profile_p.start().side_effect = lambda flavor_id: {
+            '1': nova.HardwareProfile('1', 'small', 1, 2048, 20, 0, 0),
+            '2': nova.HardwareProfile('2', 'large', 4, 8192, 80, 0, 0)
+        }.get(flavor_id)
+        self.addCleanup(profile_p.stop)
+
+        nova_limits_p = mock.patch('savanna.utils.openstack.nova.get_limits')
+        self.nova_limits = nova_limits_p.start()
+        self.addCleanup(nova_limits_p.stop)
+        self.nova_limits.return_value = {
+            'maxTotalInstances': 10, 'totalInstancesUsed': 2,
+            'maxTotalCores': 20, 'totalCoresUsed': 2,
+            'maxTotalRAMSize': 51200, 'totalRAMUsed': 4096,
+            'maxTotalFloatingIps': 10, 'totalFloatingIpsUsed': 0}
+
+        cinder_limits_p = mock.patch('savanna.utils.openstack.cinder.'
+                                     'get_limits')
+        self.cinder_limits = cinder_limits_p.start()
+        self.addCleanup(cinder_limits_p.stop)
+        self.cinder_limits.return_value = {
+            'maxTotalVolumes': 10, 'totalVolumesUsed': 0,
+            'maxTotalVolumeGigabytes': 1000, 'totalGigabytesUsed': 100}
+
+    def tearDown(self):
+        CONF.clear_override('use_floating_ips')
+        CONF.clear_override('use_gateway')
+
+    def test_check_cluster(self):
+        quotas.check_cluster(_make_cluster(_make_ng('a', 1, '2'),
+                                           _make_ng('b', 7)))
+        self.assertFalse(self.cinder_limits.called)
+
+        with self.assertRaises(ex.QuotaException) as e:
+            quotas.check_cluster(_make_cluster(_make_ng('a', 4, '2'),
+                                               _make_ng('b', 5)))
+        self.assertIn('cores (requested 21, available 18)',
+                      e.exception.message)
+        self.assertIn('instances (requested 9, available 8)',
+                      e.exception.message)
+        self.assertNotIn('ram', e.exception.message)
+
+    def test_check_cluster_volumes(self):
+        quotas.check_cluster(_make_cluster(_make_ng('a', 3, '1', 3, 100)))
+
+        with self.assertRaises(ex.QuotaException) as e:
+            quotas.check_cluster(_make_cluster(_make_ng('a', 3, '1', 4, 100)))
+        self.assertIn('volume_gbs (requested 1200, available 900)',
+                      e.exception.message)
+        self.assertIn('volumes (requested 12, available 10)',
+                      e.exception.message)
+
+    @mock.patch('savanna.service.networks.is_public')
+    def test_floating_ips(self, is_public):
+        is_public.side_effect = lambda node_group: node_group.id == 'b'
+        self.nova_limits.return_value = {'maxTotalFloatingIps': 2,
+                                         'totalFloatingIpsUsed': 1}
+        cluster = _make_cluster(_make_ng('a', 3))
+
+        self.assertRaises(ex.QuotaException, quotas.check_cluster, cluster)
+
+        CONF.set_override('use_gateway', True)
+        quotas.check_cluster(cluster)
+
+        # nodes running public processes need floating ips too
+        quotas.check_cluster(_make_cluster(_make_ng('a', 3),
+                                           _make_ng('b', 1)))
+        self.assertRaises(ex.QuotaException, quotas.check_cluster,
+                          _make_cluster(_make_ng('a', 3), _make_ng('b', 2)))
+
+        CONF.set_override('use_floating_ips', False)
+        CONF.set_override('use_gateway', False)
+        quotas.check_cluster(cluster)
+
+    def test_unlimited(self):
+        self.nova_limits.return_value = {'maxTotalInstances': -1,
+                                         'totalInstancesUsed': 100}
+        quotas.check_cluster(_make_cluster(_make_ng('a', 50)))
+
+    def test_check_scaling(self):
+        cluster = _make_cluster(_make_ng('a', 6), _make_ng('b', 2))
+
+        # instances of shrunk node group are freed before adding new ones
+        quotas.check_scaling(cluster, {'a': 1}, {})
+        self.assertFalse(self.nova_limits.called)
+
+        quotas.check_scaling(cluster, {'a': 2, 'b': 10}, {})
+
+        cluster.node_groups.append(_make_ng('c', 0))
+        self.assertRaises(ex.QuotaException, quotas.check_scaling,
+                          cluster, {'a': 6}, {'c': 9})
@@ -0,0 +1,138 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from savanna import conductor as cond
+from savanna import context
+from savanna.service import reconciliation
+from savanna.tests.unit import base as models_test_base
+
+
+conductor = cond.API
+
+
+def _make_server(id, status='ACTIVE'):
+    return mock.Mock(id=id, status=status)
+
+
+class ReconciliationTest(models_test_base.DbTestCase):
+    def setUp(self):
+        super(ReconciliationTest, self).setUp()
+
+        admin_ctx_p = mock.patch('savanna.service.reconciliation.'
+                                 '_make_admin_context')
+        admin_ctx_p.start().side_effect = lambda: context.Context(
+            'admin', 'admin_tenant', 'token', {})
+        self.addCleanup(admin_ctx_p.stop)
+
+        client_p = mock.patch('savanna.utils.openstack.nova.client')
+        self.servers = client_p.start()().servers
+        self.addCleanup(client_p.stop)
+
+    def _create_cluster(self, name, tenant_id, instances, status='Active'):
+        self.set_tenant(tenant_id)
+        ctx = context.ctx()
+        cluster = conductor.cluster_create(ctx, {
+            'name': name, 'plugin_name': 'vanilla',
+            'hadoop_version': '1.2.1', 'status': status,
+            'node_groups': [{'name': 'ng', 'flavor_id': '42',
+                             'node_processes': [], 'count': 0}]})
+        for instance_id in instances:
+            conductor.instance_add(ctx, cluster.node_groups[0],
+                                   {'instance_id': instance_id,
+                                    'instance_name': name + instance_id})
+
+        return cluster
+
+    def test_get_drift(self):
+        cluster = self._create_cluster('c', 'tenant_1', ['1', '2', '3', '4'])
+        cluster = conductor.cluster_get(context.ctx(), cluster)
+
+        drift = reconciliation.get_drift(cluster, {'1': 'ACTIVE',
+                                                   '3': 'ERROR',
+                                                   '5': 'ERROR'})
+        self.assertEqual(drift, {'missing': ['c2', 'c4'], 'error': ['c3']})
+
+    def test_reconcile(self):
+        c1 = self._create_cluster('c1', 'tenant_1', ['1', '2'])
+        c2 = self._create_cluster('c2', 'tenant_1', ['3'])
+        c3 = self._create_cluster('c3', 'tenant_2', ['4'])
+        self._create_cluster('c4', 'tenant_2', ['5'], status='Spawning')
+
+        servers = {'tenant_1': [_make_server('1'),
+                                _make_server('3', 'ERROR')],
+                   'tenant_2': [_make_server('4')]}
+        self.servers.list.side_effect = (
+            lambda search_opts, marker, limit:
+            [] if marker else servers[search_opts['tenant_id']])
+
+        reconciliation.reconcile()
+
+        # a page of servers per tenant and an empty one
+        self.assertEqual(self.servers.list.call_count, 4)
+        self.servers.list.assert_any_call(
+            search_opts={'all_tenants': 1, 'tenant_id': 'tenant_2'},
+            marker=None, limit=1000)
+        self.servers.list.assert_any_call(
+            search_opts={'all_tenants': 1, 'tenant_id': 'tenant_2'},
+            marker='4', limit=1000)
+
+        self.set_tenant()
+        ctx = context.ctx()
+        self.assertEqual(conductor.cluster_get(ctx, c1).drift,
+                         {'missing': ['c12']})
+        self.assertEqual(conductor.cluster_get(ctx, c2).drift,
+                         {'error': ['c23']})
+        self.assertEqual(conductor.cluster_get(ctx, c3).drift, {})
+
+        # drift is cleared once cluster is in sync again
+        servers['tenant_1'] += [_make_server('2')]
+        servers['tenant_1'][1].status = 'ACTIVE'
+        reconciliation.reconcile()
+
+        self.set_tenant()
+        self.assertEqual(conductor.cluster_get(ctx, c1).drift, {})
+        self.assertEqual(conductor.cluster_get(ctx, c2).drift, {})
+
+    @mock.patch('savanna.service.reconciliation._SERVERS_PAGE_SIZE', 2)
+    def test_servers_paging(self):
+        servers = [_make_server(str(idx)) for idx in range(5)]
+
+        def list_servers(search_opts, marker, limit):
+            start = 0
+            if marker is not None:
+                start = [s.id for s in servers].index(marker) + 1
+            return servers[start:start + limit]
+
+        self.servers.list.side_effect = list_servers
+
+        self.assertEqual(reconciliation._list_servers('tenant_1'), servers)
+        self.assertEqual(self.servers.list.call_count, 4)
+
+    @mock.patch('savanna.service.reconciliation._PAGING_SUPPORTED', False)
+    def test_servers_without_paging(self):
+        servers = [_make_server(str(idx)) for idx in range(5)]
+        self.servers.list.side_effect = lambda search_opts: servers
+
+        self.assertEqual(reconciliation._list_servers('tenant_1'), servers)
+        self.assertEqual(self.servers.list.call_count, 1)
+
+    def test_errors_are_not_propagated(self):
+        self._create_cluster('c1', 'tenant_1', ['1'])
+        self.servers.list.side_effect = RuntimeError('failed')
+
+        reconciliation.reconcile()
+        self.assertFalse(context.has_ctx())
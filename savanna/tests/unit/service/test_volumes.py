@@ -25,13 +25,16 @@ from savanna.tests.unit import base as models_test_base
 
 class TestAttachVolume(models_test_base.DbTestCase):
     @mock.patch(
-        'savanna.utils.remote.BulkInstanceInteropHelper.execute_command')
+        'savanna.utils.remote.BulkInstanceInteropHelper.execute_commands')
     def test_mount_volume(self, p_ex_cmd):
         instance = r.InstanceResource({'instance_id': '123454321'})
 
-        p_ex_cmd.return_value = (0, None)
+        p_ex_cmd.return_value = [(0, '', '')] * 3
         self.assertIsNone(volumes._mount_volume(instance, '123', '456'))
-        self.assertEqual(p_ex_cmd.call_count, 3)
+        self.assertEqual(p_ex_cmd.call_count, 1)
+        p_ex_cmd.assert_called_once_with(['sudo mkdir -p 456',
+                                          'sudo mkfs.ext4 123',
+                                          'sudo mount 123 456'])
         p_ex_cmd.reset_mock()
 
         p_ex_cmd.side_effect = ex.RemoteCommandException('cmd')
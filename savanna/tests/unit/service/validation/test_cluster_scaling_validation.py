@@ -37,7 +37,7 @@ class TestScalingValidation(unittest2.TestCase):
         api.plugin_base.setup_plugins()
         self._create_object_fun = mock.Mock()
 
-    @mock.patch('savanna.service.api.get_cluster')
+    @mock.patch('savanna.service.api.get_cluster_summary')
     @mock.patch('savanna.plugins.base.PluginManager.get_plugin')
     def _assert_check_scaling(self,
                               get_plugin_p=None,
@@ -22,6 +22,7 @@ from savanna.conductor import resource as r
 from savanna.plugins.vanilla import plugin
 import savanna.service.validation as v
 from savanna.tests.unit.plugins.vanilla import test_utils as tu
+from savanna.utils.openstack import nova as nova_utils
 
 m = {}
 
@@ -65,6 +66,8 @@ def _get_flavor(flavor_id):
 def start_patch():
     get_clusters_p = mock.patch("savanna.service.api.get_clusters")
     get_cluster_p = mock.patch("savanna.service.api.get_cluster")
+    get_cluster_summary_p = \
+        mock.patch("savanna.service.api.get_cluster_summary")
     get_ng_templates_p = \
         mock.patch("savanna.service.api.get_node_group_templates")
     get_ng_template_p = \
@@ -83,6 +86,7 @@ def start_patch():
     get_image = get_image_p.start()
     get_clusters = get_clusters_p.start()
     get_cluster = get_cluster_p.start()
+    get_cluster_summary = get_cluster_summary_p.start()
     get_ng_templates = get_ng_templates_p.start()
     get_ng_template = get_ng_template_p.start()
     get_plugins = get_plugins_p.start()
@@ -91,10 +95,12 @@ def start_patch():
     get_cl_template_p.start()
 
     nova = nova_p.start()
+    nova_utils._FLAVORS.clear()
     keystone = keystone_p.start()
 
     get_cl_templates.return_value = []
 
+    nova().flavors.list.return_value = [mock.Mock(id='42', swap='')]
     nova().flavors.get.side_effect = _get_flavor
     nova().keypairs.get.side_effect = _get_keypair
 
@@ -141,6 +147,7 @@ def start_patch():
     # stub clusters list
     get_clusters.return_value = [cluster]
     get_cluster.return_value = cluster
+    get_cluster_summary.return_value = cluster
 
     # stub node templates
     ngt_dict = {'name': 'test', 'tenant_id': 't', 'flavor_id': '42',
@@ -174,7 +181,8 @@ def start_patch():
     get_plugin.side_effect = _get_plugin
     get_ng_template.side_effect = _get_ng_template
     # request data to validate
-    patchers = (get_clusters_p, get_ng_templates_p, get_ng_template_p,
+    patchers = (get_clusters_p, get_cluster_summary_p,
+                get_ng_templates_p, get_ng_template_p,
                 get_plugins_p, get_plugin_p,
                 get_cl_template_p, get_cl_templates_p, nova_p, keystone_p,
                 get_image_p)
@@ -0,0 +1,126 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import json
+
+import mock
+from oslo.config import cfg
+import unittest2
+
+from savanna import context
+from savanna import exceptions as ex
+from savanna.utils.openstack import base
+
+
+CONF = cfg.CONF
+
+
+class ClientCacheTest(unittest2.TestCase):
+    def setUp(self):
+        base._CLIENTS.clear()
+
+    def tearDown(self):
+        base._CLIENTS.clear()
+        CONF.clear_override('os_client_cache_ttl')
+
+    @mock.patch('time.time')
+    def test_get_cached_client(self, p_time):
+        factory = mock.Mock(side_effect=lambda *args: object())
+        p_time.return_value = 0
+
+        client = base.get_cached_client(('compute', 'token'), factory, 'a')
+        self.assertIs(client,
+                      base.get_cached_client(('compute', 'token'), factory,
+                                             'a'))
+        factory.assert_called_once_with('a')
+
+        other = base.get_cached_client(('compute', 'token2'), factory, 'a')
+        self.assertIsNot(client, other)
+
+        # cached clients are recreated after ttl is expired
+        p_time.return_value = 61
+        self.assertIsNot(client,
+                         base.get_cached_client(('compute', 'token'),
+                                                factory, 'a'))
+        self.assertEqual(base._CLIENTS.keys(), [('compute', 'token')])
+
+    def test_cache_disabled(self):
+        CONF.set_override('os_client_cache_ttl', 0)
+        factory = mock.Mock(side_effect=lambda: object())
+
+        self.assertIsNot(base.get_cached_client('key', factory),
+                         base.get_cached_client('key', factory))
+        self.assertEqual(base._CLIENTS, {})
+
+
+class UrlForTest(unittest2.TestCase):
+    def setUp(self):
+        catalog = [
+            {'type': 'compute',
+             'endpoints': [{'publicURL': 'http://nova:8774',
+                            'AdminURL': 'http://nova-admin:8774'}]},
+            {'type': 'object-store',
+             'endpoints': []},
+            {'type': 'volume',
+             'endpoints': [{'publicURL': 'http://cinder:8776'}]},
+            {'type': 'compute',
+             'endpoints': [{'publicURL': 'http://nova-2:8774'}]}
+        ]
+        self.headers = {'X-Service-Catalog': json.dumps(catalog)}
+        context.set_ctx(
+            context.Context('user', 'tenant', 'token', self.headers))
+
+    def tearDown(self):
+        context.set_ctx(None)
+
+    def test_url_for(self):
+        self.assertEqual(base.url_for(self.headers, 'compute'),
+                         'http://nova:8774')
+        self.assertEqual(base.url_for(self.headers, 'compute', admin=True),
+                         'http://nova-admin:8774')
+        self.assertEqual(base.url_for(self.headers, 'volume'),
+                         'http://cinder:8776')
+        self.assertRaises(ex.EndpointNotFoundException, base.url_for,
+                          self.headers, 'volume', admin=True)
+        self.assertRaises(ex.EndpointNotFoundException, base.url_for,
+                          self.headers, 'identity')
+        # services without endpoints don't break other services
+        self.assertRaises(ex.EndpointNotFoundException, base.url_for,
+                          self.headers, 'object-store')
+
+    @mock.patch('json.loads')
+    def test_first_endpoint_type_is_used(self, p_loads):
+        p_loads.return_value = [
+            {'type': 'compute',
+             'endpoints': [collections.OrderedDict(
+                 [('publicURL', 'http://nova:8774'),
+                  ('PublicURL', 'http://nova-2:8774')])]}]
+
+        self.assertEqual({'compute': {'publicurl': 'http://nova:8774'}},
+                         base._parse_catalog('catalog'))
+
+    @mock.patch('json.loads', wraps=json.loads)
+    def test_catalog_is_parsed_once(self, p_loads):
+        base.url_for(self.headers, 'compute')
+        base.url_for(self.headers, 'volume')
+        base.url_for(self.headers, 'compute', admin=True)
+        self.assertEqual(p_loads.call_count, 1)
+
+        # catalog is reparsed if header is changed
+        headers = {'X-Service-Catalog': json.dumps([])}
+        self.assertRaises(ex.EndpointNotFoundException, base.url_for,
+                          headers, 'compute')
+        self.assertEqual(p_loads.call_count, 2)
@@ -0,0 +1,153 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import urlparse
+
+import mock
+from novaclient.v1_1 import images as nova_images
+import unittest2
+
+from savanna import context
+from savanna.utils.openstack import images
+
+
+def _image_info(id, username=None, tags=()):
+    metadata = dict((images.PROP_TAG + tag, True) for tag in tags)
+    if username:
+        metadata[images.PROP_USERNAME] = username
+    return {'id': id, 'metadata': metadata, 'links': []}
+
+
+class ImageCacheTest(unittest2.TestCase):
+    def setUp(self):
+        images._IMAGES.clear()
+        images._IMAGE_LISTS.clear()
+        context.set_ctx(context.Context('user', 'tenant_1', 'token', {}))
+        self.manager = images.SavannaImageManager(mock.Mock())
+
+        self.infos = {'1': _image_info('1', 'ubuntu', ['vanilla']),
+                      '2': _image_info('2')}
+
+        get_p = mock.patch('novaclient.v1_1.images.ImageManager.get')
+        self.get = get_p.start()
+        self.addCleanup(get_p.stop)
+        self.get.side_effect = lambda id: images.SavannaImage(
+            self.manager, dict(self.infos[id]), loaded=True)
+
+        list_p = mock.patch.object(self.manager, '_list')
+        self.list = list_p.start()
+        self.addCleanup(list_p.stop)
+        self.list.side_effect = self._list
+
+        for meta_method in ['set_meta', 'delete_meta']:
+            p = mock.patch.object(nova_images.ImageManager, meta_method)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        context.set_ctx(None)
+
+    def _list(self, url, response_key):
+        self.assertEqual(response_key, 'images')
+        path, query = url.split('?')
+        self.assertEqual(path, '/images/detail')
+        params = dict(urlparse.parse_qsl(query))
+
+        infos = sorted(self.infos.values(), key=lambda info: info['id'])
+        for key, value in params.items():
+            if key.startswith('property-'):
+                key = key[len('property-'):]
+                infos = [info for info in infos
+                         if str(info['metadata'].get(key)) == value]
+        if 'marker' in params:
+            infos = [info for info in infos if info['id'] > params['marker']]
+
+        return [images.SavannaImage(self.manager, dict(info), loaded=True)
+                for info in infos[:int(params['limit'])]]
+
+    def test_get_is_cached(self):
+        self.assertEqual(self.manager.get('1').username, 'ubuntu')
+        self.assertEqual(self.manager.get('1').tags, ['vanilla'])
+        self.assertEqual(self.get.call_count, 1)
+
+        # cache is tenant-scoped
+        context.set_ctx(context.Context('user', 'tenant_2', 'token', {}))
+        self.manager.get('1')
+        self.assertEqual(self.get.call_count, 2)
+
+    @mock.patch('time.time')
+    def test_expired_entries_are_evicted(self, p_time):
+        p_time.return_value = 0
+        self.manager.get('1')
+        self.manager.list_registered()
+
+        p_time.return_value = 10 ** 6
+        self.manager.get('2')
+        self.manager.list_by_tags(['vanilla'])
+
+        self.assertEqual(images._IMAGES.keys(), [('tenant_1', '2')])
+        self.assertEqual(images._IMAGE_LISTS.keys(),
+                         [('tenant_1', ('vanilla',))])
+
+    def test_list_registered_is_cached(self):
+        self.assertEqual([i.id for i in self.manager.list_registered()],
+                         ['1'])
+        self.assertEqual(
+            [i.id for i in self.manager.list_registered(['vanilla'])], ['1'])
+        self.assertEqual(self.manager.list_by_tags(['hdp']), [])
+        self.assertEqual(self.list.call_count, 1)
+
+    def test_list_by_tags_is_filtered_on_server(self):
+        self.infos['3'] = _image_info('3', 'centos', ['vanilla', 'hdp'])
+
+        self.assertEqual(
+            [i.id for i in self.manager.list_registered(['vanilla'])],
+            ['1', '3'])
+        self.assertEqual(
+            [i.id for i in self.manager.list_by_tags(['hdp', 'vanilla'])],
+            ['3'])
+        self.list.assert_any_call(
+            '/images/detail?limit=100&property-_savanna_tag_hdp=True&'
+            'property-_savanna_tag_vanilla=True', 'images')
+
+        # same tags are served from cache
+        self.manager.list_by_tags(['vanilla', 'hdp'])
+        self.assertEqual(self.list.call_count, 2)
+
+    @mock.patch('savanna.utils.openstack.images.LIST_PAGE_SIZE', 1)
+    def test_list_is_paged(self):
+        self.assertEqual([i.id for i in self.manager.list_by_tags([])],
+                         ['1', '2'])
+        self.assertEqual(self.list.call_count, 3)
+        self.list.assert_called_with('/images/detail?limit=1&marker=2',
+                                     'images')
+
+    def test_invalidation(self):
+        self.manager.get('2')
+        self.manager.list_registered()
+
+        self.infos['2'] = _image_info('2', 'fedora', ['hdp'])
+        self.manager.set_description('2', 'fedora')
+
+        self.assertEqual(self.manager.get('2').username, 'fedora')
+        self.assertEqual(
+            sorted(i.id for i in self.manager.list_registered()), ['1', '2'])
+
+        self.infos['2'] = _image_info('2', 'fedora')
+        self.manager.untag('2', ['hdp'])
+        self.assertEqual(self.manager.get('2').tags, [])
+        self.assertEqual(self.manager.list_by_tags(['hdp']), [])
+
+        self.assertEqual(self.get.call_count, 3)
+        self.assertEqual(self.list.call_count, 3)
@@ -0,0 +1,99 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+from novaclient import exceptions as nova_ex
+from oslo.config import cfg
+import unittest2
+
+from savanna import context
+from savanna.utils.openstack import nova
+
+
+CONF = cfg.CONF
+
+
+def _flavor(id, vcpus=1, ram=512, disk=10, swap=''):
+    flavor = mock.Mock(id=id, vcpus=vcpus, ram=ram, disk=disk, swap=swap)
+    flavor.name = 'flavor-%s' % id
+    setattr(flavor, 'OS-FLV-EXT-DATA:ephemeral', 20)
+    return flavor
+
+
+class FlavorCacheTest(unittest2.TestCase):
+    def setUp(self):
+        nova._FLAVORS.clear()
+        context.set_ctx(context.Context('user', 'tenant_1', 'token', {}))
+
+        client_p = mock.patch('savanna.utils.openstack.nova.client')
+        self.flavors = client_p.start()().flavors
+        self.addCleanup(client_p.stop)
+        self.flavors.list.return_value = [_flavor('1'),
+                                          _flavor('2', 4, 8192, 80, 1024)]
+        self.flavors.get.side_effect = nova_ex.NotFound('')
+
+    def tearDown(self):
+        nova._FLAVORS.clear()
+        context.set_ctx(None)
+        CONF.clear_override('flavor_cache_ttl')
+
+    def test_get_flavor_profile(self):
+        self.assertEqual(nova.get_flavor_profile('2'),
+                         nova.HardwareProfile(id='2', name='flavor-2',
+                                              vcpus=4, ram=8192, disk=80,
+                                              ephemeral=20, swap=1024))
+        self.assertEqual(nova.get_flavor_profile(1).swap, 0)
+        self.assertIsNone(nova.get_flavor_profile('3'))
+
+        self.assertEqual(self.flavors.list.call_count, 1)
+        self.flavors.get.assert_called_once_with('3')
+
+    def test_missing_flavor_is_requested(self):
+        self.flavors.get.side_effect = None
+        self.flavors.get.return_value = _flavor('3', vcpus=2)
+
+        self.assertEqual(nova.get_flavor_profile('3').vcpus, 2)
+        self.assertEqual(nova.get_flavor_profile('3').vcpus, 2)
+        self.assertEqual(self.flavors.get.call_count, 1)
+
+    @mock.patch('time.time')
+    def test_catalog_expiration(self, p_time):
+        p_time.return_value = 0
+        nova.get_flavor_profiles()
+        p_time.return_value = 299
+        nova.get_flavor_profiles()
+        self.assertEqual(self.flavors.list.call_count, 1)
+
+        p_time.return_value = 300
+        nova.get_flavor_profiles()
+        self.assertEqual(self.flavors.list.call_count, 2)
+
+        # catalog is cached per tenant
+        context.set_ctx(context.Context('user', 'tenant_2', 'token', {}))
+        nova.get_flavor_profiles()
+        self.assertEqual(self.flavors.list.call_count, 3)
+
+    def test_caching_disabled(self):
+        CONF.set_override('flavor_cache_ttl', 0)
+        nova.get_flavor_profiles()
+        nova.get_flavor_profiles()
+        self.assertEqual(self.flavors.list.call_count, 2)
+
+        # single flavor is requested directly
+        self.flavors.get.side_effect = None
+        self.flavors.get.return_value = _flavor('1', vcpus=2)
+        self.assertEqual(nova.get_flavor_profile('1').vcpus, 2)
+        self.flavors.get.assert_called_once_with('1')
+        self.assertEqual(self.flavors.list.call_count, 2)
@@ -0,0 +1,114 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import mock
+from novaclient import exceptions as nova_ex
+from oslo.config import cfg
+import unittest2
+
+from savanna.utils.openstack import ratelimit
+
+
+CONF = cfg.CONF
+
+
+class AdaptiveLimiterTest(unittest2.TestCase):
+    def test_aimd(self):
+        limiter = ratelimit.AdaptiveLimiter(8)
+        limiter.on_throttle()
+        limiter.on_throttle()
+        self.assertEqual(limiter.limit, 2)
+
+        # one per window of successful requests
+        limiter.on_success()
+        limiter.on_success()
+        self.assertAlmostEqual(limiter.limit, 2.9)
+
+        for _ in range(100):
+            limiter.on_success()
+        self.assertEqual(limiter.limit, 8)
+
+        for _ in range(10):
+            limiter.on_throttle()
+        self.assertEqual(limiter.limit, 1)
+
+    def test_concurrency_is_limited(self):
+        limiter = ratelimit.AdaptiveLimiter(2)
+        stats = {'current': 0, 'max': 0}
+
+        def request():
+            limiter.acquire()
+            stats['current'] += 1
+            stats['max'] = max(stats['max'], stats['current'])
+            eventlet.sleep(0.01)
+            stats['current'] -= 1
+            limiter.release()
+
+        pool = eventlet.GreenPool()
+        for _ in range(6):
+            pool.spawn(request)
+        pool.waitall()
+
+        self.assertEqual(stats['max'], 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+class LimitRequestsTest(unittest2.TestCase):
+    def setUp(self):
+        ratelimit._LIMITERS.clear()
+        self.key = ('compute', 'http://nova', 'tenant')
+
+    def tearDown(self):
+        ratelimit._LIMITERS.clear()
+        CONF.clear_override('os_api_max_concurrency')
+
+    @mock.patch('savanna.context.sleep')
+    def test_throttled_request_is_retried(self, p_sleep):
+        request = mock.Mock(side_effect=[nova_ex.OverLimit(413),
+                                         nova_ex.ClientException(503),
+                                         'result'])
+        wrapped = ratelimit.limit_requests(request, self.key)
+
+        self.assertEqual(wrapped('/servers', 'GET'), 'result')
+        self.assertEqual(request.call_count, 3)
+        request.assert_called_with('/servers', 'GET')
+        self.assertEqual(p_sleep.call_args_list,
+                         [mock.call(1.0), mock.call(2.0)])
+
+        limiter = ratelimit.get_limiter(self.key)
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertLess(limiter.limit, 6)
+
+    @mock.patch('savanna.context.sleep')
+    def test_retries_are_limited(self, p_sleep):
+        request = mock.Mock(side_effect=nova_ex.OverLimit(413))
+        wrapped = ratelimit.limit_requests(request, self.key)
+
+        self.assertRaises(nova_ex.OverLimit, wrapped, '/servers', 'GET')
+        self.assertEqual(request.call_count, 6)
+
+    def test_other_errors_are_not_retried(self):
+        request = mock.Mock(side_effect=nova_ex.NotFound(404))
+        wrapped = ratelimit.limit_requests(request, self.key)
+
+        self.assertRaises(nova_ex.NotFound, wrapped, '/servers/1', 'GET')
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(ratelimit.get_limiter(self.key).limit, 20)
+
+    def test_disabled(self):
+        CONF.set_override('os_api_max_concurrency', 0)
+        request = mock.Mock()
+        self.assertIs(ratelimit.limit_requests(request, self.key), request)
@@ -0,0 +1,89 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import eventlet
+import mock
+from oslo.config import cfg
+import unittest2
+
+from savanna.utils.openstack import singleflight
+
+
+CONF = cfg.CONF
+
+
+class CoalesceReadsTest(unittest2.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.error = None
+        self.request = singleflight.coalesce_reads(self._request, 'key')
+
+    def tearDown(self):
+        CONF.clear_override('os_api_coalesce_reads')
+
+    def _request(self, url, method, **kwargs):
+        self.calls.append((url, method))
+        eventlet.sleep(0.01)
+        if self.error:
+            raise self.error
+        return 'resp', {'url': url}
+
+    def _run_concurrently(self, *requests):
+        pool = eventlet.GreenPool()
+        threads = [pool.spawn(self.request, *args, **kwargs)
+                   for args, kwargs in requests]
+        return [thread.wait() for thread in threads]
+
+    def test_identical_reads_are_coalesced(self):
+        headers = {'X-Auth-Token': 'token'}
+        results = self._run_concurrently(
+            *[(('/flavors/1', 'GET'), {'headers': headers})] * 5)
+
+        self.assertEqual(self.calls, [('/flavors/1', 'GET')])
+        self.assertEqual(results, [('resp', {'url': '/flavors/1'})] * 5)
+        # each caller gets its own copy of the body
+        self.assertEqual(len(set(id(body) for _, body in results)), 5)
+        self.assertEqual(singleflight._CALLS, {})
+
+        # request made after the previous one finished isn't coalesced
+        self.request('/flavors/1', 'GET', headers=headers)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_different_requests_are_not_coalesced(self):
+        self._run_concurrently(
+            (('/flavors/1', 'GET'), {'headers': {'X-Auth-Token': 'a'}}),
+            (('/flavors/1', 'GET'), {'headers': {'X-Auth-Token': 'b'}}),
+            (('/flavors/2', 'GET'), {'headers': {'X-Auth-Token': 'a'}}),
+            (('/servers', 'POST'), {'body': {}}),
+            (('/servers', 'POST'), {'body': {}}))
+
+        self.assertEqual(len(self.calls), 5)
+
+    def test_error_is_propagated(self):
+        self.error = RuntimeError('failed')
+
+        pool = eventlet.GreenPool()
+        threads = [pool.spawn(self.request, '/flavors/1', 'GET')
+                   for _ in range(3)]
+        for thread in threads:
+            self.assertRaises(RuntimeError, thread.wait)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(singleflight._CALLS, {})
+
+    def test_disabled(self):
+        CONF.set_override('os_api_coalesce_reads', False)
+        request = mock.Mock()
+        self.assertIs(singleflight.coalesce_reads(request, 'key'), request)
@@ -0,0 +1,97 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import mock
+import unittest2
+
+from savanna import context
+from savanna.utils import metrics
+
+
+class MetricsTest(unittest2.TestCase):
+    def setUp(self):
+        metrics.reset()
+        context.set_ctx(context.Context('user', 'tenant_1', 'token', {}))
+
+    def tearDown(self):
+        metrics.reset()
+        context.set_ctx(None)
+
+    def _get_stats(self, tenant_id=None):
+        return dict(((s['cluster_id'], s['step'], s['operation']), s)
+                    for s in metrics.get_stats(tenant_id))
+
+    @mock.patch('time.time')
+    def test_timed(self, p_time):
+        p_time.side_effect = [0, 0.02, 10, 12]
+
+        with metrics.trace('configure', 'cluster_1'):
+            with metrics.timed('exec', 'ls') as sample:
+                sample.ret_code = 0
+                sample.bytes = 10
+
+            with self.assertRaises(RuntimeError):
+                with metrics.timed('exec', 'ls') as sample:
+                    sample.ret_code = 2
+                    raise RuntimeError()
+
+        stats = self._get_stats()
+        self.assertEqual(stats.keys(), [('cluster_1', 'configure', 'exec')])
+
+        stat = stats[('cluster_1', 'configure', 'exec')]
+        self.assertEqual(stat['tenant_id'], 'tenant_1')
+        self.assertEqual(stat['count'], 2)
+        self.assertEqual(stat['errors'], 1)
+        self.assertEqual(stat['bytes'], 10)
+        self.assertEqual(stat['exit_codes'], {'0': 1, '2': 1})
+        self.assertAlmostEqual(stat['total_time'], 2.02)
+        self.assertEqual(stat['max_time'], 2)
+        self.assertEqual(stat['latency_histogram']['0.05'], 1)
+        self.assertEqual(stat['latency_histogram']['5'], 1)
+        self.assertEqual(sum(stat['latency_histogram'].values()), 2)
+
+    def test_trace_nesting(self):
+        with metrics.trace('create', 'cluster_1'):
+            with metrics.trace('attach_volumes'):
+                with metrics.timed('connect'):
+                    pass
+            with metrics.timed('connect'):
+                pass
+
+        with metrics.timed('connect'):
+            pass
+
+        self.assertEqual(
+            sorted(self._get_stats().keys()),
+            [(None, None, 'connect'),
+             ('cluster_1', 'attach_volumes', 'connect'),
+             ('cluster_1', 'create', 'connect')])
+
+    def test_tenant_filter_and_forget(self):
+        with metrics.trace('create', 'cluster_1'):
+            with metrics.timed('connect'):
+                pass
+
+        context.set_ctx(context.Context('user', 'tenant_2', 'token', {}))
+        with metrics.trace('create', 'cluster_2'):
+            with metrics.timed('connect'):
+                pass
+
+        self.assertEqual(len(metrics.get_stats()), 2)
+        self.assertEqual(self._get_stats('tenant_2').keys(),
+                         [('cluster_2', 'create', 'connect')])
+
+        metrics.forget_cluster('cluster_2')
+        self.assertEqual(self._get_stats().keys(),
+                         [('cluster_1', 'create', 'connect')])
@@ -0,0 +1,316 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+
+import mock
+from oslo.config import cfg
+import unittest2
+
+from savanna.conductor import resource as r
+from savanna import exceptions as ex
+from savanna.utils import remote
+
+
+CONF = cfg.CONF
+
+
+class FakeChannel(object):
+    """Runs commands in a local shell instead of a remote one."""
+
+    def __init__(self):
+        self.stdin = ''
+
+    def exec_command(self, cmd):
+        self.cmd = cmd
+
+    def sendall(self, data):
+        self.stdin += data
+
+    def shutdown_write(self):
+        pass
+
+    def recv_exit_status(self):
+        proc = subprocess.Popen(self.cmd, shell=True, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+        self.stdout, self.stderr = proc.communicate(self.stdin)
+        return proc.returncode
+
+    def recv_ready(self):
+        return bool(self.stdout)
+
+    def recv(self, size):
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv_stderr(self, size):
+        data, self.stderr = self.stderr[:size], self.stderr[size:]
+        return data
+
+
+def _fake_ssh():
+    ssh = mock.Mock()
+    ssh.get_transport.return_value.open_session.side_effect = FakeChannel
+    return ssh
+
+
+class ExecuteCommandsTest(unittest2.TestCase):
+    def test_execute_commands(self):
+        ssh = _fake_ssh()
+        res = remote.execute_commands(ssh, ['echo first',
+                                            'printf second; echo err >&2',
+                                            'true'])
+
+        self.assertEqual(res, [(0, 'first\n', ''),
+                               (0, 'second', 'err\n'),
+                               (0, '', '')])
+        self.assertEqual(
+            ssh.get_transport.return_value.open_session.call_count, 1)
+
+    def test_execute_commands_stop_on_error(self):
+        ssh = _fake_ssh()
+        res = remote.execute_commands(ssh, ['echo first', 'exit 3',
+                                            'echo third'],
+                                      raise_when_error=False)
+
+        self.assertEqual(res, [(0, 'first\n', ''), (3, '', '')])
+
+    def test_execute_commands_continue_on_error(self):
+        ssh = _fake_ssh()
+        res = remote.execute_commands(ssh, ['exit 3', 'echo second'],
+                                      stop_on_error=False,
+                                      raise_when_error=False)
+
+        self.assertEqual(res, [(3, '', ''), (0, 'second\n', '')])
+
+    def test_execute_commands_raise(self):
+        ssh = _fake_ssh()
+        with self.assertRaises(ex.RemoteCommandException) as cm:
+            remote.execute_commands(ssh, ['echo first',
+                                          'echo oops >&2; exit 2'])
+
+        self.assertEqual(cm.exception.cmd, 'echo oops >&2; exit 2')
+        self.assertEqual(cm.exception.ret_code, 2)
+        self.assertEqual(cm.exception.stderr, 'oops\n')
+
+    def test_execute_commands_shell_died(self):
+        ssh = _fake_ssh()
+        with self.assertRaises(ex.RemoteCommandException) as cm:
+            remote.execute_commands(ssh, ['echo first', 'kill -9 $$',
+                                          'echo third'])
+
+        self.assertEqual(cm.exception.cmd, 'kill -9 $$')
+        self.assertEqual(cm.exception.ret_code, 137)
+
+        res = remote.execute_commands(ssh, ['echo first', 'kill -9 $$'],
+                                      raise_when_error=False)
+        self.assertEqual(res, [(0, 'first\n', '')])
+
+    @mock.patch('savanna.utils.remote._run_on_channel')
+    def test_execute_commands_garbled_output(self, run_on_channel):
+        run_on_channel.return_value = (0, 'garbage', '')
+        with self.assertRaises(ex.RemoteCommandException) as cm:
+            remote.execute_commands(mock.Mock(), ['echo first'])
+
+        self.assertEqual(cm.exception.cmd, 'echo first')
+        self.assertIsNone(cm.exception.ret_code)
+        self.assertEqual(cm.exception.stdout, 'garbage')
+
+        self.assertEqual(remote.execute_commands(mock.Mock(), ['echo first'],
+                                                 raise_when_error=False), [])
+
+    def test_execute_commands_stdin_is_not_shared(self):
+        ssh = _fake_ssh()
+        res = remote.execute_commands(ssh, ['cat', 'echo done'])
+
+        self.assertEqual(res, [(0, '', ''), (0, 'done\n', '')])
+
+    def test_execute_no_commands(self):
+        ssh = _fake_ssh()
+        self.assertEqual(remote.execute_commands(ssh, []), [])
+        self.assertFalse(ssh.get_transport.called)
+
+
+class PushFilesTest(unittest2.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.same = os.path.join(self.tmp_dir, 'same')
+        self.changed = os.path.join(self.tmp_dir, 'changed')
+        self.missing = os.path.join(self.tmp_dir, 'missing')
+        self.spaced = os.path.join(self.tmp_dir, 'with space')
+        for path in [self.same, self.changed, self.spaced]:
+            with open(path, 'w') as fl:
+                fl.write('data')
+
+        self.files = {self.same: 'data',
+                      self.changed: 'new data',
+                      self.missing: 'data',
+                      self.spaced: 'data'}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_get_changed_files(self):
+        ssh = _fake_ssh()
+        changed = remote.get_changed_files(ssh, self.files)
+
+        self.assertEqual(changed, {self.changed: 'new data',
+                                   self.missing: 'data'})
+        self.assertEqual(
+            ssh.get_transport.return_value.open_session.call_count, 1)
+
+    @mock.patch('savanna.utils.remote.write_files_to')
+    def test_push_files_to(self, write_files_to):
+        helper = mock.Mock()
+        helper.ssh_connection.return_value = _fake_ssh()
+        bulk = remote.BulkInstanceInteropHelper(helper)
+
+        self.assertEqual(bulk.push_files_to(self.files),
+                         sorted([self.changed, self.missing]))
+        write_files_to.assert_called_once_with(
+            mock.ANY, {self.changed: 'new data', self.missing: 'data'})
+
+        write_files_to.reset_mock()
+        self.assertEqual(bulk.push_files_to({self.same: 'data'}), [])
+        self.assertFalse(write_files_to.called)
+
+
+class SetupSshConnectionTest(unittest2.TestCase):
+    def setUp(self):
+        remote._HOST_FAILURES.clear()
+
+    def tearDown(self):
+        remote._HOST_FAILURES.clear()
+
+    @mock.patch('paramiko.SSHClient')
+    def test_connect_options(self, ssh_client):
+        ssh = remote.setup_ssh_connection('host', 'user', mock.Mock())
+
+        kwargs = ssh.connect.call_args[1]
+        self.assertEqual(kwargs['timeout'], 30)
+        # old paramiko versions don't support 'sock' argument
+        self.assertNotIn('sock', kwargs)
+        ssh.get_transport.return_value.set_keepalive.assert_called_once_with(
+            30)
+
+        sock = mock.Mock()
+        ssh = remote.setup_ssh_connection('host', 'user', mock.Mock(),
+                                          sock=sock)
+        self.assertIs(ssh.connect.call_args[1]['sock'], sock)
+
+    @mock.patch('time.time')
+    @mock.patch('paramiko.SSHClient')
+    def test_host_fast_fail(self, ssh_client, p_time):
+        p_time.return_value = 100
+        ssh_client.return_value.connect.side_effect = socket.timeout()
+
+        for _ in range(3):
+            self.assertRaises(socket.timeout, remote.setup_ssh_connection,
+                              'host', 'user', mock.Mock())
+
+        self.assertRaises(ex.RemoteHostUnavailableException,
+                          remote.setup_ssh_connection,
+                          'host', 'user', mock.Mock())
+        self.assertEqual(ssh_client.return_value.connect.call_count, 3)
+
+        # other hosts are not affected
+        ssh_client.return_value.connect.side_effect = None
+        remote.setup_ssh_connection('other_host', 'user', mock.Mock())
+
+        # connection is attempted again after cooldown
+        p_time.return_value = 200
+        remote.setup_ssh_connection('host', 'user', mock.Mock())
+        self.assertNotIn('host', remote._HOST_FAILURES)
+
+
+class GatewayTest(unittest2.TestCase):
+    def setUp(self):
+        CONF.set_override('use_gateway', True)
+        remote._GATEWAYS.clear()
+
+        instances = [{'id': str(idx),
+                      'instance_name': 'cluster-ng-00%d' % idx,
+                      'internal_ip': '10.0.0.%d' % idx,
+                      'management_ip': '172.16.0.%d' % idx}
+                     for idx in [3, 1, 2]]
+        self.cluster_dict = {'id': 'cluster_id', 'private_key': 'key',
+                             'gateway_id': '1',
+                             'node_groups': [{'instances': instances}]}
+        self.cluster = r.ClusterResource(self.cluster_dict)
+
+    def tearDown(self):
+        CONF.clear_override('use_gateway')
+        remote._GATEWAYS.clear()
+
+    def _get_instance(self, id):
+        for instance in self.cluster.node_groups[0].instances:
+            if instance.id == id:
+                return instance
+
+    @mock.patch('savanna.utils.remote.setup_ssh_connection')
+    @mock.patch('savanna.utils.openstack.nova.get_node_group_image_username')
+    def test_gateway_connection(self, get_username, setup_ssh):
+        get_username.return_value = 'user'
+        gateway_ssh = mock.Mock()
+        transport = gateway_ssh.get_transport.return_value
+        setup_ssh.return_value = gateway_ssh
+
+        self.assertEqual(self.cluster.gateway.id, '1')
+
+        remote.get_remote(self._get_instance('1')).ssh_connection()
+        setup_ssh.assert_called_once_with('172.16.0.1', 'user', 'key',
+                                          sock=None)
+        setup_ssh.reset_mock()
+
+        for id in ['2', '3']:
+            remote.get_remote(self._get_instance(id)).ssh_connection()
+
+        transport.open_channel.assert_has_calls(
+            [mock.call('direct-tcpip', ('10.0.0.2', 22), ('', 0)),
+             mock.call('direct-tcpip', ('10.0.0.3', 22), ('', 0))])
+        # gateway connection is established once and then reused
+        self.assertEqual(
+            setup_ssh.call_args_list,
+            [mock.call('172.16.0.1', 'user', 'key', sock=None),
+             mock.call('10.0.0.2', 'user', 'key',
+                       sock=transport.open_channel.return_value),
+             mock.call('10.0.0.3', 'user', 'key',
+                       sock=transport.open_channel.return_value)])
+
+        remote.close_gateway_connection('cluster_id')
+        gateway_ssh.close.assert_called_once_with()
+        self.assertEqual(remote._GATEWAYS, {})
+
+    @mock.patch('savanna.utils.remote.setup_ssh_connection')
+    @mock.patch('savanna.utils.openstack.nova.get_node_group_image_username')
+    def test_gateway_change(self, get_username, setup_ssh):
+        old_ssh = mock.Mock()
+        new_ssh = mock.Mock()
+        setup_ssh.side_effect = [old_ssh, new_ssh]
+
+        remote._get_gateway_connection(self.cluster.gateway)
+
+        cluster = r.ClusterResource(dict(self.cluster_dict, gateway_id='2'))
+        self.assertIs(remote._get_gateway_connection(cluster.gateway),
+                      new_ssh)
+        old_ssh.close.assert_called_once_with()
+        self.assertEqual(remote._GATEWAYS, {'2': ('cluster_id', new_ssh)})
@@ -44,8 +44,8 @@ def find(lst, **kwargs):
     return None
 
 
-def format_cluster_status(cluster):
+def format_cluster_status(cluster, status=None):
     msg = "Cluster status has been changed: id=%s, New status=%s"
     if cluster:
-        return msg % (cluster.id, cluster.status)
+        return msg % (cluster.id, status or cluster.status)
     return msg % ("Unknown", "Unknown")
@@ -0,0 +1,165 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process metrics of remote operations.
+
+Each operation is accounted under the (tenant, cluster, step, operation)
+key. Cluster and step are taken from the tracing scope of the current
+green thread, see trace().
+"""
+
+import contextlib
+import time
+
+from eventlet import corolocal
+
+from savanna import context
+from savanna.openstack.common import log as logging
+
+
+LOG = logging.getLogger(__name__)
+
+# upper bounds (in seconds) of latency histogram buckets, the last bucket
+# counts all operations slower than the last bound
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+_STATS = {}
+_TRACE = corolocal.local()
+
+
+class OperationStats(object):
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.bytes = 0
+        self.exit_codes = {}
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, duration, sample):
+        self.count += 1
+        if sample.error:
+            self.errors += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.bytes += sample.bytes
+        if sample.ret_code is not None:
+            self.exit_codes[sample.ret_code] = (
+                self.exit_codes.get(sample.ret_code, 0) + 1)
+
+        bucket = len(LATENCY_BUCKETS)
+        for idx, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                bucket = idx
+                break
+        self.histogram[bucket] += 1
+
+    def to_dict(self):
+        histogram = dict((str(bound), self.histogram[idx])
+                         for idx, bound in enumerate(LATENCY_BUCKETS))
+        histogram['+Inf'] = self.histogram[-1]
+
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_time': self.total_time,
+            'max_time': self.max_time,
+            'bytes': self.bytes,
+            'exit_codes': dict((str(code), count) for code, count
+                               in self.exit_codes.iteritems()),
+            'latency_histogram': histogram
+        }
+
+
+class Sample(object):
+    """Details of a single operation filled in by the timed code."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.ret_code = None
+        self.error = False
+
+
+@contextlib.contextmanager
+def trace(step, cluster_id=None):
+    """Account operations in this green thread under the given step.
+
+    If cluster_id is not specified, it is inherited from the outer
+    tracing scope.
+    """
+    prev = (getattr(_TRACE, 'step', None), getattr(_TRACE, 'cluster_id', None))
+    _TRACE.step = step
+    _TRACE.cluster_id = cluster_id or prev[1]
+    try:
+        yield
+    finally:
+        _TRACE.step, _TRACE.cluster_id = prev
+
+
+def _get_key(operation):
+    tenant_id = context.current().tenant_id if context.has_ctx() else None
+    return (tenant_id, getattr(_TRACE, 'cluster_id', None),
+            getattr(_TRACE, 'step', None), operation)
+
+
+@contextlib.contextmanager
+def timed(operation, description=None, slow_threshold=0):
+    """Measure the operation executed in the scope.
+
+    The yielded Sample could be used to report transferred bytes and
+    exit code of the operation. Operations which took longer than
+    slow_threshold seconds are logged on debug level.
+    """
+    sample = Sample()
+    key = _get_key(operation)
+    start = time.time()
+    try:
+        yield sample
+    except Exception:
+        sample.error = True
+        raise
+    finally:
+        duration = time.time() - start
+        _STATS.setdefault(key, OperationStats()).add(duration, sample)
+
+        if slow_threshold and duration >= slow_threshold:
+            LOG.debug("Slow %s operation '%s' took %.2f seconds "
+                      "(cluster: %s, step: %s)", operation, description,
+                      duration, key[1], key[2])
+
+
+def get_stats(tenant_id=None):
+    """Return list of operation stats, optionally filtered by tenant."""
+    result = []
+    for key, stats in _STATS.items():
+        if tenant_id and key[0] != tenant_id:
+            continue
+
+        dct = stats.to_dict()
+        dct.update({'tenant_id': key[0], 'cluster_id': key[1],
+                    'step': key[2], 'operation': key[3]})
+        result.append(dct)
+
+    return result
+
+
+def forget_cluster(cluster_id):
+    for key in _STATS.keys():
+        if key[1] == cluster_id:
+            del _STATS[key]
+
+
+def reset():
+    _STATS.clear()
@@ -14,6 +14,52 @@
 # limitations under the License.
 
 import json
+import time
+
+from oslo.config import cfg
+
+from savanna import context
+from savanna import exceptions as ex
+
+
+opts = [
+    cfg.IntOpt('os_client_cache_ttl',
+               default=60,
+               help='Time in seconds during which OpenStack clients are '
+                    'reused for the same auth token, tenant and endpoint, '
+                    '0 disables reusing of clients')
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts)
+
+# (service type, token, tenant, endpoint) -> (client, expiration time)
+_CLIENTS = {}
+
+
+def get_cached_client(key, factory, *args, **kwargs):
+    """Return client cached under the given key or create a new one.
+
+    Reusing clients allows to skip their construction and reuse
+    keep-alive HTTP connections of their sessions.
+    """
+    ttl = CONF.os_client_cache_ttl
+    if not ttl:
+        return factory(*args, **kwargs)
+
+    now = time.time()
+    cached = _CLIENTS.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    client = factory(*args, **kwargs)
+
+    for cached_key, (_, expires_at) in _CLIENTS.items():
+        if expires_at <= now:
+            _CLIENTS.pop(cached_key, None)
+    _CLIENTS[key] = (client, now + ttl)
+
+    return client
 
 
 def url_for(headers, service_type, admin=False, endpoint_type=None):
@@ -22,29 +68,47 @@ def url_for(headers, service_type, admin=False, endpoint_type=None):
     if admin:
         endpoint_type = 'adminURL'
 
-    catalog = headers['X-Service-Catalog']
-    service = _get_service_from_catalog(catalog, service_type)
+    catalog = _get_parsed_catalog(headers['X-Service-Catalog'])
+    endpoints = catalog.get(service_type)
 
-    if service:
-        return _get_case_insensitive(service['endpoints'][0], endpoint_type)
-    else:
-        raise Exception('Service "%s" not found' % service_type)
+    if endpoints is None:
+        raise ex.EndpointNotFoundException(service_type)
 
+    try:
+        return endpoints[str(endpoint_type).lower()]
+    except KeyError:
+        raise ex.EndpointNotFoundException(service_type, endpoint_type)
 
-def _get_service_from_catalog(catalog, service_type):
-    if catalog:
-        catalog = json.loads(catalog)
-        for service in catalog:
-            if service['type'] == service_type:
-                return service
 
-    return None
+def _get_parsed_catalog(catalog):
+    """Return parsed catalog cached in the current context.
+
+    Parsed catalog is a dict mapping service type to the dict of the first
+    endpoint of the service with lowercased endpoint types as keys.
+    """
+    ctx = context.current() if context.has_ctx() else None
+    if ctx and ctx.service_catalog_cache:
+        cached_catalog, parsed = ctx.service_catalog_cache
+        if cached_catalog == catalog:
+            return parsed
 
+    parsed = _parse_catalog(catalog)
+    if ctx:
+        ctx.service_catalog_cache = (catalog, parsed)
+
+    return parsed
+
+
+def _parse_catalog(catalog):
+    parsed = {}
+    if catalog:
+        for service in json.loads(catalog):
+            # services could have no endpoints, e.g. if they are disabled
+            if service['type'] in parsed or not service.get('endpoints'):
+                continue
 
-def _get_case_insensitive(dictionary, key):
-    for k, v in dictionary.items():
-        if str(k).lower() == str(key).lower():
-            return v
+            endpoints = parsed[service['type']] = {}
+            for k, v in service['endpoints'][0].items():
+                endpoints.setdefault(str(k).lower(), v)
 
-    #this will raise an exception as usual if key was not found
-    return dictionary[key]
+    return parsed
@@ -17,6 +17,8 @@ from cinderclient.v1 import client as cinder_client
 
 from savanna import context
 from savanna.utils.openstack import base
+from savanna.utils.openstack import ratelimit
+from savanna.utils.openstack import singleflight
 
 
 def client():
@@ -26,10 +28,19 @@ def client():
     tenant = headers['X-Tenant-Id']
     volume_url = base.url_for(headers, 'volume')
 
+    return base.get_cached_client(('volume', token, tenant, volume_url),
+                                  _create_client, username, token, tenant,
+                                  volume_url)
+
+
+def _create_client(username, token, tenant, volume_url):
     cinder = cinder_client.Client(username, token, tenant, volume_url)
 
     cinder.client.auth_token = token
     cinder.client.management_url = volume_url
+    api_key = ('volume', volume_url, tenant)
+    cinder.client.request = singleflight.coalesce_reads(
+        ratelimit.limit_requests(cinder.client.request, api_key), api_key)
 
     return cinder
 
@@ -40,3 +51,8 @@ def get_volumes():
 
 def get_volume(volume_id):
     return client().volumes.get(volume_id)
+
+
+def get_limits():
+    limits = client().limits.get().absolute
+    return dict((l.name, l.value) for l in limits)
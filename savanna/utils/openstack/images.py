@@ -13,13 +13,70 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+import time
+import urllib
+
+from novaclient import base
 from novaclient.v1_1 import images
+from oslo.config import cfg
+
+from savanna import context
+
 
+opts = [
+    cfg.IntOpt('image_cache_ttl',
+               default=60,
+               help='Time in seconds during which image metadata fetched '
+                    'from the image registry is reused, 0 disables caching')
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts)
 
 PROP_DESCR = '_savanna_description'
 PROP_USERNAME = '_savanna_username'
 PROP_TAG = '_savanna_tag_'
 
+LIST_PAGE_SIZE = 100
+
+# (tenant id, image id) -> (image info, expiration time)
+_IMAGES = {}
+# (tenant id, sorted tags) -> (list of image infos, expiration time)
+_IMAGE_LISTS = {}
+
+
+def _get_tenant():
+    return context.current().tenant_id if context.has_ctx() else None
+
+
+def _get_cached(cache, key):
+    cached = cache.get(key)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
+    return None
+
+
+def _put_cached(cache, key, value):
+    if not CONF.image_cache_ttl:
+        return
+
+    now = time.time()
+    for cached_key, (_, expires_at) in cache.items():
+        if expires_at <= now:
+            cache.pop(cached_key, None)
+    cache[key] = (value, now + CONF.image_cache_ttl)
+
+
+def invalidate_image(image):
+    """Drop cached metadata of the image for all tenants."""
+    image_id = base.getid(image)
+    for key in _IMAGES.keys():
+        if key[1] == image_id:
+            _IMAGES.pop(key, None)
+    _IMAGE_LISTS.clear()
+
 
 def _iter_tags(meta):
     for key in meta:
@@ -74,6 +131,57 @@ class SavannaImageManager(images.ImageManager):
     """
     resource_class = SavannaImage
 
+    def _wrap(self, info):
+        return self.resource_class(self, copy.deepcopy(info), loaded=True)
+
+    def get(self, image):
+        """Get an image using the tenant-scoped metadata cache."""
+        key = (_get_tenant(), base.getid(image))
+        info = _get_cached(_IMAGES, key)
+        if info is None:
+            info = super(SavannaImageManager, self).get(image)._info
+            _put_cached(_IMAGES, key, info)
+
+        return self._wrap(info)
+
+    def _list_paged(self, filters):
+        infos = []
+        marker = None
+        while True:
+            params = dict(filters, limit=LIST_PAGE_SIZE)
+            if marker:
+                params['marker'] = marker
+            page = self._list('/images/detail?%s' %
+                              urllib.urlencode(sorted(params.items())),
+                              'images')
+            infos += [image._info for image in page]
+
+            if len(page) < LIST_PAGE_SIZE:
+                return infos
+            marker = page[-1].id
+
+    def _list_cached(self, tags):
+        """List images which could have all of the specified tags.
+
+        Tags are filtered on the image API side using property filters.
+        Images API which doesn't support them returns all images, so the
+        result should be filtered by the caller anyway. If all images of
+        the tenant are already cached, they are returned instead.
+        """
+        tenant = _get_tenant()
+        tags = tuple(sorted(set(tags)))
+
+        infos = _get_cached(_IMAGE_LISTS, (tenant, tags))
+        if infos is None:
+            infos = _get_cached(_IMAGE_LISTS, (tenant, ()))
+        if infos is None:
+            filters = dict(('property-' + PROP_TAG + tag, 'True')
+                           for tag in tags)
+            infos = self._list_paged(filters)
+            _put_cached(_IMAGE_LISTS, (tenant, tags), infos)
+
+        return [self._wrap(info) for info in infos]
+
     def set_description(self, image, username, description=None):
         """Sets human-readable information for image.
 
@@ -85,38 +193,43 @@ class SavannaImageManager(images.ImageManager):
             PROP_DESCR: description,
             PROP_USERNAME: username,
         })
+        invalidate_image(image)
 
     def unset_description(self, image):
         """Unsets all Savanna-related information.
 
         It removes username, description and tags from the specified image.
         """
-        image = self.get(image)
+        image = super(SavannaImageManager, self).get(image)
         meta = [PROP_TAG + tag for tag in image.tags]
         if image.description is not None:
             meta += [PROP_DESCR]
         if image.username is not None:
             meta += [PROP_USERNAME]
         self.delete_meta(image, meta)
+        invalidate_image(image)
 
     def tag(self, image, tags):
         """Adds tags to the specified image."""
         tags = _ensure_tags(tags)
 
         self.set_meta(image, dict((PROP_TAG + tag, True) for tag in tags))
+        invalidate_image(image)
 
     def untag(self, image, tags):
         """Removes tags from the specified image."""
         tags = _ensure_tags(tags)
 
         self.delete_meta(image, [PROP_TAG + tag for tag in tags])
+        invalidate_image(image)
 
     def list_by_tags(self, tags):
         """Returns images having all of the specified tags."""
         tags = _ensure_tags(tags)
-        return [i for i in self.list() if set(tags).issubset(i.tags)]
+        return [i for i in self._list_cached(tags)
+                if set(tags).issubset(i.tags)]
 
     def list_registered(self, tags=None):
         tags = _ensure_tags(tags)
-        return [i for i in self.list()
+        return [i for i in self._list_cached(tags)
                 if i.username and set(tags).issubset(i.tags)]
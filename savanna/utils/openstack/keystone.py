@@ -14,11 +14,15 @@
 # limitations under the License.
 
 from keystoneclient.v2_0 import client as keystone_client
+from oslo.config import cfg
 
 from savanna import context
 from savanna.utils.openstack import base
 
 
+CONF = cfg.CONF
+
+
 def client():
     headers = context.current().headers
     username = headers['X-User-Name']
@@ -26,7 +30,22 @@ def client():
     tenant = headers['X-Tenant-Id']
     identity_url = base.url_for(headers, 'identity')
 
+    return base.get_cached_client(('identity', token, tenant, identity_url),
+                                  _create_client, username, token, tenant,
+                                  identity_url)
+
+
+def _create_client(username, token, tenant, identity_url):
     keystone = keystone_client.Client(username=username, token=token,
                                       tenant_id=tenant, auth_url=identity_url)
 
     return keystone
+
+
+def client_for_admin():
+    auth_url = "%s://%s:%s/v2.0/" % (
+        CONF.os_auth_protocol, CONF.os_auth_host, CONF.os_auth_port)
+    return keystone_client.Client(username=CONF.os_admin_username,
+                                  password=CONF.os_admin_password,
+                                  tenant_name=CONF.os_admin_tenant_name,
+                                  auth_url=auth_url)
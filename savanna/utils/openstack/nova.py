@@ -13,13 +13,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import time
+
 from novaclient import exceptions as nova_ex
 from novaclient.v1_1 import client as nova_client
+from oslo.config import cfg
 
 from savanna import context
 import savanna.utils.openstack.base as base
 from savanna.utils.openstack import images
 from savanna.utils.openstack import keypairs
+from savanna.utils.openstack import ratelimit
+from savanna.utils.openstack import singleflight
+
+
+opts = [
+    cfg.IntOpt('flavor_cache_ttl',
+               default=300,
+               help='Time in seconds during which the flavors catalog of '
+                    'the tenant is cached, 0 disables caching')
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts)
+
+# Hardware profile of the flavor: ram and swap are in MB,
+# disk and ephemeral are in GB
+HardwareProfile = collections.namedtuple(
+    'HardwareProfile',
+    ['id', 'name', 'vcpus', 'ram', 'disk', 'ephemeral', 'swap'])
+
+# tenant id -> (flavor id -> HardwareProfile, expiration time)
+_FLAVORS = {}
 
 
 def client():
@@ -29,11 +55,20 @@ def client():
     tenant = headers['X-Tenant-Id']
     compute_url = base.url_for(headers, 'compute')
 
+    return base.get_cached_client(('compute', token, tenant, compute_url),
+                                  _create_client, username, token, tenant,
+                                  compute_url)
+
+
+def _create_client(username, token, tenant, compute_url):
     nova = nova_client.Client(username, token, tenant,
                               auth_url=compute_url)
 
     nova.client.auth_token = token
     nova.client.management_url = compute_url
+    api_key = ('compute', compute_url, tenant)
+    nova.client.request = singleflight.coalesce_reads(
+        ratelimit.limit_requests(nova.client.request, api_key), api_key)
     nova.images = images.SavannaImageManager(nova)
     if not hasattr(nova.keypairs, 'get'):
         nova.keypairs = keypairs.SavannaKeypairManager(nova)
@@ -49,6 +84,61 @@ def get_flavor(**kwargs):
     return client().flavors.find(**kwargs)
 
 
+def _make_profile(flavor):
+    # swap is reported as an empty string if flavor has no swap
+    swap = getattr(flavor, 'swap', 0) or 0
+    return HardwareProfile(id=str(flavor.id),
+                           name=flavor.name,
+                           vcpus=flavor.vcpus,
+                           ram=flavor.ram,
+                           disk=flavor.disk,
+                           ephemeral=getattr(
+                               flavor, 'OS-FLV-EXT-DATA:ephemeral', 0),
+                           swap=swap)
+
+
+def get_flavor_profiles():
+    """Return cached flavors catalog as a dict of hardware profiles.
+
+    Catalog is loaded once per flavor_cache_ttl for each tenant.
+    """
+    tenant = context.current().tenant_id if context.has_ctx() else None
+
+    cached = _FLAVORS.get(tenant)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
+    profiles = dict((str(flavor.id), _make_profile(flavor))
+                    for flavor in client().flavors.list())
+    if CONF.flavor_cache_ttl:
+        _FLAVORS[tenant] = (profiles, time.time() + CONF.flavor_cache_ttl)
+
+    return profiles
+
+
+def get_flavor_profile(flavor_id):
+    """Return HardwareProfile of the flavor or None if it doesn't exist.
+
+    Flavors missing in the cached catalog (private or just created ones)
+    are requested from Nova directly, as well as all flavors if caching
+    is disabled.
+    """
+    flavor_id = str(flavor_id)
+    profiles = {}
+    if CONF.flavor_cache_ttl:
+        profiles = get_flavor_profiles()
+        if flavor_id in profiles:
+            return profiles[flavor_id]
+
+    try:
+        profile = _make_profile(client().flavors.get(flavor_id))
+    except nova_ex.NotFound:
+        return None
+
+    profiles[flavor_id] = profile
+    return profile
+
+
 def get_images():
     return [image.id for image in client().images.list()]
 
@@ -0,0 +1,145 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Adaptive client-side limiting of concurrent OpenStack API requests.
+
+Concurrency of requests to each endpoint is controlled per tenant using
+additive-increase/multiplicative-decrease: successful requests slowly
+increase the number of allowed concurrent requests, while throttled ones
+(413, 429 and 503 responses) halve it and are retried after a delay.
+"""
+
+import collections
+
+from eventlet import event
+from oslo.config import cfg
+
+from savanna import context
+from savanna.openstack.common import log as logging
+
+
+LOG = logging.getLogger(__name__)
+
+opts = [
+    cfg.IntOpt('os_api_max_concurrency',
+               default=20,
+               help='Maximum number of concurrent requests to a single '
+                    'OpenStack API endpoint for a tenant, the actual limit '
+                    'is decreased when the API throttles requests, '
+                    '0 disables limiting'),
+    cfg.IntOpt('os_api_throttle_retries',
+               default=5,
+               help='Number of times throttled OpenStack API request is '
+                    'retried'),
+    cfg.FloatOpt('os_api_throttle_backoff',
+                 default=1.0,
+                 help='Initial delay in seconds before retrying throttled '
+                      'OpenStack API request, doubled on each retry')
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts)
+
+THROTTLING_CODES = (413, 429, 503)
+
+# (service type, endpoint, tenant) -> AdaptiveLimiter
+_LIMITERS = {}
+
+
+class AdaptiveLimiter(object):
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._waiters = collections.deque()
+
+    def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = event.Event()
+            self._waiters.append(waiter)
+            waiter.wait()
+
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake_up()
+
+    def on_success(self):
+        # limit grows by one after a window of successful requests
+        self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        self._wake_up()
+
+    def on_throttle(self):
+        self.limit = max(1.0, self.limit / 2)
+
+    def _wake_up(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            self._waiters.popleft().send()
+            free -= 1
+
+
+def get_limiter(key):
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        limiter = AdaptiveLimiter(CONF.os_api_max_concurrency)
+        _LIMITERS[key] = limiter
+
+    return limiter
+
+
+def is_retried(error):
+    """Check if the error is a throttling one already retried by the
+    limiter, so it shouldn't be retried again by callers.
+    """
+    return (bool(CONF.os_api_max_concurrency) and
+            getattr(error, 'code', None) in THROTTLING_CODES)
+
+
+def limit_requests(request, key):
+    """Wrap request function of the API client with the limiter."""
+    if not CONF.os_api_max_concurrency:
+        return request
+
+    def wrapper(*args, **kwargs):
+        limiter = get_limiter(key)
+        attempt = 0
+        while True:
+            limiter.acquire()
+            try:
+                result = request(*args, **kwargs)
+            except Exception as e:
+                if getattr(e, 'code', None) not in THROTTLING_CODES:
+                    raise
+
+                limiter.on_throttle()
+                if attempt >= CONF.os_api_throttle_retries:
+                    raise
+            else:
+                limiter.on_success()
+                return result
+            finally:
+                limiter.release()
+
+            delay = max(getattr(e, 'retry_after', 0),
+                        CONF.os_api_throttle_backoff * 2 ** attempt)
+            attempt += 1
+            LOG.debug("Request to %s was throttled with code %s, retrying "
+                      "in %s seconds, concurrency limit is %s"
+                      % (key[1], e.code, delay, int(limiter.limit)))
+            context.sleep(delay)
+
+    return wrapper
@@ -0,0 +1,77 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Coalescing of identical concurrent read requests to OpenStack APIs.
+
+If a GET request is issued while the same request (same endpoint, URL
+and auth token) of another green thread is in flight, it waits for the
+result of the latter instead of sending its own request.
+"""
+
+import copy
+import sys
+
+from eventlet import event
+from oslo.config import cfg
+
+from savanna.openstack.common import excutils
+
+
+opts = [
+    cfg.BoolOpt('os_api_coalesce_reads',
+                default=True,
+                help='Merge identical concurrent GET requests to OpenStack '
+                     'APIs into a single request')
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts)
+
+# (client key, url, auth token) -> event with result of the request
+_CALLS = {}
+
+
+def coalesce_reads(request, key):
+    """Wrap request function of the API client with coalescing of reads."""
+    if not CONF.os_api_coalesce_reads:
+        return request
+
+    def wrapper(url, method, **kwargs):
+        if method != 'GET':
+            return request(url, method, **kwargs)
+
+        headers = kwargs.get('headers') or {}
+        call_key = (key, url, headers.get('X-Auth-Token'))
+
+        call = _CALLS.get(call_key)
+        if call is not None:
+            resp, body = call.wait()
+            # response body is parsed into resources, don't share it
+            return resp, copy.deepcopy(body)
+
+        call = event.Event()
+        _CALLS[call_key] = call
+        try:
+            result = request(url, method, **kwargs)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                del _CALLS[call_key]
+                call.send_exception(*sys.exc_info())
+
+        del _CALLS[call_key]
+        call.send(result)
+        return result
+
+    return wrapper
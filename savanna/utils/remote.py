@@ -14,42 +14,169 @@
 # limitations under the License.
 
 import contextlib
-
+import hashlib
+import inspect
+import pipes
+import re
+import socket
+import time
+import uuid
+
+from oslo.config import cfg
 import paramiko
 
 from savanna import exceptions as ex
+from savanna.openstack.common import log as logging
 from savanna.utils import crypto
+from savanna.utils import metrics
 from savanna.utils.openstack import nova
 
 
-def setup_ssh_connection(host, username, private_key):
-    """Setup SSH connection to the host using username and private key."""
+ssh_opts = [
+    cfg.IntOpt('ssh_connect_timeout',
+               default=30,
+               help='Timeout in seconds for establishing TCP connection '
+                    'to the cluster node'),
+    cfg.IntOpt('ssh_banner_timeout',
+               default=30,
+               help='Timeout in seconds for waiting for the SSH banner '
+                    'of the cluster node'),
+    cfg.IntOpt('ssh_auth_timeout',
+               default=30,
+               help='Timeout in seconds for SSH authentication response '
+                    'of the cluster node'),
+    cfg.IntOpt('ssh_keepalive_interval',
+               default=30,
+               help='Interval in seconds between SSH keepalive packets, '
+                    '0 disables keepalive'),
+    cfg.IntOpt('ssh_host_failure_threshold',
+               default=3,
+               help='Number of consecutive connection timeouts after which '
+                    'the host is considered unavailable and connections '
+                    'to it fail immediately, 0 disables this check'),
+    cfg.IntOpt('ssh_host_failure_cooldown',
+               default=60,
+               help='Time in seconds after which connection to the '
+                    'unavailable host is attempted again'),
+    cfg.FloatOpt('ssh_slow_operation_threshold',
+                 default=10,
+                 help='Remote operations which take longer than this '
+                      'number of seconds are logged on debug level, '
+                      '0 disables logging of slow operations')
+]
+
+CONF = cfg.CONF
+CONF.register_opts(ssh_opts)
+CONF.import_opt('use_floating_ips', 'savanna.config')
+CONF.import_opt('use_gateway', 'savanna.config')
+
+LOG = logging.getLogger(__name__)
+
+# host -> (number of consecutive connection timeouts, last timeout time)
+_HOST_FAILURES = {}
+
+# banner and auth timeouts are supported by recent paramiko versions only
+_CONNECT_ARGS = inspect.getargspec(paramiko.SSHClient.connect).args
+
+# gateway instance id -> (cluster id, SSH connection to the gateway)
+_GATEWAYS = {}
+
+
+def _check_host_available(host):
+    threshold = CONF.ssh_host_failure_threshold
+    failures, last_failure = _HOST_FAILURES.get(host, (0, 0))
+    if threshold and failures >= threshold:
+        if time.time() - last_failure < CONF.ssh_host_failure_cooldown:
+            raise ex.RemoteHostUnavailableException(host, failures)
+
+
+def _register_host_failure(host):
+    failures, _ = _HOST_FAILURES.get(host, (0, 0))
+    _HOST_FAILURES[host] = (failures + 1, time.time())
+
+
+def _register_host_success(host):
+    _HOST_FAILURES.pop(host, None)
+
+
+def _get_connect_kwargs(sock=None):
+    kwargs = {'timeout': CONF.ssh_connect_timeout}
+    if sock is not None:
+        # 'sock' argument is supported since paramiko 1.10, so it is passed
+        # only when a gateway is used
+        kwargs['sock'] = sock
+    if 'banner_timeout' in _CONNECT_ARGS:
+        kwargs['banner_timeout'] = CONF.ssh_banner_timeout
+    if 'auth_timeout' in _CONNECT_ARGS:
+        kwargs['auth_timeout'] = CONF.ssh_auth_timeout
+
+    return kwargs
+
+
+def setup_ssh_connection(host, username, private_key, sock=None):
+    """Setup SSH connection to the host using username and private key.
+
+    If sock is specified, it is used as a transport for SSH connection
+    instead of a new TCP connection to the host.
+
+    Hosts which repeatedly time out are considered unavailable for
+    ssh_host_failure_cooldown seconds, so connection attempts to them
+    fail immediately instead of waiting for the timeout again.
+    """
+    _check_host_available(host)
+
     if type(private_key) in [str, unicode]:
         private_key = crypto.to_paramiko_private_key(private_key)
     ssh = paramiko.SSHClient()
     ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    ssh.connect(host, username=username, pkey=private_key)
+    try:
+        with metrics.timed('connect', host,
+                           CONF.ssh_slow_operation_threshold):
+            ssh.connect(host, username=username, pkey=private_key,
+                        **_get_connect_kwargs(sock))
+    except socket.timeout:
+        _register_host_failure(host)
+        raise
+
+    _register_host_success(host)
+
+    if CONF.ssh_keepalive_interval:
+        ssh.get_transport().set_keepalive(CONF.ssh_keepalive_interval)
 
     return ssh
 
 
+def _run_on_channel(ssh_connection, cmd, stdin_data=None, description=None):
+    with metrics.timed('exec', description or cmd,
+                       CONF.ssh_slow_operation_threshold) as sample:
+        chan = ssh_connection.get_transport().open_session()
+        chan.exec_command(cmd)
+        if stdin_data is not None:
+            chan.sendall(stdin_data)
+            chan.shutdown_write()
+        ret_code = chan.recv_exit_status()
+
+        stdout = ''
+        while chan.recv_ready():
+            stdout += chan.recv(1024)
+
+        stderr = ''
+        while chan.recv_stderr_ready():
+            stderr += chan.recv_stderr(1024)
+
+        sample.ret_code = ret_code
+        sample.bytes = len(stdin_data or '') + len(stdout) + len(stderr)
+
+    return ret_code, stdout, stderr
+
+
 def execute_command(ssh_connection, cmd, get_stderr=False,
                     raise_when_error=True):
     """Execute specified command remotely using existing ssh connection.
 
     Return exit code, stdout data and stderr data of the executed command.
     """
-    chan = ssh_connection.get_transport().open_session()
-    chan.exec_command(cmd)
-    ret_code = chan.recv_exit_status()
-
-    stdout = ''
-    while chan.recv_ready():
-        stdout += chan.recv(1024)
-
-    stderr = ''
-    while chan.recv_stderr_ready():
-        stderr += chan.recv_stderr(1024)
+    ret_code, stdout, stderr = _run_on_channel(ssh_connection, cmd)
 
     if ret_code and raise_when_error:
         raise ex.RemoteCommandException(cmd=cmd, ret_code=ret_code,
@@ -62,13 +189,91 @@ def execute_command(ssh_connection, cmd, get_stderr=False,
         return ret_code, stdout
 
 
+def _generate_batch_script(cmds, marker, stop_on_error):
+    script = ''
+    for idx, cmd in enumerate(cmds):
+        script += ("printf '%(m)s:%(i)d\\n'; printf '%(m)s:%(i)d\\n' >&2\n"
+                   "( %(cmd)s\n) < /dev/null\n"
+                   "rc=$?\n"
+                   "printf '\\n%(m)s:%(i)d:%%d\\n' $rc\n"
+                   "printf '\\n%(m)s:%(i)d:%%d\\n' $rc >&2\n"
+                   % {'m': marker, 'i': idx, 'cmd': cmd})
+        if stop_on_error:
+            script += 'if [ $rc -ne 0 ]; then exit $rc; fi\n'
+
+    return script
+
+
+def _parse_batch_output(output, marker):
+    pattern = re.compile(r'%(m)s:(\d+)\n(.*?)\n%(m)s:\1:(\d+)\n'
+                         % {'m': re.escape(marker)}, re.DOTALL)
+    return dict((int(idx), (int(ret_code), data))
+                for idx, data, ret_code in pattern.findall(output))
+
+
+def execute_commands(ssh_connection, cmds, stop_on_error=True,
+                     raise_when_error=True):
+    """Execute list of commands remotely as a single script.
+
+    All commands are sent to the remote shell in one channel, so the
+    whole batch costs a single round trip. Each command is run in its
+    own subshell with stdin redirected from /dev/null.
+
+    Return list of (exit code, stdout data, stderr data) tuples, one per
+    executed command. If stop_on_error is set, commands following the
+    first failed one are not executed and not included in the result.
+    If raise_when_error is set, RemoteCommandException is raised for the
+    first failed command, and also if the remote shell exited abnormally
+    or returned results for fewer commands than were expected.
+    """
+    if not cmds:
+        return []
+
+    marker = '__savanna_step_%s' % uuid.uuid4().hex
+    script = _generate_batch_script(cmds, marker, stop_on_error)
+    shell_ret_code, stdout, stderr = _run_on_channel(
+        ssh_connection, '/bin/bash -s', stdin_data=script,
+        description='; '.join(cmds))
+
+    steps_out = _parse_batch_output(stdout, marker)
+    steps_err = _parse_batch_output(stderr, marker)
+
+    results = []
+    for idx, cmd in enumerate(cmds):
+        if idx not in steps_out:
+            break
+
+        ret_code, step_stdout = steps_out[idx]
+        step_stderr = steps_err.get(idx, (ret_code, ''))[1]
+
+        if ret_code and raise_when_error:
+            raise ex.RemoteCommandException(cmd=cmd, ret_code=ret_code,
+                                            stdout=step_stdout,
+                                            stderr=step_stderr)
+
+        results.append((ret_code, step_stdout, step_stderr))
+
+    if raise_when_error and (shell_ret_code or len(results) < len(cmds)):
+        # all parsed steps succeeded, so the shell itself died or its
+        # output was truncated
+        raise ex.RemoteCommandException(cmd=cmds[min(len(results),
+                                                     len(cmds) - 1)],
+                                        ret_code=shell_ret_code or None,
+                                        stdout=stdout, stderr=stderr)
+
+    return results
+
+
 def write_file_to(sftp, remote_file, data):
     """Create remote file using existing ssh connection and write the given
     data to it.
     """
-    fl = sftp.file(remote_file, 'w')
-    fl.write(data)
-    fl.close()
+    with metrics.timed('sftp_write', remote_file,
+                       CONF.ssh_slow_operation_threshold) as sample:
+        fl = sftp.file(remote_file, 'w')
+        fl.write(data)
+        fl.close()
+        sample.bytes = len(data)
 
 
 def write_files_to(sftp, files):
@@ -78,11 +283,47 @@ def write_files_to(sftp, files):
         write_file_to(sftp, fl, data)
 
 
+def _checksum(data):
+    if isinstance(data, unicode):
+        data = data.encode('utf-8')
+    return hashlib.md5(data).hexdigest()
+
+
+def get_changed_files(ssh_connection, files, use_sudo=False):
+    """Return subset of file->data dictionary which differs from the remote
+    files.
+
+    Checksums of all remote files are calculated in a single command.
+    Files which don't exist or can't be read remotely are treated as
+    changed.
+    """
+    if not files:
+        return {}
+
+    cmd = 'md5sum %s' % ' '.join(pipes.quote(fl) for fl in files)
+    if use_sudo:
+        cmd = 'sudo ' + cmd
+    _, stdout = execute_command(ssh_connection, cmd, raise_when_error=False)
+
+    remote_checksums = {}
+    for line in stdout.splitlines():
+        spl = line.split(None, 1)
+        if len(spl) == 2:
+            remote_checksums[spl[1]] = spl[0]
+
+    return dict((fl, data) for fl, data in files.iteritems()
+                if remote_checksums.get(fl) != _checksum(data))
+
+
 def read_file_from(sftp, remote_file):
     """Read remote file from the specified host and return given data."""
-    fl = sftp.file(remote_file, 'r')
-    data = fl.read()
-    fl.close()
+    with metrics.timed('sftp_read', remote_file,
+                       CONF.ssh_slow_operation_threshold) as sample:
+        fl = sftp.file(remote_file, 'r')
+        data = fl.read()
+        fl.close()
+        sample.bytes = len(data)
+
     return data
 
 
@@ -94,6 +335,50 @@ def replace_remote_string(ssh_connection, remote_file, old_str, new_str):
     execute_command(ssh_connection, cmd)
 
 
+def _use_gateway():
+    return CONF.use_floating_ips and CONF.use_gateway
+
+
+def _connect_to_instance(instance, sock=None):
+    username = nova.get_node_group_image_username(instance.node_group)
+    host = instance.internal_ip if sock else instance.management_ip
+    return setup_ssh_connection(host, username,
+                                instance.node_group.cluster.private_key,
+                                sock=sock)
+
+
+def _is_active(ssh):
+    return ssh and ssh.get_transport() and ssh.get_transport().is_active()
+
+
+def _get_gateway_connection(gateway):
+    cluster_id = gateway.node_group.cluster.id
+    _, ssh = _GATEWAYS.get(gateway.id, (None, None))
+    if _is_active(ssh):
+        return ssh
+
+    ssh = _connect_to_instance(gateway)
+
+    # connection could be established concurrently by another thread
+    _, current = _GATEWAYS.get(gateway.id, (None, None))
+    if _is_active(current):
+        ssh.close()
+        return current
+
+    # the gateway could be changed on scaling, close connections to the
+    # previous one
+    close_gateway_connection(cluster_id)
+    _GATEWAYS[gateway.id] = (cluster_id, ssh)
+    return ssh
+
+
+def close_gateway_connection(cluster_id):
+    for gateway_id, (gw_cluster_id, ssh) in _GATEWAYS.items():
+        if gw_cluster_id == cluster_id:
+            del _GATEWAYS[gateway_id]
+            ssh.close()
+
+
 class InstanceInteropHelper(object):
     def __init__(self, instance):
         self.instance = instance
@@ -106,15 +391,28 @@ class InstanceInteropHelper(object):
         self.bulk.close()
 
     def ssh_connection(self):
-        username = nova.get_node_group_image_username(self.instance.node_group)
-        return setup_ssh_connection(
-            self.instance.management_ip, username,
-            self.instance.node_group.cluster.private_key)
+        if _use_gateway():
+            gateway = self.instance.node_group.cluster.gateway
+            if gateway is not None and gateway.id != self.instance.id:
+                # all nodes share a single transport to the gateway,
+                # each connection is a separate channel over it
+                transport = _get_gateway_connection(gateway).get_transport()
+                sock = transport.open_channel(
+                    'direct-tcpip', (self.instance.internal_ip, 22), ('', 0))
+                return _connect_to_instance(self.instance, sock)
+
+        return _connect_to_instance(self.instance)
 
     def execute_command(self, cmd, get_stderr=False, raise_when_error=True):
         with contextlib.closing(self.ssh_connection()) as ssh:
             return execute_command(ssh, cmd, get_stderr, raise_when_error)
 
+    def execute_commands(self, cmds, stop_on_error=True,
+                         raise_when_error=True):
+        with contextlib.closing(self.ssh_connection()) as ssh:
+            return execute_commands(ssh, cmds, stop_on_error,
+                                    raise_when_error)
+
     def write_file_to(self, remote_file, data):
         with contextlib.closing(self.ssh_connection()) as ssh:
             return write_file_to(ssh.open_sftp(), remote_file, data)
@@ -123,6 +421,14 @@ class InstanceInteropHelper(object):
         with contextlib.closing(self.ssh_connection()) as ssh:
             return write_files_to(ssh.open_sftp(), files)
 
+    def get_changed_files(self, files, use_sudo=False):
+        with contextlib.closing(self.ssh_connection()) as ssh:
+            return get_changed_files(ssh, files, use_sudo)
+
+    def push_files_to(self, files):
+        with self as bulk:
+            return bulk.push_files_to(files)
+
     def read_file_from(self, remote_file):
         with contextlib.closing(self.ssh_connection()) as ssh:
             return read_file_from(ssh.open_sftp(), remote_file)
@@ -162,12 +468,35 @@ class BulkInstanceInteropHelper(object):
         return execute_command(self.ssh_connection(), cmd, get_stderr,
                                raise_when_error)
 
+    def execute_commands(self, cmds, stop_on_error=True,
+                         raise_when_error=True):
+        return execute_commands(self.ssh_connection(), cmds, stop_on_error,
+                                raise_when_error)
+
     def write_file_to(self, remote_file, data):
         return write_file_to(self.sftp_connection(), remote_file, data)
 
     def write_files_to(self, files):
         return write_files_to(self.sftp_connection(), files)
 
+    def get_changed_files(self, files, use_sudo=False):
+        return get_changed_files(self.ssh_connection(), files, use_sudo)
+
+    def push_files_to(self, files):
+        """Write only files which differ from the remote ones.
+
+        Return sorted list of the written files, so callers could
+        reconfigure only what was actually changed.
+        """
+        changed = self.get_changed_files(files)
+        if changed:
+            write_files_to(self.sftp_connection(), changed)
+
+        LOG.debug("Pushed %s of %s files to instance %s: %s",
+                  len(changed), len(files),
+                  self.helper.instance.instance_name, sorted(changed))
+        return sorted(changed)
+
     def read_file_from(self, remote_file):
         return read_file_from(self.sftp_connection(), remote_file)
 
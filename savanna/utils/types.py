@@ -15,6 +15,8 @@
 
 
 class FrozenList(list):
+    __slots__ = ()
+
     def append(self, p_object):
         raise FrozenClassError(self)
 
@@ -57,8 +59,13 @@ class FrozenList(list):
     def __setslice__(self, i, j, y):
         raise FrozenClassError(self)
 
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
 
 class FrozenDict(dict):
+    __slots__ = ()
+
     def clear(self):
         raise FrozenClassError(self)
 
@@ -80,6 +87,9 @@ class FrozenDict(dict):
     def __setitem__(self, i, y):
         raise FrozenClassError(self)
 
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
 
 class FrozenClassError(Exception):
     def __init__(self, instance):
@@ -58,6 +58,7 @@ setuptools.setup(
     entry_points={
         'console_scripts': [
             'savanna-api = savanna.cli.savanna_api:main',
+            'savanna-conductor = savanna.cli.savanna_conductor:main',
             'savanna-db-manage = savanna.db.migration.cli:main',
         ]
     },
@@ -0,0 +1,195 @@
+# Copyright (c) 2013 Mirantis Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures overhead of conductor writes.
+
+By default the database layer is replaced with a stub, so only the time spent
+by ConductorManager preparing values (applying defaults, templates, copying)
+is measured. Use --use-db to run the same workload against a temporary
+sqlite database. Run it on two revisions to compare them.
+
+Besides time, allocations are measured: with the stub the number and total
+size of objects passed to the database which were copied instead of being
+taken from the caller's values, and in both modes the number of objects
+left alive after the operations (gc.get_objects() delta).
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+
+from oslo.config import cfg
+
+
+possible_topdir = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]),
+                                                os.pardir,
+                                                os.pardir))
+if os.path.exists(os.path.join(possible_topdir,
+                               'savanna',
+                               '__init__.py')):
+    sys.path.insert(0, possible_topdir)
+
+
+from savanna.conductor import manager
+from savanna import context
+from savanna.db import api as db_api
+from savanna.openstack.common.db.sqlalchemy import session
+
+
+cli_opts = [
+    cfg.IntOpt('iterations', default=1000,
+               help='number of operations of each kind'),
+    cfg.IntOpt('node-groups', default=5,
+               help='number of node groups in the created cluster'),
+    cfg.BoolOpt('use-db', default=False,
+                help='use temporary sqlite database instead of a stub'),
+]
+
+CONF = cfg.CONF
+CONF.register_cli_opts(cli_opts)
+
+
+class StubDb(object):
+    def __init__(self):
+        self.written = None
+
+    def __getattr__(self, name):
+        def write(context, *args):
+            self.written = args[-1]
+            return args[-1]
+
+        return write
+
+
+def _iter_objects(obj):
+    yield obj
+    if isinstance(obj, dict):
+        for key, value in obj.iteritems():
+            for child in _iter_objects(key):
+                yield child
+            for child in _iter_objects(value):
+                yield child
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            for child in _iter_objects(item):
+                yield child
+
+
+def _copied(written, values):
+    """Return number and total size of objects copied from values."""
+    original = set(id(obj) for obj in _iter_objects(values))
+    count = size = 0
+    for obj in _iter_objects(written):
+        # small ints and interned strings are shared anyway
+        if id(obj) not in original and isinstance(obj, (dict, list, tuple)):
+            count += 1
+            size += sys.getsizeof(obj)
+
+    return count, size
+
+
+def _make_cluster(node_groups):
+    return {
+        "plugin_name": "vanilla",
+        "hadoop_version": "1.2.1",
+        "name": "cluster",
+        "user_keypair_id": "keypair",
+        "cluster_configs": {"HDFS": {"dfs.replication": 2}},
+        "node_groups": [
+            {
+                "name": "ng_%d" % idx,
+                "flavor_id": "42",
+                "node_processes": ["datanode", "tasktracker"],
+                "node_configs": {"HDFS": {"data_node_heap_size": 1024}},
+                "count": 10,
+            } for idx in xrange(node_groups)
+        ],
+        "info": {"HDFS": {"Web UI": "http://127.0.0.1:50070"}},
+    }
+
+
+def _run(name, func, db):
+    gc.collect()
+    objects = len(gc.get_objects())
+    start = time.time()
+    for idx in xrange(CONF.iterations):
+        func(idx)
+    elapsed = time.time() - start
+    gc.collect()
+    retained = len(gc.get_objects()) - objects
+
+    line = "%-16s %8.1f us/op %8.2f retained objs/op" % (
+        name, elapsed * 10 ** 6 / CONF.iterations,
+        float(retained) / CONF.iterations)
+    if isinstance(db, StubDb):
+        values = func(CONF.iterations)
+        line += " %4d copied objs/op %7d copied bytes/op" % _copied(
+            db.written, values)
+
+    print line
+
+
+def main():
+    CONF(sys.argv[1:], project='conductor_benchmark')
+
+    context.set_ctx(context.Context('user', 'tenant', 'token', {}))
+    conductor = manager.ConductorManager()
+
+    db_path = None
+    if CONF.use_db:
+        db_fd, db_path = tempfile.mkstemp()
+        os.close(db_fd)
+        session.set_defaults('sqlite:///' + db_path, db_path)
+        db_api.setup_db()
+    else:
+        conductor.db = StubDb()
+
+    ctx = context.ctx()
+    cluster = _make_cluster(CONF.node_groups)
+    cluster_id = None
+    if CONF.use_db:
+        cluster_id = conductor.cluster_create(
+            ctx, dict(cluster, name='updated'))['id']
+
+    # every operation returns values passed to the conductor
+    def create(idx):
+        values = dict(cluster, name='cluster-%d' % idx)
+        conductor.cluster_create(ctx, values)
+        return values
+
+    def update(idx):
+        values = {"status": "Spawning"}
+        conductor.cluster_update(ctx, cluster_id, values)
+        return values
+
+    def update_info(idx):
+        values = {"info": cluster["info"]}
+        conductor.cluster_update(ctx, cluster_id, values)
+        return values
+
+    try:
+        _run('cluster_create', create, conductor.db)
+        _run('cluster_update', update, conductor.db)
+        _run('info_update', update_info, conductor.db)
+    finally:
+        if db_path:
+            db_api.drop_db()
+            os.unlink(db_path)
+
+
+if __name__ == "__main__":
+    main()